@@ -0,0 +1,339 @@
+import asyncio
+import logging
+import secrets
+import threading
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any, Callable, Optional, Tuple
+
+from bson.errors import InvalidId
+from fastapi import FastAPI
+from pymongo.errors import DuplicateKeyError
+from starlette.middleware.cors import CORSMiddleware
+
+from core.db import create_mongo_client
+from core.loop_monitor import LoopMonitor
+from core.metrics import MetricsMiddleware, WorkerMetricsExporter
+from core.settings import Settings
+from middleware.rate_limit import RateLimitMiddleware
+from middleware.response_cache import ResponseCacheMiddleware
+from routes import bulk, content, diagnostics, forms, metrics, static, stats, status
+from services.bulk_ingest import BulkIngestService
+from services.circuit_breaker import AdaptiveTimeout, BatchTimeout, CircuitBreaker
+from services.content_service import ContentService, MongoChangeStreamNotifier
+from services.database_service_fixed import DatabaseService
+from services.email_membership import EmailMembership
+from services.export_service import ExportService
+from services.formspree_service import FormspreeService
+from services.idempotency import IdempotencyStore
+from services.outbox_service import OutboxDispatcher, OutboxService
+from services.response_cache import BROTLI_AVAILABLE, ResponseCache
+from services.shared_state import SharedRateLimitBackend, SharedStateChangeNotifier, SharedStateClient
+from services.spam_filter import FormTokens, SpamFilter, load_disposable_domains
+from services.spool import SpoolReplayer, SubmissionSpool
+from services.static_site import StaticSite, precompress
+from services.stats_service import StatsService
+from services.write_behind import WriteBehindBuffer
+from services.rate_limiter import MemoryRateLimitBackend, MongoRateLimitBackend, RateLimit, RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+def build_rate_limiter(settings: Settings, db,
+                       shared_state: Optional[SharedStateClient] = None) -> Optional[RateLimiter]:
+    if not settings.rate_limit_enabled:
+        return None
+    if settings.rate_limit_backend == "mongo":
+        backend = MongoRateLimitBackend(db)
+    elif settings.rate_limit_backend == "shared":
+        if shared_state is None:
+            raise ValueError("rate_limit_backend 'shared' needs shared_state_socket")
+        backend = SharedRateLimitBackend(shared_state)
+    else:
+        backend = MemoryRateLimitBackend(max_keys=settings.rate_limit_max_keys)
+    return RateLimiter(
+        backend,
+        ip_limit=RateLimit.parse(settings.rate_limit_ip),
+        email_limit=RateLimit.parse(settings.rate_limit_email),
+    )
+
+
+async def bootstrap_indexes(app: FastAPI):
+    """Index creation and cache warm-up; runs after startup so workers accept traffic immediately"""
+    state = app.state
+    try:
+        await state.database_service.ensure_indexes()
+    except Exception as e:
+        logger.error(f"Index bootstrap failed: {str(e)}")
+    if isinstance(getattr(state.rate_limiter, "backend", None), MongoRateLimitBackend):
+        try:
+            await state.rate_limiter.backend.ensure_indexes()
+        except Exception as e:
+            logger.error(f"Rate limit index bootstrap failed: {str(e)}")
+    if state.stats_service is not None:
+        try:
+            await state.stats_service.ensure_indexes()
+        except Exception as e:
+            logger.error(f"Stats index bootstrap failed: {str(e)}")
+    if state.idempotency_store is not None:
+        try:
+            await state.idempotency_store.ensure_indexes()
+        except Exception as e:
+            logger.error(f"Idempotency index bootstrap failed: {str(e)}")
+    if state.database_service.membership is not None:
+        try:
+            await state.database_service.warm_membership()
+        except Exception as e:
+            logger.error(f"Waitlist membership warm-up failed: {str(e)}")
+
+
+def build_breakers(settings: Settings) -> Tuple[Optional[CircuitBreaker], ...]:
+    """(formspree, mongo, mongo batch) circuit breakers, or Nones when disabled"""
+    if not settings.circuit_breaker_enabled:
+        return None, None, None
+    common = dict(
+        failure_rate=settings.breaker_failure_rate,
+        slow_rate=settings.breaker_slow_rate,
+        window=settings.breaker_window,
+        min_calls=settings.breaker_min_calls,
+        open_seconds=settings.breaker_open_seconds,
+    )
+    formspree = CircuitBreaker(
+        "formspree",
+        AdaptiveTimeout(settings.formspree_timeout_min, FormspreeService.DEFAULT_TIMEOUT),
+        slow_call_seconds=settings.formspree_slow_call_seconds,
+        **common,
+    )
+    mongo = CircuitBreaker(
+        "mongo",
+        AdaptiveTimeout(settings.mongo_timeout_min, settings.mongo_timeout_max),
+        slow_call_seconds=settings.mongo_slow_call_seconds,
+        # Duplicate emails and bad ids are answers from a healthy server
+        ignored_exceptions=(DuplicateKeyError, InvalidId, ValueError),
+        **common,
+    )
+    # Bulk operations get their own breaker: their failures say little about point writes,
+    # and their timeout has to scale with the batch rather than follow point-op latency
+    mongo_batch = CircuitBreaker(
+        "mongo-batch",
+        BatchTimeout(
+            settings.mongo_batch_timeout_base, settings.mongo_batch_timeout_per_item, settings.mongo_batch_timeout_max
+        ),
+        slow_call_seconds=settings.mongo_batch_timeout_max,
+        ignored_exceptions=(DuplicateKeyError, InvalidId, ValueError),
+        **common,
+    )
+    return formspree, mongo, mongo_batch
+
+
+async def build_spam_filter(settings: Settings) -> Optional[SpamFilter]:
+    if not settings.spam_filter_enabled:
+        return None
+    domains = await asyncio.to_thread(load_disposable_domains, Path(settings.spam_disposable_domains))
+    logger.info(f"Spam filter loaded {len(domains)} disposable email domains")
+    secret = settings.spam_form_secret.encode() or secrets.token_bytes(32)
+    return SpamFilter(
+        disposable_domains=domains,
+        form_tokens=FormTokens(secret),
+        min_fill_ms=settings.spam_min_fill_ms,
+        max_form_age_ms=settings.spam_form_max_age * 1000,
+        max_links=settings.spam_max_links,
+        near_duplicate_threshold=settings.spam_near_duplicate_threshold,
+        index_size=settings.spam_index_size,
+    )
+
+
+async def load_static_site(settings: Settings) -> StaticSite:
+    site = StaticSite(Path(settings.static_root))
+    if settings.static_precompress:
+        written = await asyncio.to_thread(precompress, site.root)
+        logger.info(f"Precompressed {written} static files")
+    await asyncio.to_thread(site.load)
+    return site
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    settings: Settings = app.state.settings
+    logger.info("CashCue API starting up...")
+
+    # One Motor client and one HTTP client per process, created after fork
+    client = app.state.mongo_client_factory(settings)
+    db = client[settings.db_name]
+    shared_state = SharedStateClient(settings.shared_state_socket) if settings.shared_state_socket else None
+
+    membership = None
+    if settings.waitlist_membership_cache:
+        membership = EmailMembership(
+            capacity=settings.waitlist_bloom_capacity,
+            fp_rate=settings.waitlist_bloom_fp_rate,
+            max_bytes=settings.waitlist_bloom_max_bytes,
+            lru_size=settings.waitlist_lru_size,
+        )
+    write_behind = None
+    if settings.write_behind_enabled:
+        write_behind = WriteBehindBuffer(
+            max_batch=settings.write_behind_max_batch,
+            max_delay=settings.write_behind_max_delay_ms / 1000,
+            durability=settings.write_behind_durability,
+        )
+    spool = None
+    if settings.spool_enabled:
+        spool = SubmissionSpool(Path(settings.spool_dir), fsync_delay=settings.spool_fsync_delay_ms / 1000)
+    formspree_breaker, mongo_breaker, mongo_batch_breaker = build_breakers(settings)
+    stats_service = None
+    if settings.stats_enabled:
+        stats_service = StatsService(db, write_behind=write_behind, breaker=mongo_breaker)
+    database_service = DatabaseService(
+        db, membership=membership, write_behind=write_behind, breaker=mongo_breaker, spool=spool,
+        stats=stats_service, batch_breaker=mongo_batch_breaker,
+    )
+    spool_replayer = (
+        SpoolReplayer(spool, database_service, interval=settings.spool_replay_interval) if spool else None
+    )
+    formspree_service = FormspreeService(
+        settings.formspree_endpoint,
+        max_connections=settings.formspree_max_connections,
+        max_concurrency=settings.formspree_max_concurrency,
+        batch_size=settings.formspree_batch_size,
+        batch_window=settings.formspree_batch_window,
+        breaker=formspree_breaker,
+    )
+    outbox_service = OutboxService(db, breaker=mongo_breaker)
+    outbox_dispatcher = OutboxDispatcher(
+        outbox_service,
+        formspree_service,
+        database_service,
+        poll_interval=settings.outbox_poll_interval,
+        max_attempts=settings.outbox_max_attempts,
+    )
+
+    notifier = None
+    if settings.content_change_streams:
+        notifier = MongoChangeStreamNotifier(db)
+    elif shared_state is not None:
+        notifier = SharedStateChangeNotifier(shared_state)
+    content_service = ContentService(db, notifier=notifier, refresh_interval=settings.content_refresh_interval)
+
+    if app.state.response_cache is not None:
+        content_service.listeners.append(lambda: app.state.response_cache.invalidate("/api/"))
+
+    app.state.static_site = await load_static_site(settings) if settings.static_enabled else None
+    if not BROTLI_AVAILABLE and (settings.static_enabled or app.state.response_cache is not None):
+        logger.warning("brotli is not installed: responses and precompressed files fall back to gzip only")
+
+    app.state.mongo_client = client
+    app.state.db = db
+    app.state.database_service = database_service
+    app.state.formspree_service = formspree_service
+    app.state.outbox_service = outbox_service
+    app.state.outbox_dispatcher = outbox_dispatcher
+    app.state.export_service = ExportService(database_service)
+    app.state.stats_service = stats_service
+    app.state.content_service = content_service
+    app.state.bulk_ingest_service = BulkIngestService(
+        database_service,
+        outbox_service,
+        formspree_service,
+        batch_size=settings.bulk_batch_size,
+        max_items=settings.bulk_max_items,
+    )
+    app.state.shared_state = shared_state
+    app.state.rate_limiter = build_rate_limiter(settings, db, shared_state)
+    app.state.spam_filter = await build_spam_filter(settings)
+    app.state.idempotency_store = None
+    if settings.idempotency_enabled:
+        app.state.idempotency_store = IdempotencyStore(
+            db,
+            ttl_seconds=settings.idempotency_ttl_seconds,
+            lru_size=settings.idempotency_lru_size,
+            breaker=mongo_breaker,
+        )
+    app.state.metrics_exporter = WorkerMetricsExporter(Path(settings.metrics_dir)) if settings.metrics_dir else None
+
+    app.state.loop_thread_id = threading.get_ident()
+    app.state.loop_monitor = None
+    if settings.loop_monitor_enabled:
+        app.state.loop_monitor = LoopMonitor(
+            interval=settings.loop_monitor_interval, block_threshold=settings.loop_block_threshold
+        )
+        await app.state.loop_monitor.start()
+
+    if app.state.metrics_exporter is not None:
+        await app.state.metrics_exporter.start()
+    await formspree_service.start()
+    await outbox_dispatcher.start()
+    await content_service.start()
+    if spool_replayer is not None:
+        await spool_replayer.start()
+    bootstrap = asyncio.create_task(bootstrap_indexes(app), name="index-bootstrap")
+    try:
+        yield
+    finally:
+        logger.info("CashCue API shutting down...")
+        bootstrap.cancel()
+        await content_service.stop()
+        await outbox_dispatcher.stop()
+        if spool_replayer is not None:
+            await spool_replayer.stop()
+        if write_behind is not None:
+            await write_behind.close()
+        if spool is not None:
+            await spool.close()
+        await formspree_service.close()
+        if shared_state is not None:
+            await shared_state.close()
+        if app.state.metrics_exporter is not None:
+            await app.state.metrics_exporter.stop()
+        if app.state.loop_monitor is not None:
+            await app.state.loop_monitor.stop()
+        client.close()
+
+
+def create_app(settings: Optional[Settings] = None,
+               mongo_client_factory: Callable[[Settings], Any] = create_mongo_client) -> FastAPI:
+    """
+    Build the CashCue API. Nothing connects until the lifespan starts.
+    mongo_client_factory lets benchmarks swap in fakes.mongo.FakeMotorClient.
+    """
+    settings = settings or Settings.from_env()
+
+    app = FastAPI(title="CashCue API", version="1.0.0", lifespan=lifespan)
+    app.state.settings = settings
+    app.state.mongo_client_factory = mongo_client_factory
+    app.state.response_cache = None
+    if settings.response_cache_enabled:
+        app.state.response_cache = ResponseCache(
+            ttl=settings.response_cache_ttl, max_bytes=settings.response_cache_max_bytes
+        )
+
+    app.include_router(status.router)   # Legacy status routes
+    app.include_router(forms.router)    # Form and admin routes
+    app.include_router(bulk.router)     # Bulk form ingestion
+    app.include_router(content.router)  # Cached services/projects content
+    app.include_router(metrics.router)  # Prometheus /metrics
+    app.include_router(diagnostics.router)  # Loop health and sampling profiler
+    app.include_router(stats.router)    # Submission rollups
+
+    @app.get("/health")
+    async def health_check():
+        return {"status": "healthy", "service": "CashCue API"}
+
+    if settings.static_enabled:
+        app.include_router(static.router)  # SPA catch-all, must stay last
+
+    # Middleware added last runs first: metrics wraps CORS, which wraps rate limiting,
+    # which wraps the response cache, so 429s and cache hits still carry CORS headers and are timed
+    if app.state.response_cache is not None:
+        app.add_middleware(ResponseCacheMiddleware, cache=app.state.response_cache)
+    if settings.rate_limit_enabled:
+        app.add_middleware(RateLimitMiddleware)
+    app.add_middleware(
+        CORSMiddleware,
+        allow_credentials=True,
+        allow_origins=settings.cors_origins,
+        allow_methods=["*"],
+        allow_headers=["*"],
+    )
+    app.add_middleware(MetricsMiddleware)
+    return app
@@ -0,0 +1 @@
+"""Standalone benchmark scripts. Run from backend/, e.g. `python -m benchmarks.bench_formspree_client`."""
@@ -0,0 +1,98 @@
+"""
+Formspree latency through an outage, with and without the circuit breaker.
+
+    python -m benchmarks.bench_circuit_breaker --rate 200 --phase-seconds 5 --outage-latency 2
+
+Requests arrive at a fixed rate against a local fake Formspree server that
+is healthy, then slow (outage-latency per request), then healthy again.
+Reported per mode and phase: calls, successes, fast-failed (circuit open)
+calls and p50/p99/max caller latency.
+"""
+import argparse
+import asyncio
+import json
+import time
+from typing import Dict, List
+
+from fakes.formspree_server import FakeFormspreeServer
+from services.circuit_breaker import AdaptiveTimeout, CircuitBreaker
+from services.formspree_service import FormspreeService
+
+PAYLOAD = {"name": "Bench User", "email": "bench@example.com", "message": "Benchmark", "form_type": "Contact Form"}
+PHASES = ("healthy", "outage", "recovered")
+
+
+def percentile(values: List[float], fraction: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+async def run(fake: FakeFormspreeServer, breaker, rate: int, phase_seconds: float,
+              healthy_latency: float, outage_latency: float) -> List[Dict]:
+    service = FormspreeService(fake.url, max_connections=100, max_concurrency=1000, breaker=breaker)
+    await service.start()
+    samples: Dict[str, List] = {phase: [] for phase in PHASES}
+
+    async def one(phase: str):
+        started = time.perf_counter()
+        result = await service.submit_form(PAYLOAD)
+        samples[phase].append((time.perf_counter() - started, result))
+
+    tasks = []
+    try:
+        for phase in PHASES:
+            fake.latency = outage_latency if phase == "outage" else healthy_latency
+            deadline = time.perf_counter() + phase_seconds
+            while time.perf_counter() < deadline:
+                tasks.append(asyncio.create_task(one(phase)))
+                await asyncio.sleep(1 / rate)
+        await asyncio.gather(*tasks)
+    finally:
+        await service.close()
+
+    rows = []
+    for phase in PHASES:
+        latencies = [latency for latency, _ in samples[phase]]
+        results = [result for _, result in samples[phase]]
+        rows.append({
+            "mode": "breaker" if breaker else "no-breaker",
+            "phase": phase,
+            "calls": len(results),
+            "succeeded": sum(1 for r in results if r.get("success")),
+            "fast_failed": sum(1 for r in results if r.get("circuit_open")),
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "max_ms": round(max(latencies, default=0.0) * 1000, 1),
+        })
+    return rows
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rate", type=int, default=200, help="requests per second")
+    parser.add_argument("--phase-seconds", type=float, default=5.0)
+    parser.add_argument("--healthy-latency", type=float, default=0.01)
+    parser.add_argument("--outage-latency", type=float, default=2.0)
+    parser.add_argument("--open-seconds", type=float, default=2.0)
+    args = parser.parse_args()
+
+    results = []
+    for use_breaker in (False, True):
+        breaker = None
+        if use_breaker:
+            breaker = CircuitBreaker(
+                "formspree",
+                AdaptiveTimeout(0.1, FormspreeService.DEFAULT_TIMEOUT),
+                slow_call_seconds=0.5,
+                open_seconds=args.open_seconds,
+            )
+        with FakeFormspreeServer(latency=args.healthy_latency) as fake:
+            results.extend(await run(fake, breaker, args.rate, args.phase_seconds,
+                                     args.healthy_latency, args.outage_latency))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
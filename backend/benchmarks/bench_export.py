@@ -0,0 +1,63 @@
+"""
+Export encoder throughput.
+
+    python -m benchmarks.bench_export --rows 200000
+
+Feeds synthetic waitlist documents through ExportService in each format and
+reports rows/sec, bytes produced and peak traced memory. No Mongo needed. Run
+the /api/admin/export endpoint against a real database to include cursor cost.
+"""
+import argparse
+import asyncio
+import json
+import time
+import tracemalloc
+import uuid
+from datetime import datetime, timedelta
+
+from services.export_service import DEFAULT_FIELDS, EXPORT_FORMATS, ExportService
+
+
+async def synthetic_docs(rows: int):
+    base = datetime(2025, 1, 1)
+    for i in range(rows):
+        yield {
+            "id": str(uuid.UUID(int=i)),
+            "name": f"User {i}",
+            "email": f"user{i}@example.com",
+            "interests": "AI automation, chatbots",
+            "submitted_at": base + timedelta(seconds=i),
+            "formspree_status": "sent",
+        }
+
+
+async def run(format: str, rows: int):
+    service = ExportService(database_service=None)
+    fields = DEFAULT_FIELDS["waitlist"]
+    tracemalloc.start()
+    started = time.perf_counter()
+    total_bytes = 0
+    async for chunk in service.encode(synthetic_docs(rows), format, fields):
+        total_bytes += len(chunk)
+    elapsed = time.perf_counter() - started
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return {
+        "format": format,
+        "rows": rows,
+        "rows_per_sec": round(rows / elapsed),
+        "bytes": total_bytes,
+        "peak_memory_kib": peak // 1024,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200_000)
+    args = parser.parse_args()
+    results = [await run(format, args.rows) for format in EXPORT_FORMATS]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
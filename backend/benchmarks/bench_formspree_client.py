@@ -0,0 +1,85 @@
+"""
+Compare the pooled async Formspree client with the old executor + requests.post approach.
+
+    python -m benchmarks.bench_formspree_client --requests 2000 --concurrency 100
+
+Both modes post to a local fake Formspree server. Reported per mode:
+requests/sec and the number of TCP connections the server accepted.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from fakes.formspree_server import FakeFormspreeServer
+from services.formspree_service import FormspreeService
+
+PAYLOAD = {
+    "name": "Bench User",
+    "email": "bench@example.com",
+    "message": "Benchmark message",
+    "form_type": "Contact Form",
+}
+
+
+async def run_executor(url: str, total: int, concurrency: int):
+    """The pre-pool implementation: blocking requests.post on the default thread pool."""
+    import requests
+
+    loop = asyncio.get_running_loop()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one():
+        async with semaphore:
+            await loop.run_in_executor(
+                None,
+                lambda: requests.post(url, json=PAYLOAD, headers={"Accept": "application/json"}, timeout=10),
+            )
+
+    await asyncio.gather(*(one() for _ in range(total)))
+
+
+async def run_pooled(url: str, total: int, concurrency: int):
+    service = FormspreeService(url, max_concurrency=concurrency)
+    await service.start()
+    try:
+        await asyncio.gather(*(service.submit_form(PAYLOAD) for _ in range(total)))
+    finally:
+        await service.close()
+
+
+async def measure(name, runner, fake, total, concurrency):
+    fake.reset()
+    started = time.perf_counter()
+    await runner(fake.url, total, concurrency)
+    elapsed = time.perf_counter() - started
+    return {
+        "mode": name,
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(total / elapsed, 1),
+        "sockets_opened": fake.connections,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=2000)
+    parser.add_argument("--concurrency", type=int, default=100)
+    parser.add_argument("--latency", type=float, default=0.005, help="fake server latency in seconds")
+    args = parser.parse_args()
+
+    results = []
+    with FakeFormspreeServer(latency=args.latency) as fake:
+        try:
+            results.append(await measure("executor+requests", run_executor, fake, args.requests, args.concurrency))
+        except ImportError:
+            print("requests is not installed; skipping the executor baseline")
+        results.append(await measure("pooled-httpx", run_pooled, fake, args.requests, args.concurrency))
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,123 @@
+"""
+Retried and duplicated form submissions with and without idempotency.
+
+    python -m benchmarks.bench_idempotency --retries 5 --concurrent 20
+
+A client POSTs /api/contact once with an Idempotency-Key, then retries
+the same request --retries times. Separately, --concurrent identical
+requests are sent at once, with a key and without one. This runs twice
+against a fakes.mongo.FakeMotorClient: once with IDEMPOTENCY_ENABLED=false
+and once with it on.
+
+Reported per run: stored contact submissions, outbox entries (one per
+Formspree email), Mongo operations spent on the retries, distinct
+submission ids handed out, and how many responses were marked
+Idempotent-Replayed. With idempotency on, each of the three scenarios
+should store one submission and one outbox entry. Retries should cost no Mongo operations,
+since the in-process LRU answers them.
+
+Also reported: the mean latency of --fresh distinct submissions with and
+without a key (a keyed one pays for the claim and the stored response,
+two Mongo round trips of --latency-ms each), and the answer to a repeated
+waitlist signup sent without a key, which must not be a replay.
+"""
+import argparse
+import asyncio
+import json
+import time
+import uuid
+from typing import Any, Dict, List
+
+import httpx
+
+from app_factory import create_app
+from core.settings import Settings
+from fakes.formspree_server import FakeFormspreeServer
+from fakes.mongo import FakeMotorClient
+
+
+def body(n) -> Dict[str, Any]:
+    return {"name": f"Retry {n}", "email": f"retry{n}@example.com", "message": "Please call me back about a project."}
+
+
+def summarize(responses: List[httpx.Response]) -> Dict[str, Any]:
+    return {
+        "statuses": sorted({r.status_code for r in responses}),
+        "submission_ids": len({r.json().get("submission_id") for r in responses if r.status_code == 200}),
+        "replayed": sum(r.headers.get("Idempotent-Replayed") == "true" for r in responses),
+    }
+
+
+async def run(enabled: bool, args, formspree_url: str) -> Dict[str, Any]:
+    mongo = FakeMotorClient(latency=args.latency_ms / 1000)
+    settings = Settings(formspree_endpoint=formspree_url, outbox_poll_interval=60, spool_enabled=False,
+                        rate_limit_enabled=False, spam_filter_enabled=False, idempotency_enabled=enabled)
+    app = create_app(settings, mongo_client_factory=lambda _: mongo)
+    db = mongo[settings.db_name]
+    async with app.router.lifespan_context(app):
+        await asyncio.sleep(0.2)  # let startup index creation and content loading settle
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+            headers = {"Idempotency-Key": str(uuid.uuid4())}
+            first = await client.post("/api/contact", json=body(0), headers=headers)
+            await asyncio.sleep(0.1)  # let write-behind flush the first submission before counting
+            before = mongo.operations
+            started = time.perf_counter()
+            retries = [await client.post("/api/contact", json=body(0), headers=headers) for _ in range(args.retries)]
+            retry_seconds = time.perf_counter() - started
+            retry_operations = mongo.operations - before
+
+            headers = {"Idempotency-Key": str(uuid.uuid4())}
+            concurrent = await asyncio.gather(*(
+                client.post("/api/contact", json=body(1), headers=headers) for _ in range(args.concurrent)
+            ))
+            concurrent_keyless = await asyncio.gather(*(
+                client.post("/api/contact", json=body(2)) for _ in range(args.concurrent)
+            ))
+            await asyncio.sleep(0.1)
+            stored = await db["contact_submissions"].count_documents({})
+            outbox = await db["formspree_outbox"].count_documents({})
+
+            fresh = {}
+            for label, keyed in (("without_key", False), ("with_key", True)):
+                started = time.perf_counter()
+                for n in range(args.fresh):
+                    headers = {"Idempotency-Key": str(uuid.uuid4())} if keyed else {}
+                    await client.post("/api/contact", json=body(f"{label}-{n}"), headers=headers)
+                fresh[f"{label}_ms"] = round((time.perf_counter() - started) * 1000 / max(1, args.fresh), 2)
+
+            signup = {"name": "Repeat", "email": "repeat@example.com"}
+            await client.post("/api/ai-waitlist", json=signup)
+            resignup = await client.post("/api/ai-waitlist", json=signup)
+
+    return {
+        "idempotency": enabled,
+        "retried": {
+            **summarize([first, *retries]),
+            "mongo_operations_for_retries": retry_operations,
+            "retry_ms": round(retry_seconds * 1000 / max(1, args.retries), 2),
+        },
+        "concurrent": summarize(concurrent),
+        "concurrent_without_key": summarize(concurrent_keyless),
+        "stored_submissions": stored,
+        "outbox_entries": outbox,
+        "fresh_submission": fresh,
+        "waitlist_resignup_without_key": resignup.json()["message"],
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--retries", type=int, default=5)
+    parser.add_argument("--concurrent", type=int, default=20)
+    parser.add_argument("--fresh", type=int, default=50, help="distinct submissions timed with and without a key")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="added to every fake Mongo operation")
+    args = parser.parse_args()
+
+    with FakeFormspreeServer() as formspree:
+        results = [asyncio.run(run(enabled, args, formspree.url)) for enabled in (False, True)]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    main()
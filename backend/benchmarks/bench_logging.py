@@ -0,0 +1,127 @@
+"""
+Event-loop lag while logging heavily to a slow stdout, before and after the
+queue-based pipeline.
+
+    python -m benchmarks.bench_logging --seconds 5 --rate 5000
+
+stdout is simulated by a pipe drained at --sink-bytes-per-sec, like a
+container log driver under pressure. Modes:
+  - sync-text: logging.basicConfig-style StreamHandler, writes on the event loop
+  - queue-json: core.logging_config (bounded queue, listener thread, JSON + redaction)
+Reported: loop lag p50/p99/max (how late a 5 ms timer fires), records
+logged, records dropped by the bounded queue.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import threading
+import time
+from types import SimpleNamespace
+
+from core.logging_config import configure_logging, queue_handler
+
+PROBE_INTERVAL = 0.005
+
+
+class SlowSink:
+    """A pipe whose reader drains at a fixed byte rate"""
+
+    def __init__(self, bytes_per_sec: int):
+        read_fd, write_fd = os.pipe()
+        self.reader = os.fdopen(read_fd, "rb", buffering=0)
+        self.writer = os.fdopen(write_fd, "w", buffering=1)
+        self.bytes_per_sec = bytes_per_sec
+        self.received = 0
+        self._thread = threading.Thread(target=self._drain, daemon=True)
+        self._thread.start()
+
+    def _drain(self):
+        chunk = 4096
+        while True:
+            data = self.reader.read(chunk)
+            if not data:
+                return
+            self.received += len(data)
+            time.sleep(len(data) / self.bytes_per_sec)
+
+    def close(self):
+        self.writer.close()
+
+
+def reset_logging():
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+
+
+async def run(mode: str, seconds: float, rate: int, sink_rate: int, queue_size: int):
+    sink = SlowSink(sink_rate)
+    reset_logging()
+    listener = None
+    if mode == "sync-text":
+        handler = logging.StreamHandler(sink.writer)
+        handler.setFormatter(logging.Formatter("%(asctime)s - %(name)s - %(levelname)s - %(message)s"))
+        logging.getLogger().addHandler(handler)
+        logging.getLogger().setLevel(logging.INFO)
+    else:
+        settings = SimpleNamespace(log_hash_salt="", log_format="json", log_queue_size=queue_size,
+                                   log_queue_drop="new", log_sampling="", log_level="INFO")
+        listener = configure_logging(settings, stream=sink.writer)
+    logger = logging.getLogger("routes.forms")
+
+    lags = []
+    stop = time.perf_counter() + seconds
+    logged = 0
+
+    async def probe():
+        while time.perf_counter() < stop:
+            started = time.perf_counter()
+            await asyncio.sleep(PROBE_INTERVAL)
+            lags.append(time.perf_counter() - started - PROBE_INTERVAL)
+
+    async def producer():
+        nonlocal logged
+        batch = max(1, rate // 1000)
+        while time.perf_counter() < stop:
+            for _ in range(batch):
+                logger.info(f"Received waitlist submission from user{logged}@example.com at 203.0.113.{logged % 255}")
+                logged += 1
+            await asyncio.sleep(0.001)
+
+    await asyncio.gather(probe(), producer())
+    handler = queue_handler()
+    dropped = handler.dropped if handler else 0
+    if listener is not None:
+        listener.stop()
+    reset_logging()
+    sink.close()
+
+    lags.sort()
+    return {
+        "mode": mode,
+        "logged": logged,
+        "dropped": dropped,
+        "lag_p50_ms": round(lags[len(lags) // 2] * 1000, 2),
+        "lag_p99_ms": round(lags[int(len(lags) * 0.99)] * 1000, 2),
+        "lag_max_ms": round(lags[-1] * 1000, 2),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--seconds", type=float, default=5.0)
+    parser.add_argument("--rate", type=int, default=5000, help="log records per second")
+    parser.add_argument("--sink-bytes-per-sec", type=int, default=256 * 1024)
+    parser.add_argument("--queue-size", type=int, default=10_000)
+    args = parser.parse_args()
+
+    results = []
+    for mode in ("sync-text", "queue-json"):
+        results.append(await run(mode, args.seconds, args.rate, args.sink_bytes_per_sec, args.queue_size))
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,75 @@
+"""
+Per-request cost of the metrics instrumentation.
+
+    python -m benchmarks.bench_metrics_overhead --requests 200000
+
+Drives a no-op ASGI app with and without MetricsMiddleware, plus three
+dependency spans per request (the /api/contact shape: insert, outbox
+enqueue, status update). The difference is the instrumentation overhead,
+which should stay under the 25 µs budget stated in core/metrics.py.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+from core.metrics import MetricsMiddleware, MetricsRegistry, instrumented
+
+BUDGET_US = 25.0
+
+
+class _Route:
+    path = "/api/contact"
+
+
+async def bare_app(scope, receive, send):
+    scope["route"] = _Route()
+    await send({"type": "http.response.start", "status": 200, "headers": []})
+    await send({"type": "http.response.body", "body": b"{}"})
+
+
+async def noop_dependency():
+    return {"success": True}
+
+
+async def receive():
+    return {"type": "http.request", "body": b"", "more_body": False}
+
+
+async def send(message):
+    pass
+
+
+async def drive(app, dependency, requests: int) -> float:
+    started = time.perf_counter()
+    for _ in range(requests):
+        scope = {"type": "http", "method": "POST", "path": "/api/contact"}
+        await app(scope, receive, send)
+        for _ in range(3):
+            await dependency()
+    return time.perf_counter() - started
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200_000)
+    args = parser.parse_args()
+
+    histogram = MetricsRegistry().histogram("bench_request_seconds", "bench", ("method", "route", "status"))
+    baseline = await drive(bare_app, noop_dependency, args.requests)
+    instrumented_run = await drive(
+        MetricsMiddleware(bare_app, histogram), instrumented("bench")(noop_dependency), args.requests
+    )
+    overhead_us = (instrumented_run - baseline) / args.requests * 1e6
+    print(json.dumps({
+        "requests": args.requests,
+        "baseline_us_per_request": round(baseline / args.requests * 1e6, 2),
+        "instrumented_us_per_request": round(instrumented_run / args.requests * 1e6, 2),
+        "overhead_us_per_request": round(overhead_us, 2),
+        "budget_us": BUDGET_US,
+        "within_budget": overhead_us <= BUDGET_US,
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
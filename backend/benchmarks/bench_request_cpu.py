@@ -0,0 +1,146 @@
+"""
+Per-request CPU time of submission model handling, before and after
+promoting the validated request model instead of rebuilding it.
+
+    python -m benchmarks.bench_request_cpu --iterations 20000
+
+Cases (CPU microseconds per operation, old vs new):
+  - contact / waitlist: build the stored submission, its Mongo document and
+    the Formspree payload from a validated *Create model
+  - status-list: GET /api/status over --status-docs documents, through the
+    ASGI app with an in-memory fake Mongo
+  - ndjson-export: encode one export line per document (json vs fast_json)
+"""
+import argparse
+import asyncio
+import json
+import time
+import warnings
+from typing import List
+
+from fastapi import APIRouter, Depends, FastAPI
+
+from core import fast_json
+from core.db import get_db
+from fakes.mongo import FakeMotorClient
+from models import ContactSubmission, ContactSubmissionCreate, WaitlistSubmission, WaitlistSubmissionCreate
+from routes import status
+from routes.status import StatusCheck
+from services.database_service_fixed import json_default, normalize_email
+from services.formspree_service import FormspreeService
+
+FORMSPREE = FormspreeService("http://127.0.0.1:9/f/bench")
+CONTACT = ContactSubmissionCreate(name="Bench User", email="bench@example.com", company="CashCue",
+                                  projectType="web", budget="10k", message="Benchmark message " * 10)
+WAITLIST = WaitlistSubmissionCreate(name="Bench User", email="bench@example.com", interests="AI agents")
+
+
+def contact_old():
+    submission = ContactSubmission(
+        name=CONTACT.name, email=CONTACT.email, company=CONTACT.company, project_type=CONTACT.project_type,
+        budget=CONTACT.budget, message=CONTACT.message, ip_address="203.0.113.7",
+    )
+    doc = submission.dict()
+    payload = FORMSPREE.build_contact_payload(CONTACT.dict())
+    return doc, payload
+
+
+def contact_new():
+    submission = ContactSubmission.from_create(CONTACT, ip_address="203.0.113.7")
+    doc = submission.to_document()
+    payload = FORMSPREE.build_contact_payload(CONTACT.__dict__)
+    return doc, payload
+
+
+def waitlist_old():
+    submission = WaitlistSubmission(name=WAITLIST.name, email=WAITLIST.email, interests=WAITLIST.interests,
+                                    ip_address="203.0.113.7")
+    doc = submission.dict()
+    doc["email_normalized"] = normalize_email(submission.email)
+    payload = FORMSPREE.build_waitlist_payload(WAITLIST.dict())
+    return doc, payload
+
+
+def waitlist_new():
+    submission = WaitlistSubmission.from_create(WAITLIST, ip_address="203.0.113.7")
+    doc = submission.to_document()
+    doc["email_normalized"] = normalize_email(submission.email)
+    payload = FORMSPREE.build_waitlist_payload(WAITLIST.__dict__)
+    return doc, payload
+
+
+def cpu_us(func, iterations: int) -> float:
+    started = time.process_time()
+    for _ in range(iterations):
+        func()
+    return (time.process_time() - started) / iterations * 1e6
+
+
+def legacy_status_router() -> APIRouter:
+    """The status listing as it was: rebuild every model, then let response_model validate it again"""
+    router = APIRouter(prefix="/legacy")
+
+    @router.get("/status", response_model=List[StatusCheck])
+    async def get_status_checks(db=Depends(get_db)):
+        status_checks = await db.status_checks.find().to_list(1000)
+        return [StatusCheck(**status_check) for status_check in status_checks]
+
+    return router
+
+
+async def asgi_cpu_us(app: FastAPI, path: str, iterations: int) -> float:
+    scope = {
+        "type": "http", "method": "GET", "path": path, "raw_path": path.encode(), "query_string": b"",
+        "headers": [], "http_version": "1.1", "scheme": "http", "server": ("bench", 80),
+        "client": ("203.0.113.7", 1234), "root_path": "", "app": app,
+    }
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    started = time.process_time()
+    for _ in range(iterations):
+        await app(scope, receive, send)
+    return (time.process_time() - started) / iterations * 1e6
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=20_000)
+    parser.add_argument("--status-docs", type=int, default=100)
+    args = parser.parse_args()
+    warnings.simplefilter("ignore", DeprecationWarning)  # .dict() warns on every call in the old path
+
+    results = []
+    for case, old, new in (("contact", contact_old, contact_new), ("waitlist", waitlist_old, waitlist_new)):
+        old_us, new_us = cpu_us(old, args.iterations), cpu_us(new, args.iterations)
+        results.append({"case": case, "old_us": round(old_us, 2), "new_us": round(new_us, 2),
+                        "speedup": round(old_us / new_us, 2)})
+
+    app = FastAPI()
+    app.include_router(status.router)
+    app.include_router(legacy_status_router())
+    app.state.db = FakeMotorClient()["bench"]
+    for i in range(args.status_docs):
+        await app.state.db.status_checks.insert_one(StatusCheck(client_name=f"client-{i}").dict())
+    requests = max(1, args.iterations // 20)
+    old_us = await asgi_cpu_us(app, "/legacy/status", requests)
+    new_us = await asgi_cpu_us(app, "/api/status", requests)
+    results.append({"case": "status-list", "documents": args.status_docs, "old_us": round(old_us, 2),
+                    "new_us": round(new_us, 2), "speedup": round(old_us / new_us, 2)})
+
+    docs = [ContactSubmission.from_create(CONTACT).to_document() for _ in range(1000)]
+    old_us = cpu_us(lambda: [json.dumps(d, default=json_default, separators=(",", ":")).encode() for d in docs],
+                    max(1, args.iterations // 1000)) / len(docs)
+    new_us = cpu_us(lambda: [fast_json.dumps(d, default=json_default) for d in docs],
+                    max(1, args.iterations // 1000)) / len(docs)
+    results.append({"case": "ndjson-export", "orjson": fast_json.ORJSON_AVAILABLE, "old_us": round(old_us, 2),
+                    "new_us": round(new_us, 2), "speedup": round(old_us / new_us, 2)})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
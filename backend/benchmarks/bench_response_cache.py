@@ -0,0 +1,106 @@
+"""
+Requests/sec on the content endpoints with and without the response cache.
+
+    python -m benchmarks.bench_response_cache --projects 40 --requests 5000
+
+Seeds fakes.mongo.FakeMotorClient with services and projects shaped like
+frontend/src/mock.js, builds the app twice (RESPONSE_CACHE off / on) and
+drives GET /api/services, /api/projects and /api/projects?category=... through
+httpx's ASGI transport with `Accept-Encoding: gzip, br`. Both runs serve the
+same bytes; the cached run skips routing, dependency injection and
+compression on every hit.
+"""
+import argparse
+import asyncio
+import json
+import time
+
+import httpx
+
+from app_factory import create_app
+from core.settings import Settings
+from fakes.mongo import FakeMotorClient
+from models import Project, Service
+
+CATEGORIES = ("Landing Page", "E-commerce", "Dashboard", "Fintech")
+PATHS = ("/api/services", "/api/projects", "/api/projects?category=Fintech", "/api/projects?category=Dashboard")
+
+
+async def seed(mongo: FakeMotorClient, db_name: str, n_services: int, n_projects: int):
+    db = mongo[db_name]
+    for i in range(n_services):
+        service = Service(
+            title=f"Service {i}",
+            description="Custom web applications built with modern frameworks and clean code. " * 2,
+            features=["React & Next.js", "Responsive Design", "SEO Optimized", "Fast Performance"],
+            order=i,
+        )
+        await db["services"].insert_one(service.model_dump())
+    for i in range(n_projects):
+        project = Project(
+            title=f"Project {i}",
+            description="A high-converting landing page with modern animations and clean design.",
+            image=f"https://images.unsplash.com/photo-{1460925895917 + i}?w=800&h=600&fit=crop",
+            category=CATEGORIES[i % len(CATEGORIES)],
+            tech=["React", "Tailwind CSS", "Framer Motion"],
+            order=i,
+        )
+        await db["projects"].insert_one(project.model_dump())
+
+
+async def run(cache: bool, args) -> dict:
+    mongo = FakeMotorClient()
+    settings = Settings(rate_limit_enabled=False, response_cache_enabled=cache)
+    await seed(mongo, settings.db_name, args.services, args.projects)
+    app = create_app(settings, mongo_client_factory=lambda _: mongo)
+    headers = {"Accept-Encoding": "gzip, br"}
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", headers=headers) as client:
+            while (await client.get("/api/services")).status_code == 503:
+                await asyncio.sleep(0.01)
+            remaining = iter(range(args.requests))
+            wire_bytes = 0
+
+            async def worker():
+                nonlocal wire_bytes
+                for i in remaining:
+                    response = await client.get(PATHS[i % len(PATHS)])
+                    assert response.status_code == 200, response.status_code
+                    wire_bytes += int(response.headers["content-length"])
+
+            started = time.perf_counter()
+            await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+            elapsed = time.perf_counter() - started
+    result = {
+        "cache": cache,
+        "requests": args.requests,
+        "seconds": round(elapsed, 3),
+        "requests_per_sec": round(args.requests / elapsed, 1),
+        "avg_wire_bytes": round(wire_bytes / args.requests),
+    }
+    if cache:
+        result["hits"] = app.state.response_cache.hits
+        result["misses"] = app.state.response_cache.misses
+    return result
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--services", type=int, default=6)
+    parser.add_argument("--projects", type=int, default=40)
+    parser.add_argument("--requests", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=20)
+    args = parser.parse_args()
+
+    before = await run(False, args)
+    after = await run(True, args)
+    print(json.dumps({
+        "uncached": before,
+        "cached": after,
+        "speedup": round(after["requests_per_sec"] / before["requests_per_sec"], 2),
+    }, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
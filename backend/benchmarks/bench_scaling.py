@@ -0,0 +1,149 @@
+"""
+Throughput of the pre-fork launcher with 1..N workers.
+
+    python -m benchmarks.bench_scaling --max-workers 4 --clients 4 --seconds 10
+
+For each worker count, launcher.Launcher runs in a child process with a
+fakes.mongo.FakeMotorClient per worker and one shared
+fakes.formspree_server.FakeFormspreeServer. Then --clients load processes
+drive POST /api/contact over real TCP connections for --seconds. Rate
+limiting stays on (with a limit nobody reaches), so every request also does
+a round trip to the shared state server.
+
+Reported per worker count: requests/s, p50/p99 latency, and speedup and
+efficiency relative to one worker. The load processes share the host: on a
+machine with C cores, keep max-workers + clients <= C. Otherwise the numbers
+measure contention, not scaling.
+"""
+import argparse
+import asyncio
+import json
+import multiprocessing
+import os
+import random
+import signal
+import tempfile
+import time
+from typing import Dict, List
+
+import httpx
+
+from benchmarks.bench_spam_filter import ham_message
+from core.settings import Settings
+from fakes.formspree_server import FakeFormspreeServer
+from fakes.mongo import FakeMotorClient
+from launcher import Launcher
+
+
+def serve(settings: Settings, port: int, workers: int):
+    Launcher(settings, port=port, workers=workers, mongo_client_factory=lambda _: FakeMotorClient()).run()
+
+
+async def drive(url: str, seconds: float, concurrency: int, client_id: int) -> Dict[str, list]:
+    latencies: List[float] = []
+    errors = 0
+    stop = time.perf_counter() + seconds
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    # Varied, realistic messages: a repeated template would be stopped by the spam filter
+    rng = random.Random(client_id)
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=10.0) as client:
+        # One token for the whole run; spam_min_fill_ms=0 lets it be used straight away
+        form_token = (await client.get("/api/form-token", params={"form": "contact"})).json()["token"]
+
+        async def loop(worker: int):
+            nonlocal errors
+            n = 0
+            while time.perf_counter() < stop:
+                n += 1
+                body = {
+                    "name": f"Scale {client_id}-{worker}-{n}",
+                    "email": f"scale{client_id}.{worker}.{n}@example.com",
+                    "message": ham_message(rng),
+                    "_form_token": form_token,
+                }
+                started = time.perf_counter()
+                try:
+                    response = await client.post("/api/contact", json=body)
+                    if response.status_code != 200:
+                        errors += 1
+                except httpx.HTTPError:
+                    errors += 1
+                latencies.append(time.perf_counter() - started)
+
+        await asyncio.gather(*(loop(w) for w in range(concurrency)))
+    return {"latencies": latencies, "errors": errors}
+
+
+def load_process(args):
+    return asyncio.run(drive(*args))
+
+
+def wait_until_ready(url: str, timeout: float = 20.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            if httpx.get(f"{url}/health", timeout=1.0).status_code == 200:
+                return
+        except httpx.HTTPError:
+            pass
+        time.sleep(0.1)
+    raise RuntimeError(f"Launcher at {url} did not become ready")
+
+
+def run(workers: int, args, formspree_url: str, port: int) -> Dict[str, float]:
+    ctx = multiprocessing.get_context("fork")
+    spool_dir = tempfile.mkdtemp(prefix="bench-scaling-spool-")
+    settings = Settings(
+        formspree_endpoint=formspree_url,
+        rate_limit_ip="1000000000/1",
+        spam_min_fill_ms=0,
+        spool_dir=spool_dir,
+        log_level="WARNING",
+    )
+    server = ctx.Process(target=serve, args=(settings, port, workers))
+    server.start()
+    url = f"http://127.0.0.1:{port}"
+    try:
+        wait_until_ready(url)
+        time.sleep(1.0)  # let every worker finish its lifespan startup
+        with ctx.Pool(args.clients) as pool:
+            pool.map(load_process, [(url, 1.0, args.concurrency, c) for c in range(args.clients)])  # warm-up
+            results = pool.map(load_process, [(url, args.seconds, args.concurrency, c) for c in range(args.clients)])
+    finally:
+        os.kill(server.pid, signal.SIGTERM)
+        server.join(40)
+
+    latencies = sorted(l for r in results for l in r["latencies"])
+    return {
+        "workers": workers,
+        "requests": len(latencies),
+        "errors": sum(r["errors"] for r in results),
+        "rps": round(len(latencies) / args.seconds, 1),
+        "p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--max-workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--clients", type=int, default=2, help="load generator processes")
+    parser.add_argument("--concurrency", type=int, default=32, help="connections per load process")
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+
+    counts = sorted({1, *[n for n in (2, 4, 8, 16, 32, 64) if n < args.max_workers], args.max_workers})
+    results = []
+    with FakeFormspreeServer() as formspree:
+        for workers in counts:
+            results.append(run(workers, args, formspree.url, args.port))
+    base = results[0]["rps"]
+    for result in results:
+        result["speedup"] = round(result["rps"] / base, 2) if base else 0.0
+        result["efficiency"] = round(result["speedup"] / result["workers"], 2)
+    print(json.dumps({"cpu_count": os.cpu_count(), "results": results}, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,258 @@
+"""
+Precision, recall and cost of the spam pre-filter on a synthetic corpus.
+
+    python -m benchmarks.bench_spam_filter --ham 5000 --spam 5000
+
+The corpus mixes generated legitimate contact messages (varied wording,
+some with one link, some very short) with seven kinds of junk: honeypot
+fills, missing form tokens, instant submissions, disposable domains, link
+stuffing, repetition, and a near-duplicate campaign (one template, a few words changed per copy,
+a new sender each time). Form tokens are minted with the fill time
+backdated, as if the form had been open that long. Reported:
+  - precision/recall overall and the catch rate per spam kind
+  - false positives on ham, by the stage that fired
+  - µs per check (mean, p99) for ham and spam, and checks per second
+  - Mongo operations and Formspree requests caused by rejected submissions
+    sent through the real app (should be zero)
+MinHash uses the built-in str hash, so the duplicate numbers move a
+little between runs unless PYTHONHASHSEED is fixed.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List, Tuple
+
+import httpx
+
+from app_factory import create_app
+from core.settings import Settings
+from fakes.formspree_server import FakeFormspreeServer
+from fakes.mongo import FakeMotorClient
+from services.spam_filter import FormTokens, SpamFilter, load_disposable_domains
+
+DOMAINS = Path(__file__).resolve().parent.parent / "data" / "disposable_domains.txt"
+SECRET = "bench-spam-filter"
+
+FIRST = ["Alex", "Sam", "Priya", "Chen", "Maria", "Tom", "Aisha", "Lukas", "Sofia", "Kenji", "Omar", "Ella"]
+LAST = ["Smith", "Garcia", "Patel", "Nguyen", "Müller", "Okafor", "Rossi", "Kim", "Haddad", "Berg"]
+MAIL = ["gmail.com", "outlook.com", "yahoo.com", "proton.me", "acme.io", "northwind.co.uk", "initech.com"]
+OPENERS = [
+    "Hi there,", "Hello team,", "Good morning,", "Hey,", "Hi CashCue,", "Dear team,", "Hello,",
+]
+ASKS = [
+    "we are looking for help building a {thing} for our {team}",
+    "I'd like a quote for a {thing} that our {team} can use every day",
+    "could you tell me whether you take on {thing} projects for a {team}",
+    "our {team} needs a {thing} and we saw your portfolio",
+    "I'm exploring options for a {thing}; the {team} has outgrown spreadsheets",
+]
+THINGS = [
+    "customer portal", "inventory dashboard", "booking system", "mobile app", "marketing site",
+    "internal CRM", "data pipeline", "AI chatbot", "payments integration", "reporting tool",
+]
+TEAMS = ["sales team", "clinic", "warehouse staff", "startup", "nonprofit", "school", "restaurant group"]
+DETAILS = [
+    "Timeline is roughly {n} weeks.", "Budget is flexible within reason.", "We already have designs in Figma.",
+    "It has to integrate with {tool}.", "We have about {n}00 users today.", "Ideally we launch before Q{q}.",
+    "Happy to jump on a call next week.", "Our current vendor stopped responding.",
+    "Security review is required on our side.", "We use {tool} for accounting.",
+]
+COMPANIES = ["Brightline", "Harbor & Co", "Kestrel Labs", "Fernwood", "Quill", "Atlas Dental", "Pine Street Cafe",
+             "Novak Logistics", "Sunrise Yoga", "Orbit Analytics", "Greenleaf", "Blue Fin Charters"]
+CITIES = ["Austin", "Leeds", "Toronto", "Lagos", "Munich", "Sydney", "Pune", "Lisbon", "Denver", "Osaka"]
+SPECIFICS = [
+    "Right now we track {n}0 orders a day by hand and it breaks every Friday.",
+    "The old system was built in {year} and nobody on staff can maintain it.",
+    "We tried two off-the-shelf tools but neither handled {tool} properly.",
+    "Most of our customers are on phones, so mobile matters more than desktop.",
+    "I run operations for {company} in {city} and report to the founders.",
+    "We're {company}, a team of {n} based in {city}.",
+    "Our investors want a demo by {month}, so speed matters.",
+    "Accessibility is a must since many of our users are older.",
+    "We need role-based access for about {n} admins.",
+    "There's an existing API documented in Swagger we can share.",
+]
+MONTHS = ["January", "March", "May", "July", "September", "November"]
+TOOLS = ["Stripe", "Shopify", "Salesforce", "QuickBooks", "HubSpot", "Xero", "Google Sheets", "Slack"]
+SHORT = ["Interested!", "Please call me back.", "Quote please", "Love your work", "Following up on my email"]
+
+CAMPAIGN = (
+    "Dear business owner we offer premium search engine optimization services that will boost your "
+    "website to the first page of google within thirty days guaranteed results or your money back "
+    "our team of certified experts has helped over five thousand companies grow their organic traffic "
+    "reply today to receive a free audit and exclusive discount for new clients"
+).split()
+FILLER = ["amazing", "special", "limited", "proven", "fast", "affordable", "top", "best", "unique", "real"]
+
+
+def person(rng: random.Random, domain: str = None) -> Tuple[str, str]:
+    first, last = rng.choice(FIRST), rng.choice(LAST)
+    email = f"{first.lower()}.{last.lower()}{rng.randrange(10_000)}@{domain or rng.choice(MAIL)}"
+    return f"{first} {last}", email
+
+
+def ham_message(rng: random.Random) -> str:
+    if rng.random() < 0.1:
+        return rng.choice(SHORT)
+    fill = dict(thing=rng.choice(THINGS), team=rng.choice(TEAMS), tool=rng.choice(TOOLS),
+                n=rng.randrange(2, 20), q=rng.randrange(1, 5), company=rng.choice(COMPANIES),
+                city=rng.choice(CITIES), year=rng.randrange(2005, 2020), month=rng.choice(MONTHS))
+    parts = [rng.choice(OPENERS), rng.choice(ASKS).format(**fill) + "."]
+    parts += [d.format(**fill) for d in rng.sample(SPECIFICS, rng.randrange(1, 3))]
+    parts += [d.format(**fill) for d in rng.sample(DETAILS, rng.randrange(1, 4))]
+    if rng.random() < 0.15:
+        parts.append(f"Our site is https://www.{rng.choice(LAST).lower()}-{rng.randrange(100)}.com if useful.")
+    parts.append(f"Thanks, {rng.choice(FIRST)}")
+    return " ".join(parts)
+
+
+def spam_message(rng: random.Random, kind: str) -> Dict[str, Any]:
+    name, email = person(rng)
+    fill_ms = rng.randrange(5_000, 300_000)
+    text = ham_message(rng)
+    gotcha = None
+    if kind == "honeypot":
+        gotcha = "http://cheap-pills.example"
+    elif kind == "no_token":
+        fill_ms = None
+    elif kind == "too_fast":
+        fill_ms = rng.randrange(50, 2_000)
+    elif kind == "disposable":
+        domain = rng.choice(["mailinator.com", "yopmail.com", "guerrillamail.com", "sharklasers.com",
+                             "mx1.trashmail.com", "10minutemail.com"])
+        name, email = person(rng, domain)
+    elif kind == "links":
+        links = [f"https://{rng.choice(FILLER)}-deals{rng.randrange(999)}.xyz/p/{rng.randrange(10**6)}"
+                 for _ in range(rng.randrange(3, 8))]
+        text = "Best offers " + " ".join(links)
+    elif kind == "repetition":
+        text = rng.choice([
+            "BUY NOW " * rng.randrange(6, 20),
+            "Great site" + "!" * rng.randrange(20, 60),
+            "money money money fast fast money cash cash money fast " * 4,
+        ])
+    elif kind == "campaign":
+        words = list(CAMPAIGN)
+        for _ in range(rng.randrange(1, 4)):
+            words[rng.randrange(len(words))] = rng.choice(FILLER)
+        text = " ".join(words)
+    return {"name": name, "email": email, "message": text, "gotcha": gotcha, "fill_ms": fill_ms, "kind": kind}
+
+
+SPAM_KINDS = ("honeypot", "no_token", "too_fast", "disposable", "links", "repetition", "campaign")
+
+
+def build_corpus(ham: int, spam: int, seed: int) -> List[Dict[str, Any]]:
+    rng = random.Random(seed)
+    corpus = []
+    for _ in range(ham):
+        name, email = person(rng)
+        corpus.append({"name": name, "email": email, "message": ham_message(rng), "gotcha": None,
+                       "fill_ms": rng.randrange(4_000, 600_000), "kind": "ham"})
+    for i in range(spam):
+        corpus.append(spam_message(rng, SPAM_KINDS[i % len(SPAM_KINDS)]))
+    rng.shuffle(corpus)
+    return corpus
+
+
+def form_token(tokens: FormTokens, item: Dict[str, Any]) -> Any:
+    """A token issued fill_ms ago, or None for a client that sent none"""
+    if item["fill_ms"] is None:
+        return None
+    return tokens.issue("contact", time.time_ns() // 1_000_000 - item["fill_ms"])
+
+
+def evaluate(corpus: List[Dict[str, Any]], spam_filter: SpamFilter) -> Dict[str, Any]:
+    caught: Counter = Counter()
+    totals: Counter = Counter()
+    false_positives: Counter = Counter()
+    timings: Dict[str, List[float]] = {"ham": [], "spam": []}
+    for item in corpus:
+        text = f"{item['name']} {item['message']}"
+        token = form_token(spam_filter.form_tokens, item)
+        started = time.perf_counter()
+        verdict = spam_filter.check("contact", item["email"], text, honeypot=item["gotcha"], form_token=token)
+        elapsed = time.perf_counter() - started
+        is_ham = item["kind"] == "ham"
+        timings["ham" if is_ham else "spam"].append(elapsed)
+        totals[item["kind"]] += 1
+        if verdict is not None:
+            if is_ham:
+                false_positives[verdict.reason] += 1
+            else:
+                caught[item["kind"]] += 1
+
+    spam_total = sum(v for k, v in totals.items() if k != "ham")
+    true_positives = sum(caught.values())
+    fp = sum(false_positives.values())
+    all_times = timings["ham"] + timings["spam"]
+
+    def micros(values: List[float]) -> Dict[str, float]:
+        values = sorted(values)
+        return {"mean_us": round(sum(values) / len(values) * 1e6, 2),
+                "p99_us": round(values[int(len(values) * 0.99)] * 1e6, 2)}
+
+    return {
+        "precision": round(true_positives / (true_positives + fp), 4) if true_positives + fp else 1.0,
+        "recall": round(true_positives / spam_total, 4) if spam_total else 0.0,
+        "ham_false_positive_rate": round(fp / totals["ham"], 4) if totals["ham"] else 0.0,
+        "false_positives_by_stage": dict(false_positives),
+        "catch_rate_by_kind": {k: round(caught[k] / totals[k], 4) for k in SPAM_KINDS if totals[k]},
+        "ham_cost": micros(timings["ham"]),
+        "spam_cost": micros(timings["spam"]),
+        "checks_per_sec": round(len(all_times) / sum(all_times)),
+    }
+
+
+async def round_trips_for_rejected(corpus: List[Dict[str, Any]], limit: int) -> Dict[str, int]:
+    """Send only the junk that the filter stops at its cheap stages through the app"""
+    junk = [c for c in corpus if c["kind"] in ("honeypot", "no_token", "too_fast", "disposable", "links",
+                                                "repetition")][:limit]
+    tokens = FormTokens(SECRET.encode())
+    with FakeFormspreeServer() as fake:
+        mongo = FakeMotorClient()
+        # No IP limit: it sits in front of the filter and would answer most of these with 429
+        settings = Settings(formspree_endpoint=fake.url, outbox_poll_interval=60, spool_enabled=False,
+                            rate_limit_enabled=False, spam_form_secret=SECRET)
+        app = create_app(settings, mongo_client_factory=lambda _: mongo)
+        async with app.router.lifespan_context(app):
+            await asyncio.sleep(0.2)  # let startup index creation and content loading settle
+            before = mongo.operations
+            transport = httpx.ASGITransport(app=app)
+            statuses: Counter = Counter()
+            async with httpx.AsyncClient(transport=transport, base_url="http://bench") as client:
+                for item in junk:
+                    body = {"name": item["name"], "email": item["email"], "message": item["message"],
+                            "_gotcha": item["gotcha"], "_form_token": form_token(tokens, item)}
+                    statuses[str((await client.post("/api/contact", json=body)).status_code)] += 1
+            return {
+                "submissions": len(junk),
+                "status_counts": dict(statuses),
+                "mongo_operations": mongo.operations - before,
+                "formspree_requests": fake.requests,
+            }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--ham", type=int, default=5000)
+    parser.add_argument("--spam", type=int, default=5000)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--threshold", type=float, default=0.7, help="near-duplicate similarity threshold")
+    parser.add_argument("--app-requests", type=int, default=500, help="rejected submissions sent through the app")
+    args = parser.parse_args()
+
+    corpus = build_corpus(args.ham, args.spam, args.seed)
+    spam_filter = SpamFilter(disposable_domains=load_disposable_domains(DOMAINS),
+                             form_tokens=FormTokens(SECRET.encode()), near_duplicate_threshold=args.threshold)
+    report = {"corpus": {"ham": args.ham, "spam": args.spam}, "filter": evaluate(corpus, spam_filter)}
+    report["app"] = asyncio.run(round_trips_for_rejected(corpus, args.app_requests))
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
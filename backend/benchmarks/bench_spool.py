@@ -0,0 +1,112 @@
+"""
+Local submission spool: append throughput and replay rate.
+
+    python -m benchmarks.bench_spool --records 20000 --concurrency 200
+
+Appends go to a temporary directory:
+  - fsync-per-record: one write + fsync per submission (the naive baseline)
+  - group-commit: SubmissionSpool, which fsyncs everything queued within --fsync-delay-ms at once
+Replay reads the segments back through mmap into the in-memory fake Mongo
+(--latency seconds per round-trip) via DatabaseService.apply_spooled.
+"""
+import argparse
+import asyncio
+import json
+import os
+import tempfile
+import time
+import zlib
+from pathlib import Path
+
+import bson
+
+from fakes.mongo import FakeMotorClient
+from models import WaitlistSubmission
+from services.database_service_fixed import DatabaseService, normalize_email
+from services.spool import OP_INSERT, RECORD_HEADER, SpoolReplayer, SubmissionSpool
+
+
+def make_records(count: int):
+    records = []
+    for i in range(count):
+        doc = WaitlistSubmission(name=f"User {i}", email=f"user{i}@example.com", interests="AI").dict()
+        doc["email_normalized"] = normalize_email(doc["email"])
+        records.append({"op": OP_INSERT, "form_type": "waitlist", "doc": doc})
+    return records
+
+
+async def append_naive(directory: Path, records, concurrency: int):
+    path = directory / "naive.log"
+    handle = open(path, "ab")
+    lock = asyncio.Lock()
+    semaphore = asyncio.Semaphore(concurrency)
+
+    def write(data: bytes):
+        handle.write(data)
+        handle.flush()
+        os.fsync(handle.fileno())
+
+    async def one(record):
+        payload = bson.encode(record)
+        async with semaphore, lock:
+            await asyncio.to_thread(write, RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(r) for r in records))
+    elapsed = time.perf_counter() - started
+    handle.close()
+    return elapsed
+
+
+async def append_grouped(spool: SubmissionSpool, records, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(record):
+        async with semaphore:
+            await spool.append(record)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(one(r) for r in records))
+    elapsed = time.perf_counter() - started
+    await spool.seal()
+    return elapsed
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--records", type=int, default=20_000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--fsync-delay-ms", type=float, default=2.0)
+    parser.add_argument("--batch-size", type=int, default=500, help="records per replay bulk_write")
+    parser.add_argument("--latency", type=float, default=0.001, help="fake Mongo round-trip in seconds")
+    args = parser.parse_args()
+
+    records = make_records(args.records)
+    results = []
+    with tempfile.TemporaryDirectory() as tmp:
+        directory = Path(tmp)
+        naive_records = min(args.records, 2000)  # one fsync each; keep the baseline short
+        elapsed = await append_naive(directory, records[:naive_records], args.concurrency)
+        results.append({"mode": "fsync-per-record", "records": naive_records, "seconds": round(elapsed, 3),
+                        "records_per_sec": round(naive_records / elapsed, 1)})
+
+        spool = SubmissionSpool(directory / "spool", fsync_delay=args.fsync_delay_ms / 1000)
+        elapsed = await append_grouped(spool, records, args.concurrency)
+        size = sum(p.stat().st_size for p in spool.directory.glob("spool-*.log"))
+        results.append({"mode": "group-commit", "records": args.records, "seconds": round(elapsed, 3),
+                        "records_per_sec": round(args.records / elapsed, 1), "segment_bytes": size})
+
+        database_service = DatabaseService(FakeMotorClient(latency=args.latency)["bench"], spool=spool)
+        await database_service.ensure_indexes()
+        replayer = SpoolReplayer(spool, database_service, batch_size=args.batch_size)
+        started = time.perf_counter()
+        replayed = await replayer.replay_once()
+        elapsed = time.perf_counter() - started
+        stored = await database_service.waitlist_collection.count_documents({})
+        results.append({"mode": "replay", "records": replayed, "seconds": round(elapsed, 3),
+                        "records_per_sec": round(replayed / elapsed, 1), "documents": stored})
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
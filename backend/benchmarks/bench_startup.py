@@ -0,0 +1,63 @@
+"""
+Cold-start cost of a uvicorn worker.
+
+    python -m benchmarks.bench_startup --runs 10
+
+Each run is a fresh interpreter (as a new worker would be) that imports
+`server`, then drives the app lifespan through startup. Reports the median
+time for each phase. Run the same command on an older commit to compare;
+there `import server` also built the Mongo clients, and the lifespan phase
+did not exist.
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+from pathlib import Path
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent
+
+PROBE = r"""
+import asyncio, json, time
+t0 = time.perf_counter()
+import server
+t1 = time.perf_counter()
+app = server.app
+result = {"import_ms": (t1 - t0) * 1000}
+
+async def startup():
+    ctx = getattr(app.router, "lifespan_context", None)
+    if ctx is None:
+        return None
+    s = time.perf_counter()
+    async with ctx(app):
+        ready = time.perf_counter()
+    return (ready - s) * 1000
+
+result["lifespan_startup_ms"] = asyncio.run(startup())
+print(json.dumps(result))
+"""
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--runs", type=int, default=10)
+    args = parser.parse_args()
+
+    samples = []
+    for _ in range(args.runs):
+        out = subprocess.run(
+            [sys.executable, "-c", PROBE], cwd=BACKEND_DIR, capture_output=True, text=True, check=True
+        )
+        samples.append(json.loads(out.stdout.strip().splitlines()[-1]))
+
+    report = {"runs": args.runs}
+    for key in ("import_ms", "lifespan_startup_ms"):
+        values = [s[key] for s in samples if s.get(key) is not None]
+        report[f"median_{key}"] = round(statistics.median(values), 1) if values else None
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,114 @@
+"""
+Bytes on the wire and time-to-first-byte for the SPA in docs/.
+
+    python -m services.static_site /tmp/site   # after copying docs/ there
+    python -m benchmarks.bench_static --root /tmp/site --rounds 50
+
+Compares the current setup (a plain static file server: Starlette
+StaticFiles with html=True, no precompression, no cache policy) with the API's
+static mode (routes/static.py). Both run under uvicorn on localhost. For
+each round the browser's first visit is replayed (index.html plus the
+manifest entrypoints) and then a repeat visit, which sends If-None-Match for
+revalidated files and skips immutable ones entirely.
+"""
+import argparse
+import asyncio
+import json
+import socket
+import statistics
+import time
+from pathlib import Path
+from typing import Dict, List
+
+import httpx
+import uvicorn
+from starlette.applications import Starlette
+from starlette.routing import Mount
+from starlette.staticfiles import StaticFiles
+
+from app_factory import create_app
+from core.settings import Settings
+from fakes.mongo import FakeMotorClient
+from services.static_site import IMMUTABLE, StaticSite
+
+BROWSER_HEADERS = {"Accept-Encoding": "gzip, deflate, br"}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+async def fetch(client: httpx.AsyncClient, path: str, headers: Dict[str, str]):
+    started = time.perf_counter()
+    async with client.stream("GET", path, headers=headers) as response:
+        ttfb = None
+        async for _ in response.aiter_raw():
+            if ttfb is None:
+                ttfb = time.perf_counter() - started
+        ttfb = ttfb if ttfb is not None else time.perf_counter() - started
+        return response, response.num_bytes_downloaded, ttfb
+
+
+async def visit(base_url: str, paths: List[str], rounds: int) -> Dict[str, float]:
+    first_bytes, repeat_bytes, ttfbs, repeat_requests = 0, 0, [], 0
+    async with httpx.AsyncClient(base_url=base_url, headers=BROWSER_HEADERS) as client:
+        for _ in range(rounds):
+            validators = {}
+            for path in paths:
+                response, downloaded, ttfb = await fetch(client, path, {})
+                first_bytes += downloaded
+                ttfbs.append(ttfb)
+                if IMMUTABLE not in response.headers.get("cache-control", ""):
+                    validators[path] = response.headers.get("etag")
+            for path, etag in validators.items():
+                response, downloaded, _ = await fetch(client, path, {"If-None-Match": etag} if etag else {})
+                repeat_bytes += downloaded
+                repeat_requests += 1
+    return {
+        "first_visit_bytes": first_bytes // rounds,
+        "repeat_visit_bytes": repeat_bytes // rounds,
+        "repeat_visit_requests": repeat_requests // rounds,
+        "ttfb_p50_ms": round(statistics.median(ttfbs) * 1000, 3),
+        "ttfb_p95_ms": round(sorted(ttfbs)[int(len(ttfbs) * 0.95)] * 1000, 3),
+    }
+
+
+async def serve(app, paths: List[str], rounds: int) -> Dict[str, float]:
+    port = free_port()
+    server = uvicorn.Server(uvicorn.Config(app, host="127.0.0.1", port=port, log_level="warning", lifespan="on"))
+    task = asyncio.create_task(server.serve())
+    while not server.started:
+        await asyncio.sleep(0.01)
+    try:
+        return await visit(f"http://127.0.0.1:{port}", paths, rounds)
+    finally:
+        server.should_exit = True
+        await task
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--root", default=str(Path(__file__).resolve().parent.parent.parent / "docs"))
+    parser.add_argument("--rounds", type=int, default=30)
+    args = parser.parse_args()
+
+    site = StaticSite(Path(args.root))
+    site.load()
+    paths = ["/"] + site.entrypoints
+    if not any(f.variants for f in site.files.values()):
+        print(f"note: no .gz/.br siblings under {args.root}; run `python -m services.static_site {args.root}` first")
+
+    baseline_app = Starlette(routes=[Mount("/", app=StaticFiles(directory=args.root, html=True))])
+    api_app = create_app(
+        Settings(rate_limit_enabled=False, static_enabled=True, static_root=args.root),
+        mongo_client_factory=lambda _: FakeMotorClient(),
+    )
+    baseline = await serve(baseline_app, paths, args.rounds)
+    api = await serve(api_app, paths, args.rounds)
+    print(json.dumps({"paths": paths, "static_files": baseline, "api_static_mode": api}, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
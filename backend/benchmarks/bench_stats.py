@@ -0,0 +1,135 @@
+"""
+Submission stats from the rollups versus counting the raw documents.
+
+    python -m benchmarks.bench_stats --submissions 20000 --days 30
+
+This seeds --submissions contact submissions, spread over --days, into a
+fakes.mongo.FakeMotorClient. The rollups are built through
+StatsService.record_submissions, the same call the write path makes.
+Two ways of producing the same 30-day, per-day breakdown are then timed:
+
+  rollups   StatsService.query, which reads one document per day bucket
+  raw scan  DatabaseService.iter_submissions over the date range, counting
+            in Python, which is what the admin endpoints allowed before
+
+The run fails if the two disagree. Also reported: the cost that counting
+adds to save_contact_submission (one extra bulk_write of two upserts), with
+--latency-ms of fake Mongo latency on every operation.
+"""
+import argparse
+import asyncio
+import json
+import random
+import time
+from collections import Counter
+from datetime import datetime, timedelta
+from typing import Any, Dict, List
+
+from bson import ObjectId
+
+from fakes.mongo import FakeMotorClient
+from models import ContactSubmission
+from services.database_service_fixed import DatabaseService
+from services.stats_service import DIMENSIONS, StatsService, bucket_start, dimension_key
+
+PROJECT_TYPES = ["Website", "Mobile app", "E-commerce", "Branding", None]
+BUDGETS = ["<5k", "5k-10k", "10k-25k", "25k+", None]
+STATUSES = ["sent"] * 8 + ["failed", "pending"]
+
+
+def seed_docs(n: int, days: int, end: datetime, rng: random.Random) -> List[Dict[str, Any]]:
+    span = days * 86_400
+    return [
+        {
+            "_id": ObjectId(),
+            "id": f"bench-{i}",
+            "name": "Bench",
+            "email": f"bench{i}@example.com",
+            "message": "Benchmark message",
+            "project_type": rng.choice(PROJECT_TYPES),
+            "budget": rng.choice(BUDGETS),
+            "formspree_status": rng.choice(STATUSES),
+            "submitted_at": end - timedelta(seconds=rng.uniform(1, span)),
+        }
+        for i in range(n)
+    ]
+
+
+async def count_raw(database: DatabaseService, start: datetime, end: datetime) -> Dict[str, Any]:
+    """The per-day breakdown computed from every submission in the range"""
+    totals: Dict[str, Any] = {"total": 0, **{d: Counter() for d in DIMENSIONS["contact"]}}
+    days: Counter = Counter()
+    async for doc in database.iter_submissions("contact", submitted_from=start, submitted_to=end,
+                                               fields=list(DIMENSIONS["contact"])):
+        totals["total"] += 1
+        days[bucket_start(doc["submitted_at"], "day")] += 1
+        for dimension in DIMENSIONS["contact"]:
+            totals[dimension][dimension_key(doc.get(dimension))] += 1
+    return {"totals": {k: (dict(v) if isinstance(v, Counter) else v) for k, v in totals.items()}, "days": len(days)}
+
+
+async def timed(coro_factory, repeat: int):
+    started = time.perf_counter()
+    for _ in range(repeat):
+        result = await coro_factory()
+    return result, (time.perf_counter() - started) / repeat
+
+
+async def write_overhead(args) -> Dict[str, float]:
+    results = {}
+    for label, with_stats in (("without_stats", False), ("with_stats", True)):
+        db = FakeMotorClient(latency=args.latency_ms / 1000)["bench"]
+        database = DatabaseService(db, stats=StatsService(db) if with_stats else None)
+        started = time.perf_counter()
+        for i in range(args.writes):
+            await database.save_contact_submission(ContactSubmission.model_construct(
+                name="Bench", email=f"w{i}@example.com", message="Benchmark message",
+                project_type="Website", budget="5k-10k", submitted_at=datetime.utcnow(), formspree_status="pending",
+            ))
+        results[f"{label}_ms"] = round((time.perf_counter() - started) * 1000 / args.writes, 3)
+    return results
+
+
+async def run(args) -> Dict[str, Any]:
+    rng = random.Random(args.seed)
+    db = FakeMotorClient()["bench"]
+    stats = StatsService(db)
+    database = DatabaseService(db, stats=stats)
+    end = bucket_start(datetime.utcnow(), "day") + timedelta(days=1)
+    start = end - timedelta(days=args.days)
+    docs = seed_docs(args.submissions, args.days, end, rng)
+    await db["contact_submissions"].insert_many(docs)
+    for i in range(0, len(docs), 1000):
+        await stats.record_submissions("contact", docs[i:i + 1000])
+    rollups = await db["submission_stats"].count_documents({})
+
+    rolled, rollup_seconds = await timed(lambda: stats.query("day", start, end, form_type="contact"), args.repeat)
+    scanned, scan_seconds = await timed(lambda: count_raw(database, start, end), 1)
+    if rolled["totals"]["contact"] != scanned["totals"]:
+        raise SystemExit(f"Rollups disagree with the raw scan:\n{rolled['totals']}\n{scanned['totals']}")
+
+    return {
+        "submissions": args.submissions,
+        "rollup_documents": rollups,
+        "day_buckets_read": len(rolled["buckets"]),
+        "rollup_query_ms": round(rollup_seconds * 1000, 3),
+        "raw_scan_ms": round(scan_seconds * 1000, 1),
+        "speedup": round(scan_seconds / rollup_seconds, 1),
+        "save_contact_submission": await write_overhead(args),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--submissions", type=int, default=20_000)
+    parser.add_argument("--days", type=int, default=30)
+    parser.add_argument("--repeat", type=int, default=20, help="rollup queries to average over")
+    parser.add_argument("--writes", type=int, default=500, help="saves timed for the write overhead")
+    parser.add_argument("--latency-ms", type=float, default=1.0, help="fake Mongo latency for the write overhead")
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    print(json.dumps(asyncio.run(run(args)), indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,87 @@
+"""
+Waitlist signup latency as the collection grows.
+
+    MONGO_URL=mongodb://localhost:27017 python -m benchmarks.bench_waitlist_dedup --sizes 1000,10000,100000,1000000
+
+Seeds a throwaway database to each size, then times the one-round-trip
+save_waitlist_submission_if_new path for fresh emails and for duplicates.
+With the unique email index, both should stay flat as the size grows.
+The database is dropped at the end.
+"""
+import argparse
+import asyncio
+import json
+import os
+import statistics
+import time
+import uuid
+
+from motor.motor_asyncio import AsyncIOMotorClient
+
+from models import WaitlistSubmission
+from services.database_service_fixed import DatabaseService
+
+SEED_CHUNK = 10_000
+
+
+def percentile(samples, pct):
+    ordered = sorted(samples)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def seed(service: DatabaseService, start: int, stop: int):
+    for chunk_start in range(start, stop, SEED_CHUNK):
+        docs = []
+        for i in range(chunk_start, min(stop, chunk_start + SEED_CHUNK)):
+            doc = WaitlistSubmission(name=f"Seed {i}", email=f"seed{i}@example.com").dict()
+            doc["email_normalized"] = f"seed{i}@example.com"
+            docs.append(doc)
+        await service.waitlist_collection.insert_many(docs, ordered=False)
+
+
+async def time_signups(service: DatabaseService, emails):
+    samples = []
+    for email in emails:
+        submission = WaitlistSubmission(name="Bench", email=email)
+        started = time.perf_counter()
+        await service.save_waitlist_submission_if_new(submission)
+        samples.append((time.perf_counter() - started) * 1000)
+    return {
+        "p50_ms": round(statistics.median(samples), 3),
+        "p99_ms": round(percentile(samples, 0.99), 3),
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", default="1000,10000,100000,1000000")
+    parser.add_argument("--samples", type=int, default=500)
+    args = parser.parse_args()
+
+    client = AsyncIOMotorClient(os.getenv("MONGO_URL", "mongodb://localhost:27017"))
+    db_name = f"bench_waitlist_{uuid.uuid4().hex[:8]}"
+    service = DatabaseService(client[db_name])
+    await service.ensure_indexes()
+
+    results = []
+    seeded = 0
+    try:
+        for size in sorted(int(s) for s in args.sizes.split(",")):
+            await seed(service, seeded, size)
+            seeded = size
+            fresh = [f"new-{size}-{i}@example.com" for i in range(args.samples)]
+            row = {"collection_size": size}
+            row["new_email"] = await time_signups(service, fresh)
+            # Duplicates of the emails just inserted (mixed case to exercise normalization)
+            row["duplicate_email"] = await time_signups(service, [e.upper() for e in fresh])
+            results.append(row)
+            print(json.dumps(row))
+    finally:
+        await client.drop_database(db_name)
+        client.close()
+
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,92 @@
+"""
+Sustained form writes/sec with and without the write-behind buffer.
+
+    python -m benchmarks.bench_write_behind --concurrency 200 --writes 5000
+
+Each simulated request does what /api/contact plus the outbox dispatcher do
+to the submissions collection: save_contact_submission, then
+update_contact_formspree_status. Mongo is fakes.mongo.FakeMotorClient with a
+per-operation latency and a connection pool limit, so single-document writes
+queue for connections the way they do against a real cluster. Modes: off
+(insert_one/update_one), ack and buffered write-behind.
+
+Stats rollups are on, as they are by default (--no-stats turns them off).
+Their $inc updates go through the same path as the writes they count. The
+run fails if the rollups disagree with the stored statuses.
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta
+
+from fakes.mongo import FakeMotorClient
+from models import ContactSubmission
+from services.database_service_fixed import DatabaseService
+from services.stats_service import StatsService
+from services.write_behind import ACK, BUFFERED, WriteBehindBuffer
+
+MODES = ("off", ACK, BUFFERED)
+
+
+async def run(mode: str, args) -> dict:
+    mongo = FakeMotorClient(latency=args.latency, pool_size=args.pool_size)
+    write_behind = None
+    if mode != "off":
+        write_behind = WriteBehindBuffer(max_batch=args.max_batch, max_delay=args.max_delay_ms / 1000, durability=mode)
+    stats = StatsService(mongo["bench"], write_behind=write_behind) if args.stats else None
+    database = DatabaseService(mongo["bench"], write_behind=write_behind, stats=stats)
+    remaining = iter(range(args.writes))
+    latencies = []
+
+    async def worker():
+        for i in remaining:
+            submission = ContactSubmission(name=f"Bench {i}", email=f"bench{i}@example.com", message="hello")
+            started = time.perf_counter()
+            submission_id = await database.save_contact_submission(submission)
+            # As the outbox dispatcher does: the entry carries the submission's date
+            await database.update_contact_formspree_status(submission_id, "sent", submission.submitted_at)
+            latencies.append(time.perf_counter() - started)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(args.concurrency)))
+    if write_behind is not None:
+        await write_behind.close()
+    elapsed = time.perf_counter() - started
+
+    stored = await mongo["bench"]["contact_submissions"].count_documents({"formspree_status": "sent"})
+    operations = mongo.operations
+    if stats is not None:
+        rolled = await stats.query("day", datetime(2000, 1, 1), datetime.utcnow() + timedelta(days=1))
+        counts = rolled["totals"].get("contact", {})
+        if counts.get("total") != args.writes or counts.get("formspree_status") != {"sent": stored}:
+            raise SystemExit(f"Rollups disagree with the stored submissions ({mode}): {counts}")
+    latencies.sort()
+    return {
+        "mode": mode,
+        "writes_per_sec": round(args.writes / elapsed, 1),
+        "request_p50_ms": round(latencies[len(latencies) // 2] * 1000, 2),
+        "request_p99_ms": round(latencies[int(len(latencies) * 0.99)] * 1000, 2),
+        "mongo_operations": operations,
+        "stored": stored,
+        "stats": args.stats,
+    }
+
+
+async def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--writes", type=int, default=5000)
+    parser.add_argument("--concurrency", type=int, default=200)
+    parser.add_argument("--latency", type=float, default=0.002, help="seconds per fake Mongo operation")
+    parser.add_argument("--pool-size", type=int, default=50)
+    parser.add_argument("--max-batch", type=int, default=500)
+    parser.add_argument("--max-delay-ms", type=float, default=2.0)
+    parser.add_argument("--no-stats", dest="stats", action="store_false", help="leave the stats rollups off")
+    args = parser.parse_args()
+
+    results = [await run(mode, args) for mode in MODES]
+    print(json.dumps(results, indent=2))
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
@@ -0,0 +1,218 @@
+"""
+In-process load test for the form API.
+
+    python -m benchmarks.loadtest --concurrency 50 --requests 2000 --output run.json
+    python -m benchmarks.loadtest --baseline run.json     # compare with an earlier commit
+
+Boots create_app() in this process with fakes.mongo.FakeMotorClient and a
+fakes.formspree_server.FakeFormspreeServer, both with injectable latency and
+error rates. It then drives /api/contact, /api/ai-waitlist and the admin
+listings through httpx's ASGI transport at the given concurrency.
+
+The output is JSON with throughput, p50/p95/p99 latency and an error
+breakdown per scenario, tagged with the git commit. With --baseline, p95 and
+throughput deltas are reported, and the exit status is 1 when p95 regresses
+by more than --max-regression percent.
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import random
+import subprocess
+import sys
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Any, Dict, List
+
+import httpx
+
+from app_factory import create_app
+from benchmarks.bench_spam_filter import ham_message
+from core.auth import ADMIN_TOKEN_HEADER
+from core.settings import Settings
+from fakes.formspree_server import FakeFormspreeServer
+from fakes.mongo import FakeMotorClient
+from services.spam_filter import FormTokens
+
+SCENARIOS = ("contact", "waitlist", "admin")
+# The admin listings need a token; every request carries it
+ADMIN_TOKEN = "loadtest"
+# Forms carry a token minted as if the page had been open a while, like a real visitor's
+FORM_SECRET = "loadtest"
+_form_tokens = FormTokens(FORM_SECRET.encode())
+
+_counter = itertools.count()
+# Varied, realistic messages: a repeated template would be stopped by the spam filter
+_rng = random.Random(7)
+
+
+def form_token(form: str) -> str:
+    return _form_tokens.issue(form, time.time_ns() // 1_000_000 - 30_000)
+
+
+def contact_request():
+    n = next(_counter)
+    return "POST", "/api/contact", {
+        "name": f"Load {n}",
+        "email": f"load{n}@example.com",
+        "company": "Bench Co",
+        "projectType": "Web App",
+        "budget": "$5k-$10k",
+        "message": ham_message(_rng),
+        "_form_token": form_token("contact"),
+    }
+
+
+def waitlist_request():
+    n = next(_counter)
+    return "POST", "/api/ai-waitlist", {
+        "name": f"Wait {n}",
+        "email": f"wait{n}@example.com",
+        "interests": "AI agents",
+        "_form_token": form_token("waitlist"),
+    }
+
+
+def admin_request():
+    path = "/api/admin/waitlist-submissions" if next(_counter) % 2 else "/api/admin/contact-submissions"
+    return "GET", path + "?limit=50", None
+
+
+BUILDERS = {"contact": contact_request, "waitlist": waitlist_request, "admin": admin_request}
+
+
+def percentile(ordered: List[float], pct: float) -> float:
+    if not ordered:
+        return 0.0
+    return ordered[min(len(ordered) - 1, int(len(ordered) * pct))]
+
+
+async def run_scenario(client: httpx.AsyncClient, name: str, total: int, concurrency: int) -> Dict[str, Any]:
+    build = BUILDERS[name]
+    latencies: List[float] = []
+    outcomes: Counter = Counter()
+    queue: asyncio.Queue = asyncio.Queue()
+    for _ in range(total):
+        queue.put_nowait(build())
+
+    async def worker():
+        while True:
+            try:
+                method, path, body = queue.get_nowait()
+            except asyncio.QueueEmpty:
+                return
+            started = time.perf_counter()
+            try:
+                response = await client.request(method, path, json=body)
+                outcomes[str(response.status_code)] += 1
+            except Exception as e:
+                outcomes[type(e).__name__] += 1
+            latencies.append((time.perf_counter() - started) * 1000)
+
+    started = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+    errors = {k: v for k, v in outcomes.items() if not k.startswith("2")}
+    return {
+        "requests": total,
+        "concurrency": concurrency,
+        "seconds": round(elapsed, 3),
+        "throughput_rps": round(total / elapsed, 1),
+        "p50_ms": round(percentile(latencies, 0.50), 3),
+        "p95_ms": round(percentile(latencies, 0.95), 3),
+        "p99_ms": round(percentile(latencies, 0.99), 3),
+        "status_counts": dict(outcomes),
+        "error_count": sum(errors.values()),
+    }
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True,
+            cwd=Path(__file__).resolve().parent,
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return "unknown"
+
+
+def compare(current: Dict[str, Any], baseline: Dict[str, Any], max_regression: float) -> bool:
+    ok = True
+    for name, result in current["scenarios"].items():
+        before = baseline.get("scenarios", {}).get(name)
+        if not before:
+            continue
+        p95_delta = (result["p95_ms"] - before["p95_ms"]) / before["p95_ms"] * 100 if before["p95_ms"] else 0.0
+        rps_delta = (result["throughput_rps"] - before["throughput_rps"]) / before["throughput_rps"] * 100
+        regressed = p95_delta > max_regression
+        ok = ok and not regressed
+        print(
+            f"{name:<9} p95 {before['p95_ms']:.2f} -> {result['p95_ms']:.2f} ms ({p95_delta:+.1f}%), "
+            f"throughput {before['throughput_rps']} -> {result['throughput_rps']} rps ({rps_delta:+.1f}%)"
+            + ("  REGRESSION" if regressed else ""),
+            file=sys.stderr,
+        )
+    return ok
+
+
+async def main() -> int:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--requests", type=int, default=2000, help="requests per scenario")
+    parser.add_argument("--concurrency", type=int, default=50)
+    parser.add_argument("--mongo-latency", type=float, default=0.001, help="seconds per fake Mongo operation")
+    parser.add_argument("--formspree-latency", type=float, default=0.05)
+    parser.add_argument("--formspree-error-rate", type=float, default=0.0)
+    parser.add_argument("--output", help="write the JSON report to this file")
+    parser.add_argument("--baseline", help="earlier JSON report to compare against")
+    parser.add_argument("--max-regression", type=float, default=10.0, help="allowed p95 regression in percent")
+    args = parser.parse_args()
+
+    scenarios = [s.strip() for s in args.scenarios.split(",") if s.strip()]
+    report: Dict[str, Any] = {
+        "commit": git_commit(),
+        "config": {
+            "requests": args.requests,
+            "concurrency": args.concurrency,
+            "mongo_latency": args.mongo_latency,
+            "formspree_latency": args.formspree_latency,
+            "formspree_error_rate": args.formspree_error_rate,
+        },
+        "scenarios": {},
+    }
+
+    with FakeFormspreeServer(latency=args.formspree_latency, error_rate=args.formspree_error_rate) as fake:
+        settings = Settings(
+            formspree_endpoint=fake.url,
+            outbox_poll_interval=0.05,
+            rate_limit_enabled=False,
+            admin_token=ADMIN_TOKEN,
+            spam_form_secret=FORM_SECRET,
+        )
+        mongo = FakeMotorClient(latency=args.mongo_latency)
+        app = create_app(settings, mongo_client_factory=lambda _: mongo)
+        async with app.router.lifespan_context(app):
+            transport = httpx.ASGITransport(app=app)
+            async with httpx.AsyncClient(transport=transport, base_url="http://loadtest",
+                                         headers={ADMIN_TOKEN_HEADER: ADMIN_TOKEN}) as client:
+                for name in scenarios:
+                    report["scenarios"][name] = await run_scenario(client, name, args.requests, args.concurrency)
+        report["formspree_requests"] = fake.requests
+        report["mongo_operations"] = mongo.operations
+
+    output = json.dumps(report, indent=2)
+    print(output)
+    if args.output:
+        Path(args.output).write_text(output + "\n")
+    if args.baseline:
+        baseline = json.loads(Path(args.baseline).read_text())
+        return 0 if compare(report, baseline, args.max_regression) else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(asyncio.run(main()))
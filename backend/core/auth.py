@@ -0,0 +1,21 @@
+"""Shared-token check for admin endpoints that expose or change data."""
+import hmac
+
+from fastapi import HTTPException, Request
+
+ADMIN_TOKEN_HEADER = "X-Admin-Token"
+
+
+def require_admin(request: Request):
+    """
+    Dependency: the request must carry settings.admin_token, either as
+    `Authorization: Bearer <token>` or in X-Admin-Token. With no token
+    configured the endpoint answers 404, so it is off by default.
+    """
+    expected = request.app.state.settings.admin_token
+    if not expected:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    supplied = credentials.strip() if scheme.lower() == "bearer" else request.headers.get(ADMIN_TOKEN_HEADER, "")
+    if not hmac.compare_digest(supplied.encode(), expected.encode()):
+        raise HTTPException(status_code=401, detail="Admin token required", headers={"WWW-Authenticate": "Bearer"})
@@ -0,0 +1,50 @@
+"""FastAPI dependencies that hand out the services created in the app lifespan."""
+from fastapi import Request
+
+
+def get_database_service(request: Request):
+    return request.app.state.database_service
+
+
+def get_formspree_service(request: Request):
+    return request.app.state.formspree_service
+
+
+def get_outbox_service(request: Request):
+    return request.app.state.outbox_service
+
+
+def get_export_service(request: Request):
+    return request.app.state.export_service
+
+
+def get_stats_service(request: Request):
+    return request.app.state.stats_service
+
+
+def get_rate_limiter(request: Request):
+    return request.app.state.rate_limiter
+
+
+def get_spam_filter(request: Request):
+    return request.app.state.spam_filter
+
+
+def get_idempotency_store(request: Request):
+    return request.app.state.idempotency_store
+
+
+def get_content_service(request: Request):
+    return request.app.state.content_service
+
+
+def get_static_site(request: Request):
+    return request.app.state.static_site
+
+
+def get_bulk_ingest_service(request: Request):
+    return request.app.state.bulk_ingest_service
+
+
+def get_loop_monitor(request: Request):
+    return request.app.state.loop_monitor
@@ -0,0 +1,29 @@
+"""
+JSON encoding for bodies the app builds by hand (NDJSON export, bulk reports,
+content cache). Uses orjson when it is installed, the standard library
+otherwise; both produce compact UTF-8 bytes.
+
+Routes with a response_model don't need this: FastAPI serializes those
+straight to bytes through pydantic-core.
+"""
+import json
+from typing import Any, Callable, Optional
+
+try:
+    import orjson
+    ORJSON_AVAILABLE = True
+except ImportError:
+    ORJSON_AVAILABLE = False
+
+
+def dumps(value: Any, default: Optional[Callable[[Any], Any]] = None) -> bytes:
+    if ORJSON_AVAILABLE:
+        return orjson.dumps(value, default=default)
+    return json.dumps(value, default=default, separators=(",", ":"), ensure_ascii=False).encode()
+
+
+def loads(data):
+    """Raises a ValueError subclass on invalid input, as json.loads does"""
+    if ORJSON_AVAILABLE:
+        return orjson.loads(data)
+    return json.loads(data)
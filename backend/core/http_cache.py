@@ -0,0 +1,45 @@
+"""Conditional-request and content-negotiation helpers shared by routes and middleware."""
+from functools import lru_cache
+from typing import Optional, Sequence, Tuple
+
+
+def etag_matches(if_none_match: Optional[str], etag: str) -> bool:
+    """If-None-Match uses weak comparison, so W/"x" matches "x" """
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    return any(tag.strip().removeprefix("W/") == etag for tag in if_none_match.split(","))
+
+
+@lru_cache(maxsize=256)
+def _parse_accept_encoding(header: str) -> Tuple[Tuple[str, float], ...]:
+    codings = []
+    for part in header.split(","):
+        coding, _, params = part.strip().partition(";")
+        q = 1.0
+        params = params.strip()
+        if params.startswith("q="):
+            try:
+                q = float(params[2:])
+            except ValueError:
+                q = 0.0
+        if coding:
+            codings.append((coding.strip().lower(), q))
+    return tuple(codings)
+
+
+def negotiate_encoding(accept_encoding: Optional[str], available: Sequence[str]) -> str:
+    """
+    Pick the first of `available` (in server preference order) the client
+    accepts with q > 0; falls back to 'identity'. Parsed headers are memoised,
+    since browsers send a handful of distinct values.
+    """
+    if not accept_encoding:
+        return "identity"
+    accepted = dict(_parse_accept_encoding(accept_encoding))
+    wildcard = accepted.get("*", 0.0)
+    for coding in available:
+        if accepted.get(coding, wildcard) > 0:
+            return coding
+    return "identity"
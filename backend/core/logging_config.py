@@ -0,0 +1,225 @@
+"""
+Logging pipeline: the event loop only puts records on a bounded queue; a
+listener thread does the formatting (JSON lines), PII redaction and the
+blocking writes to stdout.
+
+    listener = configure_logging(settings)   # once per process, before the app starts
+    ...
+    listener.stop()                          # flushes what is still queued
+
+Redaction: email addresses and IP addresses, in the message or in `extra`
+fields named email / ip / client_ip / ip_address, are replaced by a short
+keyed hash, so the same address still correlates across lines.
+Sampling: INFO and DEBUG records from configured loggers are kept with the
+given probability; warnings and errors are never sampled.
+"""
+import hashlib
+import logging
+import queue
+import random
+import re
+import sys
+import threading
+from datetime import datetime, timezone
+from logging.handlers import QueueHandler, QueueListener
+from typing import Dict, Optional
+
+from core import fast_json
+
+# Queue-full policies
+DROP_NEW = "new"        # discard the record being logged
+DROP_OLDEST = "oldest"  # discard the oldest queued record to make room
+
+EMAIL_RE = re.compile(r"[\w.+-]+@[\w-]+(?:\.[\w-]+)+")
+IPV4_RE = re.compile(r"\b(?:\d{1,3}\.){3}\d{1,3}\b")
+# Full or '::'-compressed forms only, so times like 12:30:45 are left alone
+IPV6_RE = re.compile(
+    r"(?<![\w:])(?:(?:[0-9a-fA-F]{1,4}:){7}[0-9a-fA-F]{1,4}"
+    r"|(?:[0-9a-fA-F]{1,4}:){0,6}[0-9a-fA-F]{0,4}::(?:[0-9a-fA-F]{1,4}:){0,6}[0-9a-fA-F]{0,4})(?![\w:])"
+)
+PII_FIELDS = {"email": "email", "ip": "ip", "client_ip": "ip", "ip_address": "ip"}
+
+# Attributes every LogRecord has; anything else came in through `extra`
+_RECORD_ATTRS = set(vars(logging.LogRecord("", 0, "", 0, "", (), None))) | {"message", "asctime", "taskName"}
+
+
+class Redactor:
+    def __init__(self, salt: str = ""):
+        self._salt = salt.encode()
+
+    def token(self, kind: str, value: str) -> str:
+        digest = hashlib.blake2b(value.strip().lower().encode(), digest_size=6, key=self._salt[:64]).hexdigest()
+        return f"<{kind}:{digest}>"
+
+    def text(self, message: str) -> str:
+        if "@" in message:
+            message = EMAIL_RE.sub(lambda m: self.token("email", m.group()), message)
+        if "." in message:
+            message = IPV4_RE.sub(lambda m: self.token("ip", m.group()), message)
+        if ":" in message:
+            message = IPV6_RE.sub(lambda m: self.token("ip", m.group()), message)
+        return message
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: ts, level, logger, msg, any `extra` fields, exc"""
+
+    def __init__(self, redactor: Redactor):
+        super().__init__()
+        self.redactor = redactor
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": self.redactor.text(record.getMessage()),
+        }
+        for key, value in record.__dict__.items():
+            if key in _RECORD_ATTRS or key.startswith("_"):
+                continue
+            if key in PII_FIELDS and value is not None:
+                value = self.redactor.token(PII_FIELDS[key], str(value))
+            entry[key] = value
+        if record.exc_info:
+            entry["exc"] = self.redactor.text(self.formatException(record.exc_info))
+        if record.stack_info:
+            entry["stack"] = record.stack_info
+        return fast_json.dumps(entry, default=str).decode()
+
+
+class RedactingTextFormatter(logging.Formatter):
+    """The classic text format, with the same redaction (for local development)"""
+
+    def __init__(self, redactor: Redactor):
+        super().__init__("%(asctime)s - %(name)s - %(levelname)s - %(message)s")
+        self.redactor = redactor
+
+    def format(self, record: logging.LogRecord) -> str:
+        return self.redactor.text(super().format(record))
+
+
+class SamplingFilter(logging.Filter):
+    """Keep INFO/DEBUG records from the configured logger prefixes with the given probability"""
+
+    def __init__(self, rates: Dict[str, float]):
+        super().__init__()
+        # Longest prefix first, so 'services.formspree_service' beats 'services'
+        self.rates = sorted(rates.items(), key=lambda item: -len(item[0]))
+        self._random = random.random
+
+    def rate_for(self, name: str) -> float:
+        for prefix, rate in self.rates:
+            if name == prefix or name.startswith(prefix + "."):
+                return rate
+        return 1.0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING or not self.rates:
+            return True
+        rate = self.rate_for(record.name)
+        return rate >= 1.0 or self._random() < rate
+
+
+class BoundedQueueHandler(QueueHandler):
+    """
+    Non-blocking QueueHandler. Records are queued unformatted (formatting and
+    redaction happen on the listener thread); when the queue is full the drop
+    policy applies and a summary of what was dropped is logged later.
+    """
+
+    def __init__(self, log_queue: queue.Queue, drop_policy: str = DROP_NEW):
+        super().__init__(log_queue)
+        if drop_policy not in (DROP_NEW, DROP_OLDEST):
+            raise ValueError(f"Unknown log drop policy: {drop_policy}")
+        self.drop_policy = drop_policy
+        self.dropped = 0
+        self._unreported = 0
+        self._lock = threading.Lock()
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same process, so nothing needs pickling: hand the record over as is
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            if self.drop_policy == DROP_OLDEST:
+                try:
+                    self.queue.get_nowait()
+                    self.queue.put_nowait(record)
+                except (queue.Empty, queue.Full):
+                    pass
+            with self._lock:
+                self.dropped += 1
+                self._unreported += 1
+            return
+        if self._unreported:
+            with self._lock:
+                count, self._unreported = self._unreported, 0
+            summary = logging.LogRecord(
+                __name__, logging.WARNING, __file__, 0,
+                f"Dropped {count} log records (queue full)", (), None,
+            )
+            try:
+                self.queue.put_nowait(summary)
+            except queue.Full:
+                with self._lock:
+                    self._unreported += count
+
+
+class DrainingQueueListener(QueueListener):
+    """QueueListener whose stop() waits for room in a full queue instead of raising, and may be called twice"""
+
+    def enqueue_sentinel(self):
+        self.queue.put(self._sentinel)
+
+    def stop(self):
+        if self._thread is not None:
+            super().stop()
+
+
+def parse_sampling(spec: str) -> Dict[str, float]:
+    """'routes.forms=0.1,services.formspree_service=0.05' -> {logger prefix: keep probability}"""
+    rates = {}
+    for part in spec.split(","):
+        if not part.strip():
+            continue
+        name, _, rate = part.partition("=")
+        rates[name.strip()] = max(0.0, min(1.0, float(rate)))
+    return rates
+
+
+def configure_logging(settings, stream=None) -> QueueListener:
+    """Route every logger (uvicorn's included) through the queue. Returns the started listener."""
+    redactor = Redactor(settings.log_hash_salt)
+    formatter = JsonFormatter(redactor) if settings.log_format == "json" else RedactingTextFormatter(redactor)
+    output = logging.StreamHandler(stream or sys.stdout)
+    output.setFormatter(formatter)
+
+    log_queue: queue.Queue = queue.Queue(maxsize=settings.log_queue_size)
+    handler = BoundedQueueHandler(log_queue, settings.log_queue_drop)
+    handler.addFilter(SamplingFilter(parse_sampling(settings.log_sampling)))
+
+    root = logging.getLogger()
+    for existing in list(root.handlers):
+        root.removeHandler(existing)
+    root.addHandler(handler)
+    root.setLevel(settings.log_level.upper())
+    for name in ("uvicorn", "uvicorn.error", "uvicorn.access"):
+        uvicorn_logger = logging.getLogger(name)
+        uvicorn_logger.handlers = []
+        uvicorn_logger.propagate = True
+
+    listener = DrainingQueueListener(log_queue, output, respect_handler_level=True)
+    listener.start()
+    return listener
+
+
+def queue_handler() -> Optional[BoundedQueueHandler]:
+    """The installed queue handler, if configure_logging() ran (for drop counters)"""
+    for handler in logging.getLogger().handlers:
+        if isinstance(handler, BoundedQueueHandler):
+            return handler
+    return None
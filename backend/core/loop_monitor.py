@@ -0,0 +1,165 @@
+"""
+Event-loop health: lag histogram plus stacks of whatever blocked the loop.
+
+A heartbeat task wakes every `interval` and records how late it fired
+(event_loop_lag_seconds). A watchdog thread notices when no heartbeat has
+landed for `block_threshold` and captures the event-loop thread's stack
+*while it is still blocked*, so a stray synchronous call is named rather
+than just measured. Cost: one timer per interval on the loop and one
+sleeping thread; no asyncio debug mode.
+"""
+import asyncio
+import logging
+import sys
+import threading
+import time
+from collections import deque
+from typing import Any, Deque, Dict, List, Optional
+
+from core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+LAG_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0)
+
+LOOP_LAG = REGISTRY.histogram(
+    "event_loop_lag_seconds",
+    "How late the event-loop heartbeat fired",
+    (),
+    buckets=LAG_BUCKETS,
+)
+LOOP_BLOCKED = REGISTRY.histogram(
+    "event_loop_blocked_seconds",
+    "Duration of stalls longer than the block threshold, by the function that was running",
+    ("function",),
+    buckets=LAG_BUCKETS,
+)
+
+
+def frame_name(frame) -> str:
+    code = frame.f_code
+    return f"{frame.f_globals.get('__name__', '?')}:{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def stack_of(frame, limit: int = 64) -> List[Dict[str, Any]]:
+    """Innermost frame first"""
+    stack = []
+    while frame is not None and len(stack) < limit:
+        stack.append({"function": frame_name(frame), "file": frame.f_code.co_filename, "line": frame.f_lineno})
+        frame = frame.f_back
+    return stack
+
+
+class LoopMonitor:
+    def __init__(self, interval: float = 0.05, block_threshold: float = 0.1, keep: int = 50):
+        self.interval = interval
+        self.block_threshold = block_threshold
+        self.blocked: Deque[Dict[str, Any]] = deque(maxlen=keep)
+        self.loop_thread_id: Optional[int] = None
+        self._beat = time.monotonic()
+        self._beats = 0
+        self._captured_beat = -1
+        self._open_event: Optional[Dict[str, Any]] = None
+        self._task: Optional[asyncio.Task] = None
+        self._thread: Optional[threading.Thread] = None
+        self._stopping = threading.Event()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self.loop_thread_id = threading.get_ident()
+        self._beat = time.monotonic()
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._heartbeat(), name="loop-monitor-heartbeat")
+        self._thread = threading.Thread(target=self._watch, name="loop-monitor-watchdog", daemon=True)
+        self._thread.start()
+        logger.info(f"Loop monitor started (interval={self.interval}s, block threshold={self.block_threshold}s)")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        self._task.cancel()
+        try:
+            await self._task
+        except asyncio.CancelledError:
+            pass
+        self._task = None
+        await asyncio.to_thread(self._thread.join)
+        self._thread = None
+
+    async def _heartbeat(self):
+        # The first beat lands as soon as the task runs: anything that held the loop since start() counts
+        self._tick(time.monotonic() - self._beat)
+        while True:
+            await asyncio.sleep(self.interval)
+            self._tick(time.monotonic() - self._beat - self.interval)
+
+    def _tick(self, lag: float):
+        now = time.monotonic()
+        # Measured from the previous beat, the same baseline the watchdog checks
+        elapsed = now - self._beat
+        LOOP_LAG.observe((), max(0.0, lag))
+        self._beat = now
+        self._beats += 1
+        event = self._open_event
+        if event is None:
+            return
+        # The stall the watchdog caught is over; now its full length is known
+        self._open_event = None
+        if elapsed < self.block_threshold:
+            # The watchdog raced a beat that had just landed; there was no stall
+            self._discard(event)
+            return
+        event["blocked_seconds"] = round(elapsed, 4)
+        LOOP_BLOCKED.observe((event["function"],), elapsed)
+        logger.warning(f"Event loop blocked for {event['blocked_seconds'] * 1000:.0f} ms in {event['function']}")
+
+    def _discard(self, event: Dict[str, Any]):
+        try:
+            self.blocked.remove(event)
+        except ValueError:
+            pass
+
+    def _watch(self):
+        check_every = min(self.interval, self.block_threshold) / 2
+        while not self._stopping.wait(check_every):
+            beat = self._beats
+            if beat == self._captured_beat or time.monotonic() - self._beat < self.block_threshold:
+                continue
+            frame = sys._current_frames().get(self.loop_thread_id)
+            if frame is None:
+                continue
+            stack = stack_of(frame)
+            del frame
+            self._captured_beat = beat
+            event = {
+                "at": time.time(),
+                "function": self._culprit(stack),
+                "blocked_seconds": None,  # filled in by the next heartbeat
+                "stack": stack,
+            }
+            self.blocked.append(event)
+            self._open_event = event
+
+    @staticmethod
+    def _culprit(stack: List[Dict[str, Any]]) -> str:
+        """Innermost frame that belongs to the application rather than the stdlib or site-packages"""
+        stdlib = sys.prefix
+        for entry in stack:
+            path = entry["file"]
+            if "site-packages" not in path and not path.startswith(stdlib) and not path.startswith("<"):
+                return entry["function"]
+        return stack[0]["function"] if stack else "?"
+
+    def summary(self) -> Dict[str, Any]:
+        snapshot = LOOP_LAG.snapshot().get(())
+        counts, total, count = snapshot if snapshot else ([], 0.0, 0)
+        return {
+            "interval": self.interval,
+            "block_threshold": self.block_threshold,
+            "heartbeats": count,
+            "mean_lag_seconds": total / count if count else 0.0,
+            "lag_histogram": dict(zip([str(b) for b in LAG_BUCKETS] + ["+Inf"], counts)),
+            "blocked": list(self.blocked)[::-1],
+        }
@@ -0,0 +1,271 @@
+"""
+In-process latency histograms exposed in Prometheus text format.
+
+Overhead budget: instrumentation must stay under 25 µs per request (one
+request histogram observation plus a handful of dependency spans). Check it
+with `python -m benchmarks.bench_metrics_overhead`.
+
+Under the pre-fork launcher each worker has its own registry;
+WorkerMetricsExporter merges them for /metrics.
+"""
+import asyncio
+import functools
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+from core import fast_json
+
+logger = logging.getLogger(__name__)
+
+# Seconds; tuned for a web request that mostly waits on Mongo or Formspree
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+# labels -> (per-bucket counts, sum, count)
+Snapshot = Dict[Tuple[str, ...], Tuple[List[int], float, int]]
+
+
+class _Series:
+    __slots__ = ("counts", "sum", "count")
+
+    def __init__(self, size: int):
+        self.counts = [0] * size  # per bucket, non-cumulative; last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+
+class Histogram:
+    """A labelled histogram family. observe() is a bisect plus three increments."""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str],
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets)
+        self._series: Dict[Tuple[str, ...], _Series] = {}
+        self._lock = threading.Lock()
+
+    def observe(self, labels: Tuple[str, ...], value: float):
+        series = self._series.get(labels)
+        if series is None:
+            with self._lock:
+                series = self._series.setdefault(labels, _Series(len(self.buckets) + 1))
+        series.counts[bisect_left(self.buckets, value)] += 1
+        series.sum += value
+        series.count += 1
+
+    def snapshot(self) -> "Snapshot":
+        return {labels: (list(s.counts), s.sum, s.count) for labels, s in list(self._series.items())}
+
+    def render(self, snapshot: Optional[Snapshot] = None) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        snapshot = self.snapshot() if snapshot is None else snapshot
+        for labels, (counts, total, count) in sorted(snapshot.items()):
+            base = ",".join(f'{k}="{_escape(v)}"' for k, v in zip(self.labelnames, labels))
+            sep = "," if base else ""
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                lines.append(f'{self.name}_bucket{{{base}{sep}le="{le}"}} {cumulative}')
+            lines.append(f"{self.name}_sum{{{base}}} {total}")
+            lines.append(f"{self.name}_count{{{base}}} {count}")
+        return lines
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
+
+
+class MetricsRegistry:
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, documentation: str, labelnames: Sequence[str],
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, documentation, labelnames, buckets)
+        return self._histograms[name]
+
+    def render(self, snapshots: Optional[Dict[str, Snapshot]] = None) -> str:
+        """Render this process's series, or `snapshots` (see merge_snapshots) when given"""
+        lines: List[str] = []
+        for name, histogram in self._histograms.items():
+            lines.extend(histogram.render(None if snapshots is None else snapshots.get(name, {})))
+        return "\n".join(lines) + "\n"
+
+    def dump(self) -> Dict[str, list]:
+        """JSON-ready snapshot of every histogram"""
+        return {
+            name: [[list(labels), counts, total, count]
+                   for labels, (counts, total, count) in histogram.snapshot().items()]
+            for name, histogram in self._histograms.items()
+        }
+
+
+def merge_snapshots(dumps: Iterable[Dict[str, list]]) -> Dict[str, Snapshot]:
+    """Sum MetricsRegistry.dump() outputs from several processes, series by series"""
+    merged: Dict[str, Snapshot] = {}
+    for dump in dumps:
+        for name, series in dump.items():
+            family = merged.setdefault(name, {})
+            for labels, counts, total, count in series:
+                labels = tuple(labels)
+                current = family.get(labels)
+                if current is None:
+                    family[labels] = (list(counts), total, count)
+                else:
+                    family[labels] = ([a + b for a, b in zip(current[0], counts)],
+                                      current[1] + total, current[2] + count)
+    return merged
+
+
+class WorkerMetricsExporter:
+    """
+    Multi-worker /metrics for the pre-fork launcher. Each worker writes its
+    registry to <directory>/worker-<pid>.json every `interval` seconds (and
+    on every scrape and at shutdown); a scrape on any worker merges all the
+    files, so Prometheus sees one view whichever worker answers. Files of
+    exited workers are kept so counts never go backwards; the launcher
+    empties the directory when it starts.
+    """
+
+    def __init__(self, directory: Path, registry: Optional[MetricsRegistry] = None, interval: float = 5.0):
+        self.directory = Path(directory)
+        self.registry = registry or REGISTRY
+        self.interval = interval
+        self.path = self.directory / f"worker-{os.getpid()}.json"
+        self._task: Optional[asyncio.Task] = None
+
+    def write(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        tmp = self.path.with_suffix(".tmp")
+        tmp.write_bytes(fast_json.dumps(self.registry.dump()))
+        os.replace(tmp, self.path)
+
+    def collect(self) -> str:
+        """Blocking file I/O; call it from a thread"""
+        self.write()
+        dumps = []
+        for path in self.directory.glob("worker-*.json"):
+            try:
+                dumps.append(fast_json.loads(path.read_bytes()))
+            except (OSError, ValueError):
+                continue  # replaced or removed mid-read; the next scrape picks it up
+        return self.registry.render(merge_snapshots(dumps))
+
+    async def start(self):
+        await asyncio.to_thread(self.write)
+        self._task = asyncio.create_task(self._run(), name="metrics-exporter")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._task.cancel()
+        await asyncio.gather(self._task, return_exceptions=True)
+        self._task = None
+        await asyncio.to_thread(self.write)
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await asyncio.to_thread(self.write)
+            except OSError as e:
+                logger.error(f"Metrics snapshot write failed: {str(e)}")
+
+
+REGISTRY = MetricsRegistry()
+
+REQUEST_LATENCY = REGISTRY.histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template, method and status code",
+    ("method", "route", "status"),
+)
+DEPENDENCY_LATENCY = REGISTRY.histogram(
+    "dependency_call_duration_seconds",
+    "Latency of calls to external dependencies by operation and outcome",
+    ("dependency", "operation", "outcome"),
+)
+
+
+@asynccontextmanager
+async def span(dependency: str, operation: str):
+    """Time a block of dependency work; the outcome is 'error' if it raises"""
+    started = time.perf_counter()
+    outcome = "ok"
+    try:
+        yield
+    except BaseException:
+        outcome = "error"
+        raise
+    finally:
+        DEPENDENCY_LATENCY.observe((dependency, operation, outcome), time.perf_counter() - started)
+
+
+def instrumented(dependency: str):
+    """
+    Decorator for async service methods. Records the call under the method
+    name; dict results with success=False (FormspreeService style) count as
+    'failure', raised exceptions as 'error'.
+    """
+    def decorator(func):
+        operation = func.__name__
+
+        @functools.wraps(func)
+        async def wrapper(*args, **kwargs):
+            started = time.perf_counter()
+            outcome = "ok"
+            try:
+                result = await func(*args, **kwargs)
+                if isinstance(result, dict) and result.get("success") is False:
+                    outcome = "failure"
+                return result
+            except BaseException:
+                outcome = "error"
+                raise
+            finally:
+                DEPENDENCY_LATENCY.observe((dependency, operation, outcome), time.perf_counter() - started)
+        return wrapper
+    return decorator
+
+
+class MetricsMiddleware:
+    """
+    Pure ASGI timing middleware. Routes are labelled by their template
+    (e.g. /api/admin/export/{form_type}) to keep label cardinality bounded.
+    """
+
+    def __init__(self, app, histogram: Histogram = REQUEST_LATENCY):
+        self.app = app
+        self.histogram = histogram
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        started = time.perf_counter()
+        status = 500
+
+        async def send_wrapper(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            route = scope.get("route")
+            template = getattr(route, "path", None) or "unmatched"
+            self.histogram.observe(
+                (scope["method"], template, str(status)), time.perf_counter() - started
+            )
@@ -0,0 +1,19 @@
+from starlette.requests import HTTPConnection
+
+
+def get_client_ip(request: HTTPConnection) -> str:
+    """
+    The address to rate-limit and record. X-Forwarded-For is written by the
+    client as much as by proxies, so it is only read when
+    settings.trusted_proxy_hops says how many of our own proxies append to
+    it: the client is then that many entries from the right. With no
+    trusted proxies the socket peer is used and the headers are ignored.
+    """
+    peer = request.client.host if request.client else "unknown"
+    app = request.scope.get("app")
+    hops = app.state.settings.trusted_proxy_hops if app is not None else 0
+    if hops <= 0:
+        return peer
+    forwarded = [part.strip() for part in request.headers.get("x-forwarded-for", "").split(",") if part.strip()]
+    # Fewer entries than proxies means the request did not come through them
+    return forwarded[-hops] if len(forwarded) >= hops else peer
@@ -0,0 +1,50 @@
+"""
+Sampling profiler for live processes. A background thread snapshots the
+stacks of the selected threads every `interval` via sys._current_frames()
+and counts identical stacks; nothing is instrumented, so the cost is one
+snapshot per interval and goes away when sampling stops.
+
+Output is the "collapsed stack" format understood by flamegraph.pl,
+speedscope and inferno:
+
+    root;module:outer;module:inner 42
+"""
+import sys
+import threading
+import time
+from collections import Counter
+from typing import Iterable, Optional
+
+from core.loop_monitor import frame_name
+
+
+def collapse(frame, root: str = "", limit: int = 128) -> str:
+    names = []
+    while frame is not None and len(names) < limit:
+        names.append(frame_name(frame).replace(";", ":").replace(" ", "_"))
+        frame = frame.f_back
+    if root:
+        names.append(root)
+    return ";".join(reversed(names))
+
+
+def sample(duration: float, interval: float = 0.005, thread_ids: Optional[Iterable[int]] = None) -> Counter:
+    """Blocking; run it in a thread. thread_ids=None samples every thread except this one."""
+    wanted = set(thread_ids) if thread_ids is not None else None
+    own = threading.get_ident()
+    names = {t.ident: t.name for t in threading.enumerate()}
+    counts: Counter = Counter()
+    deadline = time.perf_counter() + duration
+    while time.perf_counter() < deadline:
+        frames = sys._current_frames()
+        for ident, frame in frames.items():
+            if ident == own or (wanted is not None and ident not in wanted):
+                continue
+            counts[collapse(frame, root=names.get(ident, f"thread-{ident}"))] += 1
+        del frames, frame  # don't keep other threads' frames alive while sleeping
+        time.sleep(interval)
+    return counts
+
+
+def render_collapsed(counts: Counter) -> str:
+    return "".join(f"{stack} {count}\n" for stack, count in counts.most_common())
@@ -0,0 +1,244 @@
+import os
+from pathlib import Path
+from typing import List
+
+from dotenv import load_dotenv
+from pydantic import BaseModel
+
+ROOT_DIR = Path(__file__).resolve().parent.parent
+
+
+def _env_bool(name: str, default: str) -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+class Settings(BaseModel):
+    """Runtime configuration, read once from the environment (and backend/.env)"""
+
+    # MongoDB
+    mongo_url: str = "mongodb://localhost:27017"
+    db_name: str = "cashcue"
+    mongo_max_pool_size: int = 50
+    mongo_min_pool_size: int = 5
+    mongo_max_idle_time_ms: int = 60_000
+    mongo_server_selection_timeout_ms: int = 5_000
+
+    # Write-behind grouping of form inserts/status updates into bulk_write
+    write_behind_enabled: bool = False
+    write_behind_durability: str = "ack"  # 'ack' or 'buffered'
+    write_behind_max_batch: int = 500
+    write_behind_max_delay_ms: float = 2.0
+
+    # Local spool for submissions while Mongo is unreachable
+    spool_enabled: bool = True
+    spool_dir: str = str(ROOT_DIR / "spool")
+    spool_fsync_delay_ms: float = 2.0
+    spool_replay_interval: float = 5.0
+
+    # Hour/day rollup counters behind /api/admin/stats (services/stats_service.py)
+    stats_enabled: bool = True
+    stats_max_buckets: int = 2000  # per /api/admin/stats query
+
+    # Formspree
+    formspree_endpoint: str = "https://formspree.io/f/mvgrekqd"
+    formspree_max_connections: int = 20
+    formspree_max_concurrency: int = 50
+    formspree_batch_size: int = 1
+    formspree_batch_window: float = 2.0
+
+    # Circuit breakers around Formspree and Mongo (timeouts adapt between min and max)
+    circuit_breaker_enabled: bool = True
+    breaker_failure_rate: float = 0.5
+    breaker_slow_rate: float = 0.8
+    breaker_window: int = 50
+    breaker_min_calls: int = 10
+    breaker_open_seconds: float = 10.0
+    formspree_timeout_min: float = 1.0
+    formspree_slow_call_seconds: float = 3.0
+    mongo_timeout_min: float = 0.25
+    mongo_timeout_max: float = 5.0
+    mongo_slow_call_seconds: float = 1.0
+    # Bulk inserts, $in lookups and spool replay: a fixed base plus a per-document allowance
+    mongo_batch_timeout_base: float = 5.0
+    mongo_batch_timeout_per_item: float = 0.01
+    mongo_batch_timeout_max: float = 60.0
+
+    # Outbox dispatcher
+    outbox_poll_interval: float = 5.0
+    outbox_max_attempts: int = 5
+
+    # Waitlist membership cache
+    waitlist_membership_cache: bool = False
+    waitlist_bloom_capacity: int = 1_000_000
+    waitlist_bloom_fp_rate: float = 0.001
+    waitlist_bloom_max_bytes: int = 8 * 1024 * 1024
+    waitlist_lru_size: int = 10_000
+
+    # Rate limiting ('count/seconds')
+    rate_limit_enabled: bool = True
+    rate_limit_backend: str = "memory"  # 'memory', 'mongo' or 'shared' (needs shared_state_socket)
+    rate_limit_ip: str = "10/60"
+    rate_limit_email: str = "3/600"
+    rate_limit_max_keys: int = 100_000
+    # Reverse proxies in front of the app that append to X-Forwarded-For; 0 trusts no forwarding headers
+    trusted_proxy_hops: int = 0
+
+    # Spam pre-filter in front of the form endpoints (services/spam_filter.py)
+    spam_filter_enabled: bool = True
+    spam_disposable_domains: str = str(ROOT_DIR / "data" / "disposable_domains.txt")
+    # Signs the form tokens behind the too_fast check. Empty picks a random key per process (per
+    # launcher start under the launcher); set it when several hosts serve the forms.
+    spam_form_secret: str = ""
+    spam_min_fill_ms: int = 3000
+    spam_form_max_age: int = 86_400  # seconds a rendered form stays submittable
+    spam_max_links: int = 2
+    spam_near_duplicate_threshold: float = 0.7
+    spam_index_size: int = 10_000
+
+    # Idempotency-Key handling for the form endpoints (services/idempotency.py)
+    idempotency_enabled: bool = True
+    idempotency_ttl_seconds: int = 86_400
+    idempotency_lru_size: int = 10_000
+
+    # Bulk ingestion
+    bulk_batch_size: int = 1000
+    bulk_max_items: int = 200_000
+
+    # Content cache
+    content_change_streams: bool = False  # needs a replica set
+    content_refresh_interval: float = 300.0
+
+    # Encoded response cache for /health, /api/ and content endpoints
+    response_cache_enabled: bool = True
+    response_cache_ttl: float = 30.0
+    response_cache_max_bytes: int = 8 * 1024 * 1024
+
+    # Serve the built SPA (docs/) from the API
+    static_enabled: bool = False
+    static_root: str = str(ROOT_DIR.parent / "docs")
+    static_precompress: bool = False  # write missing .gz/.br siblings at startup
+
+    # Event-loop lag monitor and the /api/admin/profile sampling profiler
+    loop_monitor_enabled: bool = True
+    loop_monitor_interval: float = 0.05
+    loop_block_threshold: float = 0.1
+    profiler_enabled: bool = True
+    profiler_max_seconds: float = 60.0
+
+    # Logging (see core/logging_config.py)
+    log_level: str = "INFO"
+    log_format: str = "json"  # 'json' or 'text'
+    log_queue_size: int = 10_000
+    log_queue_drop: str = "new"  # 'new' or 'oldest'
+    log_sampling: str = ""  # e.g. 'routes.forms=0.1,services.formspree_service=0.1'
+    log_hash_salt: str = ""
+
+    # Pre-fork launcher (launcher.py); it sets the socket and metrics dir for its workers
+    workers: int = 0  # 0 = one per CPU core
+    shared_state_socket: str = ""
+    metrics_dir: str = ""
+
+    # Bearer token for the sensitive admin endpoints (core/auth.py); empty disables them
+    admin_token: str = ""
+
+    cors_origins: List[str] = ["*"]
+
+    @classmethod
+    def from_env(cls) -> "Settings":
+        load_dotenv(ROOT_DIR / ".env")
+        defaults = cls()
+        return cls(
+            mongo_url=os.getenv("MONGO_URL", defaults.mongo_url),
+            db_name=os.getenv("DB_NAME", defaults.db_name),
+            mongo_max_pool_size=int(os.getenv("MONGO_MAX_POOL_SIZE", defaults.mongo_max_pool_size)),
+            mongo_min_pool_size=int(os.getenv("MONGO_MIN_POOL_SIZE", defaults.mongo_min_pool_size)),
+            mongo_max_idle_time_ms=int(os.getenv("MONGO_MAX_IDLE_TIME_MS", defaults.mongo_max_idle_time_ms)),
+            mongo_server_selection_timeout_ms=int(
+                os.getenv("MONGO_SERVER_SELECTION_TIMEOUT_MS", defaults.mongo_server_selection_timeout_ms)
+            ),
+            write_behind_enabled=_env_bool("WRITE_BEHIND_ENABLED", "false"),
+            write_behind_durability=os.getenv("WRITE_BEHIND_DURABILITY", defaults.write_behind_durability),
+            write_behind_max_batch=int(os.getenv("WRITE_BEHIND_MAX_BATCH", defaults.write_behind_max_batch)),
+            write_behind_max_delay_ms=float(os.getenv("WRITE_BEHIND_MAX_DELAY_MS", defaults.write_behind_max_delay_ms)),
+            spool_enabled=_env_bool("SPOOL_ENABLED", "true"),
+            spool_dir=os.getenv("SPOOL_DIR", defaults.spool_dir),
+            spool_fsync_delay_ms=float(os.getenv("SPOOL_FSYNC_DELAY_MS", defaults.spool_fsync_delay_ms)),
+            spool_replay_interval=float(os.getenv("SPOOL_REPLAY_INTERVAL", defaults.spool_replay_interval)),
+            stats_enabled=_env_bool("STATS_ENABLED", "true"),
+            stats_max_buckets=int(os.getenv("STATS_MAX_BUCKETS", defaults.stats_max_buckets)),
+            formspree_endpoint=os.getenv("FORMSPREE_ENDPOINT", defaults.formspree_endpoint),
+            formspree_max_connections=int(os.getenv("FORMSPREE_MAX_CONNECTIONS", defaults.formspree_max_connections)),
+            formspree_max_concurrency=int(os.getenv("FORMSPREE_MAX_CONCURRENCY", defaults.formspree_max_concurrency)),
+            formspree_batch_size=int(os.getenv("FORMSPREE_BATCH_SIZE", defaults.formspree_batch_size)),
+            formspree_batch_window=float(os.getenv("FORMSPREE_BATCH_WINDOW", defaults.formspree_batch_window)),
+            circuit_breaker_enabled=_env_bool("CIRCUIT_BREAKER_ENABLED", "true"),
+            breaker_failure_rate=float(os.getenv("BREAKER_FAILURE_RATE", defaults.breaker_failure_rate)),
+            breaker_slow_rate=float(os.getenv("BREAKER_SLOW_RATE", defaults.breaker_slow_rate)),
+            breaker_window=int(os.getenv("BREAKER_WINDOW", defaults.breaker_window)),
+            breaker_min_calls=int(os.getenv("BREAKER_MIN_CALLS", defaults.breaker_min_calls)),
+            breaker_open_seconds=float(os.getenv("BREAKER_OPEN_SECONDS", defaults.breaker_open_seconds)),
+            formspree_timeout_min=float(os.getenv("FORMSPREE_TIMEOUT_MIN", defaults.formspree_timeout_min)),
+            formspree_slow_call_seconds=float(
+                os.getenv("FORMSPREE_SLOW_CALL_SECONDS", defaults.formspree_slow_call_seconds)
+            ),
+            mongo_timeout_min=float(os.getenv("MONGO_TIMEOUT_MIN", defaults.mongo_timeout_min)),
+            mongo_timeout_max=float(os.getenv("MONGO_TIMEOUT_MAX", defaults.mongo_timeout_max)),
+            mongo_slow_call_seconds=float(os.getenv("MONGO_SLOW_CALL_SECONDS", defaults.mongo_slow_call_seconds)),
+            mongo_batch_timeout_base=float(os.getenv("MONGO_BATCH_TIMEOUT_BASE", defaults.mongo_batch_timeout_base)),
+            mongo_batch_timeout_per_item=float(
+                os.getenv("MONGO_BATCH_TIMEOUT_PER_ITEM", defaults.mongo_batch_timeout_per_item)
+            ),
+            mongo_batch_timeout_max=float(os.getenv("MONGO_BATCH_TIMEOUT_MAX", defaults.mongo_batch_timeout_max)),
+            outbox_poll_interval=float(os.getenv("OUTBOX_POLL_INTERVAL", defaults.outbox_poll_interval)),
+            outbox_max_attempts=int(os.getenv("OUTBOX_MAX_ATTEMPTS", defaults.outbox_max_attempts)),
+            waitlist_membership_cache=_env_bool("WAITLIST_MEMBERSHIP_CACHE", "false"),
+            waitlist_bloom_capacity=int(os.getenv("WAITLIST_BLOOM_CAPACITY", defaults.waitlist_bloom_capacity)),
+            waitlist_bloom_fp_rate=float(os.getenv("WAITLIST_BLOOM_FP_RATE", defaults.waitlist_bloom_fp_rate)),
+            waitlist_bloom_max_bytes=int(os.getenv("WAITLIST_BLOOM_MAX_BYTES", defaults.waitlist_bloom_max_bytes)),
+            waitlist_lru_size=int(os.getenv("WAITLIST_LRU_SIZE", defaults.waitlist_lru_size)),
+            rate_limit_enabled=_env_bool("RATE_LIMIT_ENABLED", "true"),
+            rate_limit_backend=os.getenv("RATE_LIMIT_BACKEND", defaults.rate_limit_backend),
+            rate_limit_ip=os.getenv("RATE_LIMIT_IP", defaults.rate_limit_ip),
+            rate_limit_email=os.getenv("RATE_LIMIT_EMAIL", defaults.rate_limit_email),
+            rate_limit_max_keys=int(os.getenv("RATE_LIMIT_MAX_KEYS", defaults.rate_limit_max_keys)),
+            trusted_proxy_hops=int(os.getenv("TRUSTED_PROXY_HOPS", defaults.trusted_proxy_hops)),
+            spam_filter_enabled=_env_bool("SPAM_FILTER_ENABLED", "true"),
+            spam_disposable_domains=os.getenv("SPAM_DISPOSABLE_DOMAINS", defaults.spam_disposable_domains),
+            spam_form_secret=os.getenv("SPAM_FORM_SECRET", defaults.spam_form_secret),
+            spam_min_fill_ms=int(os.getenv("SPAM_MIN_FILL_MS", defaults.spam_min_fill_ms)),
+            spam_form_max_age=int(os.getenv("SPAM_FORM_MAX_AGE", defaults.spam_form_max_age)),
+            spam_max_links=int(os.getenv("SPAM_MAX_LINKS", defaults.spam_max_links)),
+            spam_near_duplicate_threshold=float(
+                os.getenv("SPAM_NEAR_DUPLICATE_THRESHOLD", defaults.spam_near_duplicate_threshold)
+            ),
+            spam_index_size=int(os.getenv("SPAM_INDEX_SIZE", defaults.spam_index_size)),
+            idempotency_enabled=_env_bool("IDEMPOTENCY_ENABLED", "true"),
+            idempotency_ttl_seconds=int(os.getenv("IDEMPOTENCY_TTL_SECONDS", defaults.idempotency_ttl_seconds)),
+            idempotency_lru_size=int(os.getenv("IDEMPOTENCY_LRU_SIZE", defaults.idempotency_lru_size)),
+            bulk_batch_size=int(os.getenv("BULK_BATCH_SIZE", defaults.bulk_batch_size)),
+            bulk_max_items=int(os.getenv("BULK_MAX_ITEMS", defaults.bulk_max_items)),
+            content_change_streams=_env_bool("CONTENT_CHANGE_STREAMS", "false"),
+            content_refresh_interval=float(os.getenv("CONTENT_REFRESH_INTERVAL", defaults.content_refresh_interval)),
+            response_cache_enabled=_env_bool("RESPONSE_CACHE_ENABLED", "true"),
+            response_cache_ttl=float(os.getenv("RESPONSE_CACHE_TTL", defaults.response_cache_ttl)),
+            response_cache_max_bytes=int(os.getenv("RESPONSE_CACHE_MAX_BYTES", defaults.response_cache_max_bytes)),
+            static_enabled=_env_bool("STATIC_ENABLED", "false"),
+            static_root=os.getenv("STATIC_ROOT", defaults.static_root),
+            static_precompress=_env_bool("STATIC_PRECOMPRESS", "false"),
+            loop_monitor_enabled=_env_bool("LOOP_MONITOR_ENABLED", "true"),
+            loop_monitor_interval=float(os.getenv("LOOP_MONITOR_INTERVAL", defaults.loop_monitor_interval)),
+            loop_block_threshold=float(os.getenv("LOOP_BLOCK_THRESHOLD", defaults.loop_block_threshold)),
+            profiler_enabled=_env_bool("PROFILER_ENABLED", "true"),
+            profiler_max_seconds=float(os.getenv("PROFILER_MAX_SECONDS", defaults.profiler_max_seconds)),
+            log_level=os.getenv("LOG_LEVEL", defaults.log_level),
+            log_format=os.getenv("LOG_FORMAT", defaults.log_format),
+            log_queue_size=int(os.getenv("LOG_QUEUE_SIZE", defaults.log_queue_size)),
+            log_queue_drop=os.getenv("LOG_QUEUE_DROP", defaults.log_queue_drop),
+            log_sampling=os.getenv("LOG_SAMPLING", defaults.log_sampling),
+            log_hash_salt=os.getenv("LOG_HASH_SALT", defaults.log_hash_salt),
+            workers=int(os.getenv("WORKERS", defaults.workers)),
+            shared_state_socket=os.getenv("SHARED_STATE_SOCKET", defaults.shared_state_socket),
+            metrics_dir=os.getenv("METRICS_DIR", defaults.metrics_dir),
+            admin_token=os.getenv("ADMIN_TOKEN", defaults.admin_token),
+            cors_origins=[o.strip() for o in os.getenv("CORS_ORIGINS", "*").split(",") if o.strip()],
+        )
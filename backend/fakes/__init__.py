@@ -0,0 +1 @@
+"""Local stand-ins for external dependencies, used by benchmarks and manual testing."""
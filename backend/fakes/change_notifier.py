@@ -0,0 +1,35 @@
+"""
+Local stand-in for Mongo change streams on the content collections.
+
+    notifier = FakeChangeNotifier()
+    content = ContentService(db, notifier=notifier)
+    notifier.publish("projects")   # every subscribed ContentService reloads
+
+Each call to changes() is an independent subscriber, so several
+ContentService instances sharing one notifier behave like several workers
+watching the same replica set.
+"""
+import asyncio
+from typing import AsyncIterator, List
+
+from services.content_service import ChangeNotifier
+
+
+class FakeChangeNotifier(ChangeNotifier):
+    def __init__(self):
+        self._subscribers: List[asyncio.Queue] = []
+        self.published = 0
+
+    def publish(self, collection: str):
+        self.published += 1
+        for queue in self._subscribers:
+            queue.put_nowait(collection)
+
+    async def changes(self) -> AsyncIterator[str]:
+        queue: asyncio.Queue = asyncio.Queue()
+        self._subscribers.append(queue)
+        try:
+            while True:
+                yield await queue.get()
+        finally:
+            self._subscribers.remove(queue)
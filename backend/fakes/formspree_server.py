@@ -0,0 +1,140 @@
+"""
+Fake Formspree HTTP endpoint.
+
+Run it and point the backend at it:
+
+    python -m fakes.formspree_server --port 8765
+    FORMSPREE_ENDPOINT=http://127.0.0.1:8765/f/test uvicorn server:app
+
+or embed it in a script:
+
+    with FakeFormspreeServer(latency=0.05, error_rate=0.1) as fake:
+        service = FormspreeService(fake.url)
+"""
+import argparse
+import json
+import random
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive, so connection reuse is observable
+
+    def setup(self):
+        super().setup()
+        with self.server.lock:
+            self.server.connections += 1
+
+    def log_message(self, format, *args):
+        pass
+
+    def do_POST(self):
+        length = int(self.headers.get("Content-Length") or 0)
+        raw = self.rfile.read(length) if length else b""
+        try:
+            payload = json.loads(raw) if raw else {}
+        except ValueError:
+            payload = None
+
+        fake = self.server
+        if fake.latency:
+            time.sleep(fake.latency)
+
+        with fake.lock:
+            fake.requests += 1
+            fail = fake.error_rate and fake.rng.random() < fake.error_rate
+            if not fail and payload is not None:
+                fake.submissions.append(payload)
+
+        if payload is None:
+            self._reply(400, {"error": "Invalid JSON"})
+        elif fail:
+            self._reply(fake.error_status, {"error": "Injected failure"})
+        else:
+            self._reply(200, {"ok": True, "next": "/thanks"})
+
+    def _reply(self, status: int, body: Dict[str, Any]):
+        data = json.dumps(body).encode()
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+
+class FakeFormspreeServer(ThreadingHTTPServer):
+    """Threaded HTTP server that accepts Formspree-style JSON posts"""
+
+    daemon_threads = True
+
+    def __init__(self, host: str = "127.0.0.1", port: int = 0, latency: float = 0.0,
+                 error_rate: float = 0.0, error_status: int = 500, seed: int = 0):
+        super().__init__((host, port), _Handler)
+        self.latency = latency
+        self.error_rate = error_rate
+        self.error_status = error_status
+        self.rng = random.Random(seed)
+        self.lock = threading.Lock()
+        self.connections = 0
+        self.requests = 0
+        self.submissions: List[Dict[str, Any]] = []
+        self._thread = None
+
+    def handle_error(self, request, client_address):
+        # Clients that time out hang up mid-reply; that is expected here, not a server bug
+        if not isinstance(sys.exc_info()[1], (BrokenPipeError, ConnectionResetError)):
+            super().handle_error(request, client_address)
+
+    @property
+    def url(self) -> str:
+        host, port = self.server_address[:2]
+        return f"http://{host}:{port}/f/fake"
+
+    def reset(self):
+        with self.lock:
+            self.connections = 0
+            self.requests = 0
+            self.submissions.clear()
+
+    def start(self):
+        self._thread = threading.Thread(target=self.serve_forever, name="fake-formspree", daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.shutdown()
+        self.server_close()
+        if self._thread:
+            self._thread.join()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a fake Formspree endpoint")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--latency", type=float, default=0.0, help="seconds to sleep per request")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="fraction of requests that fail")
+    args = parser.parse_args()
+
+    server = FakeFormspreeServer(args.host, args.port, args.latency, args.error_rate)
+    print(f"Fake Formspree listening on {server.url}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,608 @@
+"""
+In-memory stand-in for the slice of the Motor API this backend uses.
+
+    client = FakeMotorClient(latency=0.001)
+    app = create_app(settings, mongo_client_factory=lambda settings: client)
+
+Supports equality, $in/$nin, $lt/$lte/$gt/$gte/$ne, $exists, $type, $or/$and
+filters; $set/$setOnInsert/$inc/$unset updates; pipeline updates with
+$set/$addFields/$unset stages over the arithmetic, comparison, $cond,
+$ifNull, $let and string expressions the backend uses; upserts;
+single-field unique indexes (raising pymongo's DuplicateKeyError);
+sort/limit/skip cursors; bulk_write with InsertOne/UpdateOne/UpdateMany.
+Anything else raises NotImplementedError instead of silently misbehaving.
+"""
+import asyncio
+import copy
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pymongo import ReturnDocument
+from pymongo.errors import DuplicateKeyError
+
+_MISSING = object()
+
+
+def _get(doc: Dict[str, Any], path: str):
+    value: Any = doc
+    for part in path.split("."):
+        if not isinstance(value, dict) or part not in value:
+            return _MISSING
+        value = value[part]
+    return value
+
+
+def _set(doc: Dict[str, Any], path: str, value: Any):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.setdefault(part, {})
+    doc[parts[-1]] = value
+
+
+def _unset(doc: Dict[str, Any], path: str):
+    parts = path.split(".")
+    for part in parts[:-1]:
+        doc = doc.get(part, {})
+    doc.pop(parts[-1], None)
+
+
+def _type_matches(value, type_name) -> bool:
+    types = {"string": str, "date": __import__("datetime").datetime, "objectId": ObjectId,
+             "int": int, "double": float, "bool": bool, "object": dict, "array": list}
+    if type_name not in types:
+        raise NotImplementedError(f"$type {type_name}")
+    return isinstance(value, types[type_name])
+
+
+def _compare(value, op: str, operand) -> bool:
+    if op == "$eq":
+        return value is not _MISSING and value == operand
+    if op == "$ne":
+        return value is _MISSING or value != operand
+    if op == "$in":
+        return value is not _MISSING and value in operand
+    if op == "$nin":
+        return value is _MISSING or value not in operand
+    if op == "$exists":
+        return (value is not _MISSING) == bool(operand)
+    if op == "$type":
+        return value is not _MISSING and _type_matches(value, operand)
+    if value is _MISSING or value is None:
+        return False
+    try:
+        if op == "$lt":
+            return value < operand
+        if op == "$lte":
+            return value <= operand
+        if op == "$gt":
+            return value > operand
+        if op == "$gte":
+            return value >= operand
+    except TypeError:
+        return False
+    raise NotImplementedError(f"query operator {op}")
+
+
+def matches(doc: Dict[str, Any], query: Dict[str, Any]) -> bool:
+    for key, condition in query.items():
+        if key == "$or":
+            if not any(matches(doc, q) for q in condition):
+                return False
+        elif key == "$and":
+            if not all(matches(doc, q) for q in condition):
+                return False
+        elif key.startswith("$"):
+            raise NotImplementedError(f"top-level operator {key}")
+        else:
+            value = _get(doc, key)
+            if isinstance(condition, dict) and condition and all(k.startswith("$") for k in condition):
+                if not all(_compare(value, op, operand) for op, operand in condition.items()):
+                    return False
+            elif not _compare(value, "$eq", condition):
+                return False
+    return True
+
+
+def _subtract(a, b):
+    if isinstance(a, datetime) and isinstance(b, datetime):
+        return int((a - b) / timedelta(milliseconds=1))
+    if isinstance(a, datetime):
+        return a - timedelta(milliseconds=b)
+    return a - b
+
+
+def _add(values):
+    dates = [v for v in values if isinstance(v, datetime)]
+    total = sum(v for v in values if not isinstance(v, datetime))
+    if dates:
+        return dates[0] + timedelta(milliseconds=total)
+    return total
+
+
+def _to_string(value):
+    if value is None:
+        return None
+    if isinstance(value, datetime):
+        return value.isoformat(timespec="milliseconds") + "Z"
+    if isinstance(value, bool):
+        return "true" if value else "false"
+    return str(value)
+
+
+def evaluate(expression, doc: Dict[str, Any], variables: Optional[Dict[str, Any]] = None):
+    """Aggregation expression against one document; missing fields evaluate to None"""
+    variables = variables or {}
+    if isinstance(expression, str) and expression.startswith("$$"):
+        name, _, path = expression[2:].partition(".")
+        value = variables[name]
+        return _get(value, path) if path else value
+    if isinstance(expression, str) and expression.startswith("$"):
+        value = _get(doc, expression[1:])
+        return None if value is _MISSING else value
+    if isinstance(expression, list):
+        return [evaluate(e, doc, variables) for e in expression]
+    if not isinstance(expression, dict):
+        return expression
+    if not expression or not next(iter(expression)).startswith("$"):
+        return {k: evaluate(v, doc, variables) for k, v in expression.items()}
+    if len(expression) != 1:
+        raise NotImplementedError(f"expression with several operators: {list(expression)}")
+    op, args = next(iter(expression.items()))
+    if op == "$literal":
+        return args
+    if op == "$let":
+        scope = {**variables, **{k: evaluate(v, doc, variables) for k, v in args["vars"].items()}}
+        return evaluate(args["in"], doc, scope)
+    if op == "$cond":
+        if isinstance(args, dict):
+            args = [args["if"], args["then"], args["else"]]
+        condition, then, otherwise = args
+        return evaluate(then if evaluate(condition, doc, variables) else otherwise, doc, variables)
+    if op == "$ifNull":
+        *candidates, fallback = args
+        for candidate in candidates:
+            value = evaluate(candidate, doc, variables)
+            if value is not None:
+                return value
+        return evaluate(fallback, doc, variables)
+    if op == "$trim":
+        value = evaluate(args["input"], doc, variables)
+        return None if value is None else value.strip()
+    values = evaluate(args if isinstance(args, list) else [args], doc, variables)
+    if op in ("$add", "$multiply", "$divide", "$subtract", "$min", "$max") and None in values:
+        return None
+    if op == "$add":
+        return _add(values)
+    if op == "$subtract":
+        return _subtract(*values)
+    if op == "$multiply":
+        product = 1
+        for value in values:
+            product *= value
+        return product
+    if op == "$divide":
+        return values[0] / values[1]
+    if op == "$min":
+        return min(values)
+    if op == "$max":
+        return max(values)
+    if op == "$eq":
+        return values[0] == values[1]
+    if op == "$ne":
+        return values[0] != values[1]
+    if op in ("$gt", "$gte", "$lt", "$lte"):
+        return _compare(values[0], op, values[1])
+    if op == "$and":
+        return all(values)
+    if op == "$or":
+        return any(values)
+    if op == "$not":
+        return not values[0]
+    if op == "$toLower":
+        return "" if values[0] is None else _to_string(values[0]).lower()
+    if op == "$toUpper":
+        return "" if values[0] is None else _to_string(values[0]).upper()
+    if op == "$toString":
+        return _to_string(values[0])
+    raise NotImplementedError(f"expression operator {op}")
+
+
+def _project(doc: Dict[str, Any], projection: Optional[Dict[str, int]]) -> Dict[str, Any]:
+    if not projection:
+        return copy.deepcopy(doc)
+    include = {k for k, v in projection.items() if v}
+    if include:
+        out = {k: copy.deepcopy(doc[k]) for k in include if k in doc}
+        if projection.get("_id", 1) and "_id" in doc:
+            out["_id"] = doc["_id"]
+        return out
+    return {k: copy.deepcopy(v) for k, v in doc.items() if projection.get(k, 1)}
+
+
+def _sort_key(spec: List[Tuple[str, int]]):
+    def key(doc):
+        parts = []
+        for field, direction in spec:
+            value = _get(doc, field)
+            present = value is not _MISSING and value is not None
+            parts.append(_Ordered((present, value if present else 0), direction))
+        return parts
+    return key
+
+
+class _Ordered:
+    __slots__ = ("value", "direction")
+
+    def __init__(self, value, direction):
+        self.value = value
+        self.direction = direction
+
+    def __lt__(self, other):
+        if self.direction >= 0:
+            return self.value < other.value
+        return self.value > other.value
+
+    def __eq__(self, other):
+        return self.value == other.value
+
+
+def _normalize_sort(key_or_list, direction=None) -> List[Tuple[str, int]]:
+    if isinstance(key_or_list, str):
+        return [(key_or_list, direction or 1)]
+    return list(key_or_list)
+
+
+class FakeCursor:
+    def __init__(self, collection: "FakeCollection", query, projection):
+        self._collection = collection
+        self._query = query or {}
+        self._projection = projection
+        self._sort: List[Tuple[str, int]] = []
+        self._limit = 0
+        self._skip = 0
+
+    def sort(self, key_or_list, direction=None):
+        self._sort = _normalize_sort(key_or_list, direction)
+        return self
+
+    def limit(self, limit: int):
+        self._limit = limit
+        return self
+
+    def skip(self, skip: int):
+        self._skip = skip
+        return self
+
+    def batch_size(self, size: int):
+        return self
+
+    def _evaluate(self) -> List[Dict[str, Any]]:
+        docs = [d for d in self._collection._candidates(self._query) if matches(d, self._query)]
+        if self._sort:
+            docs.sort(key=_sort_key(self._sort))
+        docs = docs[self._skip:]
+        if self._limit:
+            docs = docs[:self._limit]
+        return [_project(d, self._projection) for d in docs]
+
+    async def to_list(self, length: Optional[int] = None):
+        await self._collection._delay()
+        docs = self._evaluate()
+        return docs[:length] if length else docs
+
+    def __aiter__(self):
+        return self._iterate()
+
+    async def _iterate(self):
+        await self._collection._delay()
+        for doc in self._evaluate():
+            yield doc
+
+
+class FakeCollection:
+    def __init__(self, database: "FakeDatabase", name: str):
+        self.database = database
+        self.name = name
+        self._docs: Dict[Any, Dict[str, Any]] = {}
+        # field -> partialFilterExpression (or None) for single-field unique indexes
+        self._unique: Dict[str, Optional[Dict[str, Any]]] = {}
+        # field -> {value: _id} for those indexes
+        self._unique_values: Dict[str, Dict[Any, Any]] = {}
+        self.indexes: List[Dict[str, Any]] = []
+
+    async def _delay(self):
+        client = self.database.client
+        if client.pool is not None:
+            async with client.pool:
+                await asyncio.sleep(client.latency)
+        elif client.latency:
+            await asyncio.sleep(client.latency)
+        client.operations += 1
+
+    def _unique_key(self, field: str, doc: Dict[str, Any]):
+        value = _get(doc, field)
+        partial = self._unique[field]
+        if value is _MISSING or (partial and not matches(doc, partial)):
+            return _MISSING
+        return value
+
+    def _check_unique(self, doc: Dict[str, Any], ignore_id=None):
+        for field, values in self._unique_values.items():
+            value = self._unique_key(field, doc)
+            if value is not _MISSING and values.get(value, ignore_id) != ignore_id:
+                raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {field}")
+
+    def _store(self, doc: Dict[str, Any]):
+        old = self._docs.get(doc["_id"])
+        for field, values in self._unique_values.items():
+            if old is not None:
+                values.pop(self._unique_key(field, old), None)
+            value = self._unique_key(field, doc)
+            if value is not _MISSING:
+                values[value] = doc["_id"]
+        self._docs[doc["_id"]] = doc
+
+    def _remove(self, _id):
+        doc = self._docs.pop(_id)
+        for field, values in self._unique_values.items():
+            values.pop(self._unique_key(field, doc), None)
+
+    def _insert(self, doc: Dict[str, Any]):
+        doc.setdefault("_id", ObjectId())
+        if doc["_id"] in self._docs:
+            raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: _id_")
+        self._check_unique(doc)
+        self._store(copy.deepcopy(doc))
+        return doc["_id"]
+
+    def _candidates(self, query: Dict[str, Any]):
+        """Use the _id or a unique index for simple equality lookups instead of a scan"""
+        if "_id" in query and not isinstance(query["_id"], dict):
+            doc = self._docs.get(query["_id"])
+            return [doc] if doc is not None else []
+        for field, values in self._unique_values.items():
+            value = query.get(field, _MISSING)
+            if value is not _MISSING and not isinstance(value, dict):
+                _id = values.get(value)
+                return [self._docs[_id]] if _id is not None else []
+            if isinstance(value, dict) and set(value) == {"$in"}:
+                ids = (values.get(v) for v in value["$in"])
+                return [self._docs[_id] for _id in dict.fromkeys(ids) if _id is not None]
+        return list(self._docs.values())
+
+    # -- indexes ---------------------------------------------------------
+    async def create_index(self, keys, unique: bool = False, partialFilterExpression=None, **kwargs):
+        spec = _normalize_sort(keys)
+        if unique:
+            if len(spec) != 1:
+                raise NotImplementedError("compound unique indexes")
+            field = spec[0][0]
+            self._unique[field] = partialFilterExpression
+            self._unique_values[field] = {}
+            for doc in self._docs.values():
+                value = self._unique_key(field, doc)
+                if value is not _MISSING:
+                    if value in self._unique_values[field]:
+                        raise DuplicateKeyError(f"E11000 duplicate key error collection: {self.name} index: {field}")
+                    self._unique_values[field][value] = doc["_id"]
+        self.indexes.append({"key": spec, "unique": unique, **kwargs})
+        return kwargs.get("name") or "_".join(f"{k}_{d}" for k, d in spec)
+
+    # -- writes ----------------------------------------------------------
+    async def insert_one(self, doc: Dict[str, Any]):
+        await self._delay()
+        return SimpleNamespace(inserted_id=self._insert(doc), acknowledged=True)
+
+    async def insert_many(self, docs: List[Dict[str, Any]], ordered: bool = True):
+        from pymongo.errors import BulkWriteError
+
+        await self._delay()
+        inserted, errors = [], []
+        for index, doc in enumerate(docs):
+            try:
+                inserted.append(self._insert(doc))
+            except DuplicateKeyError as e:
+                errors.append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if errors:
+            raise BulkWriteError({"writeErrors": errors, "nInserted": len(inserted)})
+        return SimpleNamespace(inserted_ids=inserted, acknowledged=True)
+
+    async def bulk_write(self, requests, ordered: bool = True):
+        from pymongo import InsertOne, UpdateMany, UpdateOne
+        from pymongo.errors import BulkWriteError
+        from pymongo.results import BulkWriteResult
+
+        await self._delay()
+        result = {"nInserted": 0, "nMatched": 0, "nModified": 0, "nUpserted": 0, "nRemoved": 0,
+                  "upserted": [], "writeErrors": []}
+        for index, request in enumerate(requests):
+            try:
+                if isinstance(request, InsertOne):
+                    self._insert(request._doc)
+                    result["nInserted"] += 1
+                elif isinstance(request, (UpdateOne, UpdateMany)):
+                    outcome = self._update_docs(request._filter, request._doc, request._upsert,
+                                                many=isinstance(request, UpdateMany))
+                    result["nMatched"] += outcome.matched_count
+                    result["nModified"] += outcome.modified_count
+                    if outcome.upserted_id is not None:
+                        result["nUpserted"] += 1
+                        result["upserted"].append({"index": index, "_id": outcome.upserted_id})
+                else:
+                    raise NotImplementedError(f"bulk_write {type(request).__name__}")
+            except DuplicateKeyError as e:
+                result["writeErrors"].append({"index": index, "code": 11000, "errmsg": str(e)})
+                if ordered:
+                    break
+        if result["writeErrors"]:
+            raise BulkWriteError(result)
+        return BulkWriteResult(result, True)
+
+    @staticmethod
+    def _apply_pipeline(doc: Dict[str, Any], pipeline: List[Dict[str, Any]]):
+        # Each stage sees the document as the previous stage left it
+        for stage in pipeline:
+            (op, spec), = stage.items()
+            if op in ("$set", "$addFields"):
+                values = {k: evaluate(v, doc) for k, v in spec.items()}
+                for k, v in values.items():
+                    _set(doc, k, v)
+            elif op == "$unset":
+                for k in [spec] if isinstance(spec, str) else spec:
+                    _unset(doc, k)
+            else:
+                raise NotImplementedError(f"pipeline stage {op}")
+
+    def _apply_update(self, doc: Dict[str, Any], update, inserting: bool):
+        if isinstance(update, list):
+            self._apply_pipeline(doc, update)
+            return
+        for op, fields in update.items():
+            if op == "$set":
+                for k, v in fields.items():
+                    _set(doc, k, copy.deepcopy(v))
+            elif op == "$setOnInsert":
+                if inserting:
+                    for k, v in fields.items():
+                        _set(doc, k, copy.deepcopy(v))
+            elif op == "$inc":
+                for k, v in fields.items():
+                    current = _get(doc, k)
+                    _set(doc, k, (0 if current is _MISSING else current) + v)
+            elif op == "$unset":
+                for k in fields:
+                    _unset(doc, k)
+            else:
+                raise NotImplementedError(f"update operator {op}")
+
+    def _seed_from_query(self, query: Dict[str, Any]) -> Dict[str, Any]:
+        doc: Dict[str, Any] = {}
+        for key, value in query.items():
+            if not key.startswith("$") and not (isinstance(value, dict) and any(k.startswith("$") for k in value)):
+                _set(doc, key, copy.deepcopy(value))
+        return doc
+
+    def _update_docs(self, query, update, upsert: bool, many: bool):
+        matched = [d for d in self._candidates(query) if matches(d, query)]
+        if not many:
+            matched = matched[:1]
+        for stored in matched:
+            updated = copy.deepcopy(stored)
+            self._apply_update(updated, update, inserting=False)
+            self._check_unique(updated, ignore_id=stored["_id"])
+            self._store(updated)
+        upserted_id = None
+        if not matched and upsert:
+            doc = self._seed_from_query(query)
+            self._apply_update(doc, update, inserting=True)
+            upserted_id = self._insert(doc)
+        return SimpleNamespace(
+            matched_count=len(matched), modified_count=len(matched), upserted_id=upserted_id, acknowledged=True
+        )
+
+    async def update_one(self, query, update, upsert: bool = False):
+        await self._delay()
+        return self._update_docs(query, update, upsert, many=False)
+
+    async def update_many(self, query, update, upsert: bool = False):
+        await self._delay()
+        return self._update_docs(query, update, upsert, many=True)
+
+    async def find_one_and_update(self, query, update, sort=None, upsert: bool = False,
+                                  return_document=ReturnDocument.BEFORE, projection=None):
+        await self._delay()
+        candidates = [d for d in self._candidates(query) if matches(d, query)]
+        if sort:
+            candidates.sort(key=_sort_key(_normalize_sort(sort)))
+        if candidates:
+            before = copy.deepcopy(candidates[0])
+            self._update_docs({"_id": before["_id"]}, update, upsert=False, many=False)
+            after = self._docs[before["_id"]]
+        elif upsert:
+            before = None
+            result = self._update_docs(query, update, upsert=True, many=False)
+            after = self._docs[result.upserted_id]
+        else:
+            return None
+        chosen = after if return_document == ReturnDocument.AFTER else before
+        return _project(chosen, projection) if chosen is not None else None
+
+    async def delete_one(self, query):
+        await self._delay()
+        for doc in self._candidates(query):
+            if matches(doc, query):
+                self._remove(doc["_id"])
+                return SimpleNamespace(deleted_count=1, acknowledged=True)
+        return SimpleNamespace(deleted_count=0, acknowledged=True)
+
+    async def delete_many(self, query):
+        await self._delay()
+        doomed = [_id for _id, doc in self._docs.items() if matches(doc, query)]
+        for _id in doomed:
+            self._remove(_id)
+        return SimpleNamespace(deleted_count=len(doomed), acknowledged=True)
+
+    # -- reads -----------------------------------------------------------
+    def find(self, query=None, projection=None):
+        return FakeCursor(self, query, projection)
+
+    async def find_one(self, query=None, projection=None):
+        docs = await self.find(query, projection).limit(1).to_list(1)
+        return docs[0] if docs else None
+
+    async def count_documents(self, query, limit: int = 0):
+        await self._delay()
+        count = sum(1 for d in self._docs.values() if matches(d, query))
+        return min(count, limit) if limit else count
+
+
+class FakeDatabase:
+    def __init__(self, client: "FakeMotorClient", name: str):
+        self.client = client
+        self.name = name
+        self._collections: Dict[str, FakeCollection] = {}
+
+    def __getitem__(self, name: str) -> FakeCollection:
+        if name not in self._collections:
+            self._collections[name] = FakeCollection(self, name)
+        return self._collections[name]
+
+    def __getattr__(self, name: str) -> FakeCollection:
+        if name.startswith("_"):
+            raise AttributeError(name)
+        return self[name]
+
+    async def list_collection_names(self):
+        return list(self._collections)
+
+
+class FakeMotorClient:
+    """
+    Drop-in for AsyncIOMotorClient; `latency` seconds are added to every
+    operation. With `pool_size`, at most that many operations are in flight at
+    once, like Motor's connection pool (maxPoolSize).
+    """
+
+    def __init__(self, latency: float = 0.0, pool_size: Optional[int] = None):
+        self.latency = latency
+        self.operations = 0
+        self.pool = asyncio.Semaphore(pool_size) if pool_size else None
+        self._databases: Dict[str, FakeDatabase] = {}
+
+    def __getitem__(self, name: str) -> FakeDatabase:
+        if name not in self._databases:
+            self._databases[name] = FakeDatabase(self, name)
+        return self._databases[name]
+
+    async def server_info(self):
+        return {"version": "fake"}
+
+    async def drop_database(self, name: str):
+        self._databases.pop(name, None)
+
+    def close(self):
+        pass
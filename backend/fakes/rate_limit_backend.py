@@ -0,0 +1,32 @@
+"""
+Fake shared rate-limit store.
+
+Instances created with the same `store` behave like several workers talking
+to one shared backend: buckets are common to all of them and every call can
+carry artificial latency, like a network round-trip.
+
+    store = FakeSharedRateLimitBackend.new_store()
+    worker_a = RateLimiter(FakeSharedRateLimitBackend(store), ip_limit, email_limit)
+    worker_b = RateLimiter(FakeSharedRateLimitBackend(store), ip_limit, email_limit)
+"""
+import asyncio
+from typing import Tuple
+
+from services.rate_limiter import MemoryRateLimitBackend, RateLimit, RateLimitBackend
+
+
+class FakeSharedRateLimitBackend(RateLimitBackend):
+    def __init__(self, store: MemoryRateLimitBackend, latency: float = 0.0):
+        self.store = store
+        self.latency = latency
+        self.calls = 0
+
+    @staticmethod
+    def new_store(max_keys: int = 100_000) -> MemoryRateLimitBackend:
+        return MemoryRateLimitBackend(max_keys=max_keys)
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        self.calls += 1
+        if self.latency:
+            await asyncio.sleep(self.latency)
+        return self.store.take_sync(key, limit)
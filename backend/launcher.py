@@ -0,0 +1,248 @@
+"""
+Production launcher: pre-forks worker processes that share one listening socket.
+
+    python launcher.py --host 0.0.0.0 --port 8000 --workers 4
+
+server.py stays the single-process development entry point (reload=True).
+Here the parent binds the socket and forks before any event loop, Motor
+client or HTTP client exists; each worker builds its own app in its
+lifespan, so those clients are always created after fork. The parent also
+forks the shared state server (services/shared_state.py), which holds the
+rate-limit buckets and content versions every worker must agree on, and
+points each worker's /metrics at a common snapshot directory. Children
+that die are restarted; SIGTERM or SIGINT lets the workers drain and exit.
+"""
+import argparse
+import asyncio
+import logging
+import os
+import secrets
+import shutil
+import signal
+import socket
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional
+
+import uvicorn
+
+from app_factory import create_app
+from core.db import create_mongo_client
+from core.logging_config import JsonFormatter, RedactingTextFormatter, Redactor, configure_logging
+from core.settings import Settings
+from services.shared_state import SharedStateServer
+
+logger = logging.getLogger("launcher")
+
+STATE_SERVER = "shared-state"
+# A child that exits sooner than this after starting is restarted with a delay, not in a tight loop
+MIN_UPTIME = 5.0
+
+
+def worker_settings(settings: Settings, runtime_dir: Path) -> Settings:
+    """Settings the workers run with: shared socket, metrics dir, one form-token key, and no per-process rate limits"""
+    update: Dict[str, Any] = {
+        "shared_state_socket": settings.shared_state_socket or str(runtime_dir / "shared-state.sock"),
+        "metrics_dir": settings.metrics_dir or str(runtime_dir / "metrics"),
+    }
+    if settings.spam_filter_enabled and not settings.spam_form_secret:
+        # A form token issued by one worker must check out on any other
+        update["spam_form_secret"] = secrets.token_hex(32)
+    if settings.rate_limit_backend == "memory":
+        # N in-memory buckets would allow N times the configured rate
+        update["rate_limit_backend"] = "shared"
+    return settings.model_copy(update=update)
+
+
+def bind_socket(host: str, port: int, backlog: int = 2048) -> socket.socket:
+    sock = socket.socket(socket.AF_INET6 if ":" in host else socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def run_state_server(settings: Settings):
+    listener = configure_logging(settings)
+    server = SharedStateServer(settings.shared_state_socket, max_keys=settings.rate_limit_max_keys)
+    # Ctrl-C reaches the whole process group; stay up until the workers have drained
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    try:
+        asyncio.run(server.serve())
+    except (KeyboardInterrupt, SystemExit):
+        pass
+    finally:
+        listener.stop()
+
+
+def run_worker(sock: socket.socket, settings: Settings, mongo_client_factory: Callable[[Settings], Any]):
+    listener = configure_logging(settings)
+    app = create_app(settings, mongo_client_factory)
+    # uvicorn installs its own SIGTERM/SIGINT handlers and drains in-flight requests.
+    # Forwarding headers are left alone: core.network trusts them per TRUSTED_PROXY_HOPS.
+    config = uvicorn.Config(
+        app, log_config=None, access_log=False, timeout_graceful_shutdown=30, proxy_headers=False
+    )
+    try:
+        uvicorn.Server(config).run(sockets=[sock])
+    finally:
+        listener.stop()
+
+
+class Launcher:
+    def __init__(self, settings: Settings, host: str = "127.0.0.1", port: int = 8000,
+                 workers: Optional[int] = None,
+                 mongo_client_factory: Callable[[Settings], Any] = create_mongo_client):
+        self.host = host
+        self.port = port
+        self.workers = workers or settings.workers or os.cpu_count() or 1
+        self.mongo_client_factory = mongo_client_factory
+        self.runtime_dir = Path(tempfile.mkdtemp(prefix="cashcue-"))
+        self.settings = worker_settings(settings, self.runtime_dir)
+        self.children: Dict[int, str] = {}  # pid -> STATE_SERVER or "worker-<n>"
+        self.started_at: Dict[str, float] = {}
+        self.sock: Optional[socket.socket] = None
+        self._stopping = False
+
+    def _fork(self, name: str, target: Callable[[], None]) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                signal.signal(signal.SIGINT, signal.SIG_DFL)
+                signal.signal(signal.SIGTERM, signal.SIG_DFL)
+                target()
+            except BaseException:
+                logging.getLogger("launcher").exception(f"{name} crashed")
+                code = 1
+            finally:
+                logging.shutdown()
+                os._exit(code)
+        self.children[pid] = name
+        self.started_at[name] = time.monotonic()
+        logger.info(f"Started {name} (pid {pid})")
+        return pid
+
+    def _spawn(self, name: str):
+        if name == STATE_SERVER:
+            def target():
+                self.sock.close()
+                run_state_server(self.settings)
+            self._fork(name, target)
+        else:
+            self._fork(name, lambda: run_worker(self.sock, self.settings, self.mongo_client_factory))
+
+    def _prepare_metrics_dir(self):
+        metrics_dir = Path(self.settings.metrics_dir)
+        metrics_dir.mkdir(parents=True, exist_ok=True)
+        # Counts from a previous run would otherwise be added to this one's
+        for stale in metrics_dir.glob("worker-*.json"):
+            stale.unlink()
+
+    def _wait_for_state_server(self, timeout: float = 5.0):
+        deadline = time.monotonic() + timeout
+        while time.monotonic() < deadline:
+            if os.path.exists(self.settings.shared_state_socket):
+                return
+            time.sleep(0.01)
+        raise RuntimeError(f"Shared state server did not start within {timeout}s")
+
+    def _handle_signal(self, signum, frame):
+        if not self._stopping:
+            logger.info(f"Received {signal.Signals(signum).name}, stopping workers")
+        self._stopping = True
+
+    def run(self):
+        self._prepare_metrics_dir()
+        if os.path.exists(self.settings.shared_state_socket):
+            os.unlink(self.settings.shared_state_socket)
+        self.sock = bind_socket(self.host, self.port)
+        signal.signal(signal.SIGTERM, self._handle_signal)
+        signal.signal(signal.SIGINT, self._handle_signal)
+        logger.info(f"Listening on {self.host}:{self.port} with {self.workers} workers")
+        try:
+            self._spawn(STATE_SERVER)
+            self._wait_for_state_server()
+            for n in range(self.workers):
+                self._spawn(f"worker-{n}")
+            self._supervise()
+        finally:
+            self._shutdown()
+            self.sock.close()
+            shutil.rmtree(self.runtime_dir, ignore_errors=True)
+
+    def _supervise(self):
+        while not self._stopping:
+            pid, status = os.waitpid(-1, os.WNOHANG)
+            if pid == 0:
+                time.sleep(0.2)
+                continue
+            name = self.children.pop(pid, None)
+            if name is None or self._stopping:
+                continue
+            logger.error(f"{name} (pid {pid}) exited with status {os.waitstatus_to_exitcode(status)}, restarting")
+            if time.monotonic() - self.started_at[name] < MIN_UPTIME:
+                time.sleep(1.0)
+            self._spawn(name)
+
+    def _shutdown(self, timeout: float = 35.0):
+        workers = [pid for pid, name in self.children.items() if name != STATE_SERVER]
+        self._signal_and_reap(workers, timeout)
+        # Workers may still be calling the state server while they drain, so it goes last
+        self._signal_and_reap(list(self.children), 5.0)
+
+    def _signal_and_reap(self, pids, timeout: float):
+        for pid in pids:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except ProcessLookupError:
+                pass
+        deadline = time.monotonic() + timeout
+        remaining = set(pids)
+        while remaining and time.monotonic() < deadline:
+            for pid in list(remaining):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    remaining.discard(pid)
+                    self.children.pop(pid, None)
+            time.sleep(0.05)
+        for pid in remaining:
+            logger.warning(f"{self.children.pop(pid, pid)} did not exit in {timeout}s, killing it")
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+
+def configure_launcher_logging(settings: Settings):
+    """
+    The parent logs synchronously: configure_logging() starts a listener
+    thread, and threads must not exist when the parent forks.
+    """
+    redactor = Redactor(settings.log_hash_salt)
+    handler = logging.StreamHandler(sys.stdout)
+    handler.setFormatter(JsonFormatter(redactor) if settings.log_format == "json" else RedactingTextFormatter(redactor))
+    logger.addHandler(handler)
+    logger.setLevel(settings.log_level.upper())
+    logger.propagate = False
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--workers", type=int, default=0, help="default: WORKERS, else one per CPU core")
+    args = parser.parse_args()
+
+    settings = Settings.from_env()
+    configure_launcher_logging(settings)
+    Launcher(settings, args.host, args.port, args.workers or None).run()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,60 @@
+import json
+import logging
+import math
+from typing import Iterable, Optional
+
+from starlette.requests import HTTPConnection
+
+from core.network import get_client_ip
+from services.rate_limiter import RateLimiter
+
+logger = logging.getLogger(__name__)
+
+
+class RateLimitMiddleware:
+    """
+    Per-IP token bucket in front of the form endpoints, bulk ones included.
+    Runs before the body is read, so a rejected request costs one bucket
+    check and nothing else.
+    """
+
+    def __init__(self, app, limiter: Optional[RateLimiter] = None,
+                 paths: Iterable[str] = ("/api/contact", "/api/ai-waitlist", "/api/contact/bulk",
+                                         "/api/ai-waitlist/bulk")):
+        self.app = app
+        # Without an explicit limiter, the one created in the app lifespan is used
+        self.limiter = limiter
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "POST" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        limiter = self.limiter or getattr(scope["app"].state, "rate_limiter", None)
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+
+        client_ip = get_client_ip(HTTPConnection(scope))
+        allowed, retry_after = await limiter.check_ip(client_ip)
+        if allowed:
+            await self.app(scope, receive, send)
+            return
+
+        logger.warning(f"Rate limit exceeded for {scope['path']} from {client_ip}")
+        await send_429(send, retry_after)
+
+
+async def send_429(send, retry_after: float):
+    body = json.dumps({"detail": "Too many requests, please try again later."}).encode()
+    await send({
+        "type": "http.response.start",
+        "status": 429,
+        "headers": [
+            (b"content-type", b"application/json"),
+            (b"content-length", str(len(body)).encode()),
+            (b"retry-after", str(max(1, math.ceil(retry_after))).encode()),
+        ],
+    })
+    await send({"type": "http.response.body", "body": body})
@@ -0,0 +1,80 @@
+import logging
+from typing import Iterable, Optional
+
+from core.http_cache import etag_matches, negotiate_encoding
+from services.response_cache import ENCODINGS, CachedResponse, ResponseCache
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_PATHS = ("/health", "/api/", "/api/services", "/api/projects")
+
+
+def _header(scope, name: bytes) -> Optional[str]:
+    for key, value in scope["headers"]:
+        if key == name:
+            return value.decode("latin-1")
+    return None
+
+
+class ResponseCacheMiddleware:
+    """
+    Serves GETs for a fixed set of read-only paths from a ResponseCache.
+    A miss runs the app, keeps the 200 response with its gzip/brotli variants,
+    and answers from the stored entry; later hits never reach the router.
+    """
+
+    def __init__(self, app, cache: ResponseCache, paths: Iterable[str] = DEFAULT_PATHS):
+        self.app = app
+        self.cache = cache
+        self.paths = frozenset(paths)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] != "GET" or scope["path"] not in self.paths:
+            await self.app(scope, receive, send)
+            return
+
+        key = (scope["path"], scope["query_string"])
+        entry = self.cache.get(key)
+        if entry is None:
+            entry = await self._fill(scope, receive, send, key)
+            if entry is None:
+                return
+        # Keep per-route metrics labels on hits, which skip the router
+        scope["route"] = entry.route
+        await self._respond(scope, send, entry)
+
+    async def _fill(self, scope, receive, send, key) -> Optional[CachedResponse]:
+        start = None
+        chunks = []
+        passthrough = False
+
+        async def capture(message):
+            nonlocal start, passthrough
+            if message["type"] == "http.response.start":
+                start = message
+                headers = message.get("headers", [])
+                if message["status"] != 200 or any(k.lower() == b"set-cookie" for k, _ in headers):
+                    passthrough = True
+                    await send(message)
+                return
+            if passthrough:
+                await send(message)
+                return
+            chunks.append(message.get("body", b""))
+
+        await self.app(scope, receive, capture)
+        if passthrough or start is None:
+            return None
+        entry = self.cache.build(start["status"], list(start.get("headers", [])), b"".join(chunks), scope.get("route"))
+        self.cache.put(key, entry)
+        return entry
+
+    async def _respond(self, scope, send, entry: CachedResponse):
+        if entry.etag and etag_matches(_header(scope, b"if-none-match"), entry.etag):
+            await send({"type": "http.response.start", "status": 304, "headers": entry.not_modified_headers()})
+            await send({"type": "http.response.body", "body": b""})
+            return
+        encoding = negotiate_encoding(_header(scope, b"accept-encoding"), ENCODINGS)
+        body, headers = entry.variants.get(encoding) or entry.variants["identity"]
+        await send({"type": "http.response.start", "status": entry.status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
@@ -1,13 +1,44 @@
 from pydantic import BaseModel, Field, EmailStr
-from typing import List, Optional
+from typing import Any, Dict, List, Optional
 from datetime import datetime
 import uuid
 
 
+class SpamSignals(BaseModel):
+    """Anti-spam inputs sent by the form (see services/spam_filter.py); never stored"""
+    gotcha: Optional[str] = Field(None, alias="_gotcha", max_length=500)  # hidden honeypot input
+    form_token: Optional[str] = Field(None, alias="_form_token", max_length=200)  # from GET /api/form-token
+
+
+TRANSIENT_FIELDS = tuple(SpamSignals.model_fields)
+
+
+class StoredSubmission:
+    """
+    Mixin for the stored form of a submission. The request (*Create) model
+    has already been validated by FastAPI, so promotion copies its fields
+    instead of validating them (and the email) a second time.
+    """
+
+    @classmethod
+    def from_create(cls, data: BaseModel, **extra):
+        fields = dict(data.__dict__)
+        for name in TRANSIENT_FIELDS:
+            fields.pop(name, None)
+        return cls.model_construct(**fields, **extra)
+
+    def to_document(self) -> Dict[str, Any]:
+        """The MongoDB document: a shallow copy of the (flat, already native-typed) fields"""
+        document = dict(self.__dict__)
+        for name in TRANSIENT_FIELDS:
+            document.pop(name, None)
+        return document
+
+
 # -------------------------
 # Contact Form Models
 # -------------------------
-class ContactSubmissionCreate(BaseModel):
+class ContactSubmissionCreate(SpamSignals):
     name: str = Field(..., min_length=1, max_length=100)
     email: EmailStr
     company: Optional[str] = Field(None, max_length=100)
@@ -19,27 +50,29 @@ class ContactSubmissionCreate(BaseModel):
         populate_by_name = True  # ✅ allow projectType alias
 
 
-class ContactSubmission(ContactSubmissionCreate):
+class ContactSubmission(ContactSubmissionCreate, StoredSubmission):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     submitted_at: datetime = Field(default_factory=datetime.utcnow)
     formspree_status: str = "pending"  # 'sent', 'failed', 'pending'
     ip_address: Optional[str] = None
+    spam_flag: Optional[str] = None  # spam filter reason for stored-but-suspect submissions, e.g. 'duplicate'
 
 
 # -------------------------
 # AI Waitlist Models
 # -------------------------
-class WaitlistSubmissionCreate(BaseModel):
+class WaitlistSubmissionCreate(SpamSignals):
     name: str = Field(..., min_length=1, max_length=100)
     email: EmailStr
     interests: Optional[str] = Field(None, max_length=500)
 
 
-class WaitlistSubmission(WaitlistSubmissionCreate):
+class WaitlistSubmission(WaitlistSubmissionCreate, StoredSubmission):
     id: str = Field(default_factory=lambda: str(uuid.uuid4()))
     submitted_at: datetime = Field(default_factory=datetime.utcnow)
     formspree_status: str = "pending"  # 'sent', 'failed', 'pending'
     ip_address: Optional[str] = None
+    spam_flag: Optional[str] = None
 
 
 # -------------------------
@@ -0,0 +1,57 @@
+from fastapi import APIRouter, Depends, Query, Request
+from fastapi.responses import StreamingResponse
+from typing import AsyncIterator
+import logging
+
+from services.bulk_ingest import BulkIngestService
+from core.auth import require_admin
+from core.dependencies import get_bulk_ingest_service
+from core.network import get_client_ip
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api", tags=["bulk"])
+
+async def body_chunks(request: Request) -> AsyncIterator[bytes]:
+    async for chunk in request.stream():
+        if chunk:
+            yield chunk
+
+async def ingest_request(request: Request, form_type: str, notify: bool,
+                         bulk_ingest_service: BulkIngestService) -> StreamingResponse:
+    """
+    Parse the body as it arrives, ingest it batch by batch, then stream the
+    spooled report: a summary line followed by one line per input item.
+    """
+    chunks = body_chunks(request)
+    first = b""
+    async for chunk in chunks:
+        first = chunk
+        break
+
+    async def replay() -> AsyncIterator[bytes]:
+        if first:
+            yield first
+        async for chunk in chunks:
+            yield chunk
+
+    items = bulk_ingest_service.parse(replay(), request.headers.get("content-type", ""), first.lstrip()[:1])
+    result = await bulk_ingest_service.ingest(form_type, items, get_client_ip(request), notify=notify)
+    return StreamingResponse(result.stream(), media_type="application/x-ndjson")
+
+@router.post("/ai-waitlist/bulk", dependencies=[Depends(require_admin)])
+async def bulk_waitlist(
+    request: Request,
+    notify: bool = Query(False, description="Queue a Formspree notification per created signup"),
+    bulk_ingest_service: BulkIngestService = Depends(get_bulk_ingest_service),
+):
+    """Waitlist signups as NDJSON or a JSON array; deduplicated by email. Admin token required."""
+    return await ingest_request(request, "waitlist", notify, bulk_ingest_service)
+
+@router.post("/contact/bulk", dependencies=[Depends(require_admin)])
+async def bulk_contact(
+    request: Request,
+    notify: bool = Query(False, description="Queue a Formspree notification per created submission"),
+    bulk_ingest_service: BulkIngestService = Depends(get_bulk_ingest_service),
+):
+    """Contact submissions as NDJSON or a JSON array. Admin token required."""
+    return await ingest_request(request, "contact", notify, bulk_ingest_service)
@@ -0,0 +1,66 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from typing import Optional
+import logging
+
+from models import Project, Service
+from services.content_service import CachedBody, ContentService
+from core.auth import require_admin
+from core.dependencies import get_content_service
+from core.http_cache import etag_matches
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api", tags=["content"])
+
+CACHE_CONTROL = "public, max-age=60, must-revalidate"
+
+def cached_response(request: Request, cached: Optional[CachedBody]) -> Response:
+    if cached is None:
+        raise HTTPException(status_code=503, detail="Content is loading, please retry.", headers={"Retry-After": "1"})
+    headers = {"ETag": cached.etag, "Cache-Control": CACHE_CONTROL}
+    if etag_matches(request.headers.get("if-none-match"), cached.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(content=cached.body, media_type="application/json", headers=headers)
+
+@router.get("/services")
+async def list_services(
+    request: Request,
+    content_service: ContentService = Depends(get_content_service),
+):
+    """Active services, ordered; served from the in-process content cache"""
+    return cached_response(request, content_service.get_services())
+
+@router.get("/projects")
+async def list_projects(
+    request: Request,
+    category: Optional[str] = Query(None, description="e.g. 'Landing Page'; omit or 'All' for every project"),
+    content_service: ContentService = Depends(get_content_service),
+):
+    """Active projects, optionally filtered by category; served from the in-process content cache"""
+    return cached_response(request, content_service.get_projects(category))
+
+@router.post("/admin/services", response_model=Service, dependencies=[Depends(require_admin)])
+async def upsert_service(
+    service: Service,
+    content_service: ContentService = Depends(get_content_service),
+):
+    """
+    Create or replace a service by id (admin token required). This worker
+    rebuilds its cache at once; others reload on the notifier event.
+    """
+    try:
+        return await content_service.upsert_service(service)
+    except Exception as e:
+        logger.error(f"Error saving service: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error saving service")
+
+@router.post("/admin/projects", response_model=Project, dependencies=[Depends(require_admin)])
+async def upsert_project(
+    project: Project,
+    content_service: ContentService = Depends(get_content_service),
+):
+    """Create or replace a project by id (admin token required); see upsert_service"""
+    try:
+        return await content_service.upsert_project(project)
+    except Exception as e:
+        logger.error(f"Error saving project: {str(e)}")
+        raise HTTPException(status_code=500, detail="Error saving project")
@@ -0,0 +1,47 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from fastapi.responses import PlainTextResponse
+import asyncio
+import logging
+
+from core.auth import require_admin
+from core.dependencies import get_loop_monitor
+from core.loop_monitor import LoopMonitor
+from core.profiler import render_collapsed, sample
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/admin", tags=["diagnostics"])
+
+# One profile at a time per process; a second request gets 409 rather than doubling the overhead
+_profile_lock = asyncio.Lock()
+
+@router.get("/loop", dependencies=[Depends(require_admin)])
+async def loop_health(loop_monitor: LoopMonitor = Depends(get_loop_monitor)):
+    """Event-loop lag histogram and the most recent stalls, with the stack captured during each"""
+    if loop_monitor is None:
+        raise HTTPException(status_code=404, detail="Loop monitor is disabled")
+    return loop_monitor.summary()
+
+@router.get("/profile", response_class=PlainTextResponse, dependencies=[Depends(require_admin)])
+async def profile(
+    request: Request,
+    seconds: float = Query(10.0, gt=0),
+    interval_ms: float = Query(5.0, ge=1.0, le=1000.0),
+    all_threads: bool = Query(False, description="Also sample worker threads, not just the event loop"),
+):
+    """
+    Sample live stacks for `seconds` and return them in collapsed-stack format
+    (feed to flamegraph.pl or speedscope). The sampler runs on its own thread.
+    """
+    settings = request.app.state.settings
+    if not settings.profiler_enabled:
+        raise HTTPException(status_code=404, detail="Profiler is disabled")
+    if seconds > settings.profiler_max_seconds:
+        raise HTTPException(status_code=422, detail=f"seconds must be at most {settings.profiler_max_seconds}")
+    if _profile_lock.locked():
+        raise HTTPException(status_code=409, detail="A profile is already running")
+
+    async with _profile_lock:
+        thread_ids = None if all_threads else [request.app.state.loop_thread_id]
+        logger.info(f"Profiling for {seconds}s every {interval_ms}ms (all_threads={all_threads})")
+        counts = await asyncio.to_thread(sample, seconds, interval_ms / 1000, thread_ids)
+    return PlainTextResponse(render_collapsed(counts))
@@ -1,59 +1,167 @@
-from fastapi import APIRouter, HTTPException, Request
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from datetime import datetime
+from typing import Awaitable, Callable, List, Optional, Tuple
 import logging
+import math
 
 from models import ContactSubmission, WaitlistSubmission, ContactSubmissionCreate, WaitlistSubmissionCreate, SubmissionResponse
-from services.database_service_fixed import DatabaseService
+from services.database_service_fixed import DatabaseService, decode_cursor, to_json_line
 from services.formspree_service import FormspreeService
-from core.db import db  # ✅ import the shared db
+from services.outbox_service import OutboxService
+from services.export_service import ExportService, MEDIA_TYPES
+from services.idempotency import IDEMPOTENCY_HEADER, IdempotencyConflict, IdempotencyStore
+from services.rate_limiter import RateLimiter
+from services.spam_filter import SpamFilter
+from core.dependencies import (
+    get_database_service,
+    get_export_service,
+    get_formspree_service,
+    get_idempotency_store,
+    get_outbox_service,
+    get_rate_limiter,
+    get_spam_filter,
+)
+from core.auth import require_admin
+from core.network import get_client_ip
+from core.metrics import span
 
 logger = logging.getLogger(__name__)
 router = APIRouter(prefix="/api", tags=["forms"])
 
-# ✅ Initialize services ONCE here
-FORMSPREE_ENDPOINT = "https://formspree.io/f/mvgrekqd"
-formspree_service = FormspreeService(FORMSPREE_ENDPOINT)
-database_service = DatabaseService(db)  # ✅ now database is ready
+async def enforce_email_rate_limit(rate_limiter: Optional[RateLimiter], email: str):
+    """Per-email limit, checked after validation and before any database or Formspree work"""
+    if rate_limiter is None:
+        return
+    allowed, retry_after = await rate_limiter.check_email(email)
+    if not allowed:
+        raise HTTPException(
+            status_code=429,
+            detail="Too many submissions for this email, please try again later.",
+            headers={"Retry-After": str(max(1, math.ceil(retry_after)))},
+        )
+
+def screen_spam(spam_filter: Optional[SpamFilter], form_type: str, data, text: str,
+                success_message: str) -> Tuple[Optional[SubmissionResponse], Optional[str]]:
+    """
+    First thing each form does: no rate-limit, database or Formspree round trip
+    is spent on junk. Returns (response for a rejected submission, spam flag
+    to store an accepted one with). Silent rejections get the normal success
+    response.
+    """
+    if spam_filter is None:
+        return None, None
+    verdict = spam_filter.check(form_type, data.email, text, honeypot=data.gotcha, form_token=data.form_token)
+    if verdict is None:
+        return None, None
+    if verdict.flag:
+        logger.info(f"Flagged {form_type} submission as possible spam: {verdict.reason}", extra={"email": data.email})
+        return None, verdict.reason
+    logger.info(f"Rejected {form_type} submission as spam: {verdict.reason}", extra={"email": data.email})
+    if verdict.silent:
+        return SubmissionResponse(success=True, message=success_message), None
+    raise HTTPException(status_code=422, detail=verdict.detail)
+
+async def run_idempotent(idempotency: Optional[IdempotencyStore], form_type: str, data, request: Request,
+                         response: Response, handler: Callable[[], Awaitable[SubmissionResponse]]):
+    """
+    Run the submission once per Idempotency-Key and hand retries the first
+    response, marked with Idempotent-Replayed: true. Without a key, only an
+    identical request still in flight on this worker is joined.
+    """
+    if idempotency is None:
+        return await handler()
 
-def get_client_ip(request: Request) -> str:
-    if "x-forwarded-for" in request.headers:
-        return request.headers["x-forwarded-for"].split(",")[0].strip()
-    elif "x-real-ip" in request.headers:
-        return request.headers["x-real-ip"]
-    else:
-        return request.client.host if request.client else "unknown"
+    async def handle():
+        return (await handler()).model_dump()
+
+    try:
+        idempotent_request = idempotency.request_for(form_type, request.headers.get(IDEMPOTENCY_HEADER), data)
+        result, replayed = await idempotency.run(idempotent_request, handle)
+    except IdempotencyConflict as e:
+        headers = {"Retry-After": str(math.ceil(e.retry_after))} if e.retry_after else None
+        raise HTTPException(status_code=e.status_code, detail=e.detail, headers=headers)
+    if replayed:
+        response.headers["Idempotent-Replayed"] = "true"
+    return result
+
+async def enqueue_formspree(outbox_service: OutboxService, form_type: str, submission_id, payload,
+                            submitted_at: Optional[datetime] = None) -> bool:
+    """Queue a Formspree delivery. Returns False if the outbox could not be written."""
+    try:
+        async with span("mongo", "outbox_enqueue"):
+            await outbox_service.enqueue(form_type, submission_id, payload, submitted_at)
+        return True
+    except Exception as outbox_error:
+        logger.error(f"Outbox enqueue failed, delivering inline: {str(outbox_error)}")
+        return False
+
+@router.get("/form-token")
+async def get_form_token(
+    response: Response,
+    form: str = Query(..., pattern="^(contact|waitlist)$"),
+    spam_filter: Optional[SpamFilter] = Depends(get_spam_filter),
+):
+    """Fetched when a form is rendered and sent back as _form_token; null when the spam filter is off"""
+    response.headers["Cache-Control"] = "no-store"
+    if spam_filter is None or spam_filter.form_tokens is None:
+        return {"token": None}
+    return {"token": spam_filter.form_tokens.issue(form)}
 
 @router.post("/contact", response_model=SubmissionResponse)
-async def submit_contact_form(contact_data: ContactSubmissionCreate, request: Request):
+async def submit_contact_form(
+    contact_data: ContactSubmissionCreate,
+    request: Request,
+    response: Response,
+    database_service: DatabaseService = Depends(get_database_service),
+    formspree_service: FormspreeService = Depends(get_formspree_service),
+    outbox_service: OutboxService = Depends(get_outbox_service),
+    rate_limiter: Optional[RateLimiter] = Depends(get_rate_limiter),
+    spam_filter: Optional[SpamFilter] = Depends(get_spam_filter),
+    idempotency: Optional[IdempotencyStore] = Depends(get_idempotency_store),
+):
+    text = " ".join(filter(None, (contact_data.name, contact_data.company, contact_data.message)))
+    rejected, spam_flag = screen_spam(spam_filter, "contact", contact_data, text, "Thanks! We'll contact you soon.")
+    if rejected is not None:
+        return rejected
+    return await run_idempotent(
+        idempotency, "contact", contact_data, request, response,
+        lambda: process_contact_submission(
+            contact_data, get_client_ip(request), database_service, formspree_service, outbox_service, rate_limiter,
+            spam_flag,
+        ),
+    )
+
+async def process_contact_submission(
+    contact_data: ContactSubmissionCreate,
+    client_ip: str,
+    database_service: DatabaseService,
+    formspree_service: FormspreeService,
+    outbox_service: OutboxService,
+    rate_limiter: Optional[RateLimiter],
+    spam_flag: Optional[str] = None,
+) -> SubmissionResponse:
+    await enforce_email_rate_limit(rate_limiter, contact_data.email)
     try:
-        client_ip = get_client_ip(request)
-        submission = ContactSubmission(
-            name=contact_data.name,
-            email=contact_data.email,
-            company=contact_data.company,
-            project_type=contact_data.project_type,
-            budget=contact_data.budget,
-            message=contact_data.message,
-            ip_address=client_ip,
-        )
+        submission = ContactSubmission.from_create(contact_data, ip_address=client_ip, spam_flag=spam_flag)
 
         # Save to DB
         submission_id = None
         try:
             submission_id = await database_service.save_contact_submission(submission)
             logger.info(f"Contact saved: {submission_id}")
-        except Exception as db_error:
-            # Print the full error so we can see what went wrong
-            import traceback
-            traceback.print_exc()
-
-            logger.error(f"Database save failed: {str(db_error)}")
+        except Exception:
+            # The traceback is formatted on the logging thread, not here
+            logger.exception("Database save failed")
             # Continue without database save
 
-        # Send to Formspree
-        formspree_result = await formspree_service.submit_contact_form(contact_data.dict(by_alias=True))
-        status = "sent" if formspree_result.get("success") else "failed"
-        if submission_id:
-            await database_service.update_contact_formspree_status(submission_id, status)
+        # Hand off to the outbox; the dispatcher delivers to Formspree in the background
+        payload = formspree_service.build_contact_payload(contact_data.__dict__)
+        if not await enqueue_formspree(outbox_service, "contact", submission_id, payload, submission.submitted_at):
+            formspree_result = await formspree_service.submit_form(payload)
+            status = "sent" if formspree_result.get("success") else "failed"
+            if submission_id:
+                await database_service.update_contact_formspree_status(submission_id, status, submission.submitted_at)
 
         return SubmissionResponse(success=True, message="Thanks! We'll contact you soon.", submission_id=submission_id)
 
@@ -64,84 +172,168 @@ async def submit_contact_form(contact_data: ContactSubmissionCreate, request: Re
         raise HTTPException(status_code=500, detail="Unexpected server error")
 
 @router.post("/ai-waitlist", response_model=SubmissionResponse)
-async def submit_waitlist_form(waitlist_data: WaitlistSubmissionCreate, request: Request):
-    try:
-        client_ip = get_client_ip(request)
+async def submit_waitlist_form(
+    waitlist_data: WaitlistSubmissionCreate,
+    request: Request,
+    response: Response,
+    database_service: DatabaseService = Depends(get_database_service),
+    formspree_service: FormspreeService = Depends(get_formspree_service),
+    outbox_service: OutboxService = Depends(get_outbox_service),
+    rate_limiter: Optional[RateLimiter] = Depends(get_rate_limiter),
+    spam_filter: Optional[SpamFilter] = Depends(get_spam_filter),
+    idempotency: Optional[IdempotencyStore] = Depends(get_idempotency_store),
+):
+    text = " ".join(filter(None, (waitlist_data.name, waitlist_data.interests)))
+    rejected, spam_flag = screen_spam(spam_filter, "waitlist", waitlist_data, text, "Welcome to the waitlist!")
+    if rejected is not None:
+        return rejected
+    return await run_idempotent(
+        idempotency, "waitlist", waitlist_data, request, response,
+        lambda: process_waitlist_submission(
+            waitlist_data, get_client_ip(request), database_service, formspree_service, outbox_service, rate_limiter,
+            spam_flag,
+        ),
+    )
 
-        logger.info(f"Received waitlist submission: {waitlist_data.dict()} from IP: {client_ip}")
+async def process_waitlist_submission(
+    waitlist_data: WaitlistSubmissionCreate,
+    client_ip: str,
+    database_service: DatabaseService,
+    formspree_service: FormspreeService,
+    outbox_service: OutboxService,
+    rate_limiter: Optional[RateLimiter],
+    spam_flag: Optional[str] = None,
+) -> SubmissionResponse:
+    await enforce_email_rate_limit(rate_limiter, waitlist_data.email)
+    try:
+        # Email and IP are hashed by the log formatter; the rest of the submission is not logged
+        logger.info("Received waitlist submission", extra={"email": waitlist_data.email, "client_ip": client_ip})
 
-        # Check duplicates
-        try:
-            email_exists = await database_service.check_email_exists(waitlist_data.email, "waitlist")
-            if email_exists:
-                return SubmissionResponse(success=True, message="You're already on the waitlist!")
-        except Exception as db_error:
-            logger.error(f"Database check failed: {str(db_error)}")
-            # Continue without duplicate check
-
-        # ✅ Build a WaitlistSubmission object (this was missing!)
-        submission = WaitlistSubmission(
-            name=waitlist_data.name,
-            email=waitlist_data.email,
-            interests=waitlist_data.interests,
-            ip_address=client_ip,
-        )
+        submission = WaitlistSubmission.from_create(waitlist_data, ip_address=client_ip, spam_flag=spam_flag)
 
-        # Save to DB
+        # Save to DB; the unique email index makes dedup and insert one atomic upsert
         submission_id = None
         try:
-            submission_id = await database_service.save_waitlist_submission(submission)
+            submission_id, created = await database_service.save_waitlist_submission_if_new(submission)
+            if not created:
+                return SubmissionResponse(success=True, message="You're already on the waitlist!")
             logger.info(f"Waitlist saved: {submission_id}")
-        except Exception as db_error:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Database save failed: {str(db_error)}")
+        except Exception:
+            logger.exception("Database save failed")
             # Continue without database save
 
-        # Send to Formspree
+        # Hand off to the outbox; the dispatcher delivers to Formspree in the background
+        payload = formspree_service.build_waitlist_payload(waitlist_data.__dict__)
+        if await enqueue_formspree(outbox_service, "waitlist", submission_id, payload, submission.submitted_at):
+            return SubmissionResponse(success=True, message="Welcome to the waitlist!", submission_id=submission_id)
+
+        # Outbox unavailable: deliver inline so the signup is not lost
         try:
-            formspree_result = await formspree_service.submit_waitlist_form(waitlist_data.dict())
+            formspree_result = await formspree_service.submit_form(payload)
             status = "sent" if formspree_result.get("success") else "failed"
             if submission_id:
-                await database_service.update_waitlist_formspree_status(submission_id, status)
-        except Exception as fs_error:
-            import traceback
-            traceback.print_exc()
-            logger.error(f"Formspree submission failed: {str(fs_error)}")
+                await database_service.update_waitlist_formspree_status(submission_id, status, submission.submitted_at)
+        except Exception:
+            logger.exception("Formspree submission failed")
             # Optionally update status as failed
             if submission_id:
-                await database_service.update_waitlist_formspree_status(submission_id, "failed")
+                await database_service.update_waitlist_formspree_status(submission_id, "failed", submission.submitted_at)
 
         return SubmissionResponse(success=True, message="Welcome to the waitlist!", submission_id=submission_id)
 
     except HTTPException:
         raise
-    except Exception as e:
-        import traceback
-        traceback.print_exc()
+    except Exception:
         logger.exception("Unexpected error in /ai-waitlist")
         raise HTTPException(status_code=500, detail="Unexpected server error")
 
 
 # Admin endpoints
-@router.get("/admin/contact-submissions")
-async def get_contact_submissions():
+def parse_listing_params(after: Optional[str], fields: Optional[str]) -> Optional[List[str]]:
+    """Validate the keyset cursor and split the comma-separated field projection"""
+    if after:
+        try:
+            decode_cursor(after)
+        except ValueError as e:
+            raise HTTPException(status_code=400, detail=str(e))
+    return [f.strip() for f in fields.split(",") if f.strip()] if fields else None
+
+def stream_submissions(database_service: DatabaseService, form_type: str, after: Optional[str], fields: Optional[List[str]], limit: Optional[int]):
+    """NDJSON straight off the Motor cursor, so memory stays flat however many rows are sent"""
+    async def lines():
+        async for doc in database_service.iter_submissions(form_type, after=after, fields=fields, limit=limit):
+            yield to_json_line(doc)
+    return StreamingResponse(lines(), media_type="application/x-ndjson")
+
+@router.get("/admin/contact-submissions", dependencies=[Depends(require_admin)])
+async def get_contact_submissions(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    database_service: DatabaseService = Depends(get_database_service),
+):
+    field_list = parse_listing_params(after, fields)
+    if format == "ndjson":
+        return stream_submissions(database_service, "contact", after, field_list, limit)
     try:
-        submissions = await database_service.get_contact_submissions()
+        submissions, next_cursor = await database_service.get_submissions_page(
+            "contact", limit=limit or 50, after=after, fields=field_list
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
         return submissions
     except Exception as e:
-        import traceback
-        traceback.print_exc()
+        logger.exception("Error fetching contact submissions")
         raise HTTPException(
             status_code=500,
             detail=f"Failed to fetch contact submissions: {str(e)}"
         )
 
-@router.get("/admin/waitlist-submissions")
-async def get_waitlist_submissions():
+@router.get("/admin/waitlist-submissions", dependencies=[Depends(require_admin)])
+async def get_waitlist_submissions(
+    response: Response,
+    limit: Optional[int] = Query(None, ge=1, le=500),
+    after: Optional[str] = None,
+    fields: Optional[str] = None,
+    format: str = Query("json", pattern="^(json|ndjson)$"),
+    database_service: DatabaseService = Depends(get_database_service),
+):
+    field_list = parse_listing_params(after, fields)
+    if format == "ndjson":
+        return stream_submissions(database_service, "waitlist", after, field_list, limit)
     try:
-        subs = await database_service.get_waitlist_submissions(limit=50)
-        return {"success": True, "submissions": subs}
+        subs, next_cursor = await database_service.get_submissions_page(
+            "waitlist", limit=limit or 50, after=after, fields=field_list
+        )
+        if next_cursor:
+            response.headers["X-Next-Cursor"] = next_cursor
+        return {"success": True, "submissions": subs, "next_cursor": next_cursor}
     except Exception:
         logger.exception("Error fetching waitlist submissions")
         raise HTTPException(status_code=500, detail="Failed to fetch submissions")
+
+@router.get("/admin/export/{form_type}", dependencies=[Depends(require_admin)])
+async def export_submissions(
+    form_type: str,
+    format: str = Query("ndjson", pattern="^(ndjson|csv|columnar)$"),
+    start: Optional[datetime] = Query(None, description="submitted_at lower bound (inclusive)"),
+    end: Optional[datetime] = Query(None, description="submitted_at upper bound (exclusive)"),
+    fields: Optional[str] = None,
+    batch_size: int = Query(2000, ge=100, le=10000),
+    export_service: ExportService = Depends(get_export_service),
+):
+    """Stream a full export of contact or waitlist submissions"""
+    if form_type not in ("contact", "waitlist"):
+        raise HTTPException(status_code=404, detail="Unknown submission type")
+    field_list = parse_listing_params(None, fields)
+    body = export_service.export(
+        form_type, format, fields=field_list, submitted_from=start, submitted_to=end, batch_size=batch_size
+    )
+    extension = "csv" if format == "csv" else "ndjson"
+    return StreamingResponse(
+        body,
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f'attachment; filename="{form_type}-submissions.{extension}"'},
+    )
@@ -0,0 +1,14 @@
+from fastapi import APIRouter, Request
+from fastapi.responses import PlainTextResponse
+import asyncio
+
+from core.metrics import REGISTRY
+
+router = APIRouter(tags=["metrics"])
+
+@router.get("/metrics", response_class=PlainTextResponse)
+async def metrics(request: Request):
+    """Prometheus text exposition of request and dependency latency histograms, summed over all workers"""
+    exporter = getattr(request.app.state, "metrics_exporter", None)
+    body = await asyncio.to_thread(exporter.collect) if exporter is not None else REGISTRY.render()
+    return PlainTextResponse(body, media_type="text/plain; version=0.0.4")
@@ -0,0 +1,42 @@
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
+from fastapi.responses import FileResponse, RedirectResponse
+
+from services.static_site import StaticSite
+from core.dependencies import get_static_site
+from core.http_cache import etag_matches, negotiate_encoding
+
+# Catch-all for the built SPA; included last so every API route matches first
+router = APIRouter(tags=["static"])
+
+@router.api_route("/{path:path}", methods=["GET", "HEAD"], include_in_schema=False)
+async def serve_static(
+    path: str,
+    request: Request,
+    site: StaticSite = Depends(get_static_site),
+):
+    url = "/" + path
+    if url.startswith("/api/"):
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    static_file, status_code, location = site.resolve(url)
+    if location is not None:
+        return RedirectResponse(location, status_code=status_code)
+    if static_file is None:
+        raise HTTPException(status_code=404, detail="Not Found")
+
+    file_path, stat_result, etag = static_file.path, static_file.stat, static_file.etag
+    headers = {"Cache-Control": static_file.cache_control, "Vary": "Accept-Encoding"}
+    # Ranges are served from the identity file so byte offsets mean what the client expects
+    if static_file.variants and "range" not in request.headers:
+        encoding = negotiate_encoding(request.headers.get("accept-encoding"), tuple(static_file.variants))
+        if encoding != "identity":
+            file_path, stat_result = static_file.variants[encoding]
+            etag = etag[:-1] + "-" + encoding + '"'
+            headers["Content-Encoding"] = encoding
+    headers["ETag"] = etag
+
+    if status_code == 200 and etag_matches(request.headers.get("if-none-match"), etag):
+        return Response(status_code=304, headers={k: v for k, v in headers.items() if k != "Content-Encoding"})
+    return FileResponse(
+        file_path, status_code=status_code, headers=headers, media_type=static_file.media_type, stat_result=stat_result
+    )
@@ -0,0 +1,72 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from datetime import datetime, timezone
+from typing import Optional
+import logging
+
+from core.auth import require_admin
+from core.dependencies import get_stats_service
+from services.stats_service import DIMENSIONS, GRANULARITIES, StatsService, bucket_start
+
+logger = logging.getLogger(__name__)
+router = APIRouter(prefix="/api/admin", tags=["stats"])
+
+# How far back a query reaches when no start is given
+DEFAULT_BUCKETS = {"hour": 48, "day": 30}
+
+def naive_utc(value: Optional[datetime]) -> Optional[datetime]:
+    """Submissions are stored with naive UTC timestamps; compare like with like"""
+    if value is not None and value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+def require_stats(stats_service: Optional[StatsService]) -> StatsService:
+    if stats_service is None:
+        raise HTTPException(status_code=404, detail="Stats are disabled")
+    return stats_service
+
+@router.get("/stats", dependencies=[Depends(require_admin)])
+async def get_stats(
+    request: Request,
+    granularity: str = Query("day", pattern="^(hour|day)$"),
+    form_type: Optional[str] = Query(None, pattern="^(contact|waitlist)$"),
+    start: Optional[datetime] = Query(None, description="first bucket (inclusive), default 48 hours / 30 days back"),
+    end: Optional[datetime] = Query(None, description="bucket upper bound (exclusive), default now"),
+    stats_service: Optional[StatsService] = Depends(get_stats_service),
+):
+    """
+    Submission counts per hour or day, by form type and by project_type,
+    budget and formspree_status, read from the rollups: the cost grows with
+    the number of buckets, not of submissions.
+    """
+    stats_service = require_stats(stats_service)
+    step = GRANULARITIES[granularity]
+    end = naive_utc(end) or bucket_start(datetime.utcnow(), granularity) + step
+    start = bucket_start(naive_utc(start) or end - step * DEFAULT_BUCKETS[granularity], granularity)
+    if start >= end:
+        raise HTTPException(status_code=422, detail="start must be before end")
+    max_buckets = request.app.state.settings.stats_max_buckets
+    if (end - start) / step > max_buckets:
+        raise HTTPException(status_code=422, detail=f"At most {max_buckets} {granularity} buckets per query")
+    try:
+        return await stats_service.query(granularity, start, end, form_type=form_type)
+    except Exception:
+        logger.exception("Error reading stats rollups")
+        raise HTTPException(status_code=500, detail="Failed to fetch stats")
+
+@router.post("/stats/backfill", dependencies=[Depends(require_admin)])
+async def backfill_stats(
+    form_type: Optional[str] = Query(None, pattern="^(contact|waitlist)$"),
+    stats_service: Optional[StatsService] = Depends(get_stats_service),
+):
+    """
+    Rebuild the rollups from the raw submission collections with an
+    aggregation pipeline. Needed once after enabling stats on existing data,
+    and after any period in which counter updates failed.
+    """
+    stats_service = require_stats(stats_service)
+    try:
+        rebuilt = await stats_service.backfill([form_type] if form_type else list(DIMENSIONS))
+    except Exception:
+        logger.exception("Stats backfill failed")
+        raise HTTPException(status_code=500, detail="Stats backfill failed")
+    return {"success": True, "rollups": rebuilt}
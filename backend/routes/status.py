@@ -0,0 +1,34 @@
+from fastapi import APIRouter, Depends
+from pydantic import BaseModel, Field
+from typing import List
+import uuid
+from datetime import datetime
+
+from core.db import get_db
+
+# Legacy status-check routes (kept for compatibility)
+router = APIRouter(prefix="/api")
+
+class StatusCheck(BaseModel):
+    id: str = Field(default_factory=lambda: str(uuid.uuid4()))
+    client_name: str
+    timestamp: datetime = Field(default_factory=datetime.utcnow)
+
+class StatusCheckCreate(BaseModel):
+    client_name: str
+
+@router.get("/")
+async def root():
+    return {"message": "CashCue API v1.0.0 - Ready to serve"}
+
+@router.post("/status", response_model=StatusCheck)
+async def create_status_check(input: StatusCheckCreate, db=Depends(get_db)):
+    # input is already validated; only the defaults (id, timestamp) need filling in
+    status_obj = StatusCheck.model_construct(**input.__dict__)
+    _ = await db.status_checks.insert_one(dict(status_obj.__dict__))
+    return status_obj
+
+@router.get("/status", response_model=List[StatusCheck])
+async def get_status_checks(db=Depends(get_db)):
+    # Raw documents: response_model validates and serializes them in a single pass
+    return await db.status_checks.find({}, {"_id": 0}).to_list(1000)
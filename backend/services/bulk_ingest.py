@@ -0,0 +1,319 @@
+import codecs
+import json
+import logging
+import tempfile
+from collections import Counter
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+
+from bson import ObjectId
+from pydantic import TypeAdapter, ValidationError
+
+from core import fast_json
+from models import ContactSubmission, ContactSubmissionCreate, WaitlistSubmission, WaitlistSubmissionCreate
+from services.database_service_fixed import DatabaseService, json_default, normalize_email
+from services.formspree_service import FormspreeService
+from services.outbox_service import OutboxService
+
+logger = logging.getLogger(__name__)
+
+# Per-item outcomes in the report
+CREATED = "created"
+DUPLICATE = "duplicate"
+INVALID = "invalid"
+ERROR = "error"  # known not to be stored; safe to resend
+UNKNOWN = "unknown"  # the write may or may not have landed; check before resending
+
+REPORT_SPOOL_BYTES = 1024 * 1024
+REPORT_READ_BYTES = 64 * 1024
+
+
+class BulkParseError(ValueError):
+    """The body stopped being parseable; items before it were processed"""
+
+
+# (index, raw item or None, parse error or None)
+RawItem = Tuple[int, Optional[Any], Optional[str]]
+
+
+async def iter_ndjson(chunks: AsyncIterator[bytes], max_item_bytes: int) -> AsyncIterator[RawItem]:
+    """One JSON document per line. A bad line is reported against its index and parsing continues."""
+    buffer = b""
+    index = 0
+    async for chunk in chunks:
+        buffer += chunk
+        *lines, buffer = buffer.split(b"\n")
+        for line in lines:
+            if not line.strip():
+                continue
+            yield _decode_line(index, line)
+            index += 1
+        if len(buffer) > max_item_bytes:
+            raise BulkParseError(f"Item {index} exceeds {max_item_bytes} bytes")
+    if buffer.strip():
+        yield _decode_line(index, buffer)
+
+
+def _decode_line(index: int, line: bytes) -> RawItem:
+    try:
+        return index, fast_json.loads(line), None
+    except ValueError as e:
+        return index, None, f"Invalid JSON: {str(e)}"
+
+
+async def iter_json_array(chunks: AsyncIterator[bytes], max_item_bytes: int) -> AsyncIterator[RawItem]:
+    """
+    Incremental parse of a top-level JSON array: elements are decoded as soon
+    as they are complete and consumed text is dropped, so memory is bounded by
+    the chunk and element size rather than the body.
+    """
+    decoder = json.JSONDecoder()
+    text_decoder = codecs.getincrementaldecoder("utf-8")()
+    iterator = chunks.__aiter__()
+    buffer, pos, eof = "", 0, False
+
+    async def fill() -> bool:
+        nonlocal buffer, pos, eof
+        if eof:
+            return False
+        try:
+            text = text_decoder.decode(await iterator.__anext__())
+        except StopAsyncIteration:
+            text = text_decoder.decode(b"", final=True)
+            eof = True
+        buffer, pos = buffer[pos:] + text, 0
+        return True
+
+    async def peek() -> Optional[str]:
+        nonlocal pos
+        while True:
+            while pos < len(buffer) and buffer[pos].isspace():
+                pos += 1
+            if pos < len(buffer):
+                return buffer[pos]
+            if not await fill():
+                return None
+
+    if await peek() != "[":
+        raise BulkParseError("Expected a JSON array")
+    pos += 1
+    index = 0
+    closing = await peek()
+    if closing is None:
+        raise BulkParseError("Unexpected end of JSON array")
+    if closing == "]":
+        pos += 1
+    while closing != "]":
+        while True:
+            try:
+                item, end = decoder.raw_decode(buffer, pos)
+                # A scalar ending exactly at the buffer edge (e.g. 12|3) may continue in the next chunk
+                if end < len(buffer) or isinstance(item, (dict, list)) or not await fill():
+                    break
+            except json.JSONDecodeError as e:
+                if len(buffer) - pos > max_item_bytes:
+                    raise BulkParseError(f"Item {index} exceeds {max_item_bytes} bytes")
+                if not await fill():
+                    raise BulkParseError(f"Invalid JSON in item {index}: {e.msg}")
+        pos = end
+        yield index, item, None
+        index += 1
+
+        separator = await peek()
+        if separator == "]":
+            pos += 1
+            break
+        if separator != ",":
+            raise BulkParseError(f"Expected ',' or ']' after item {index - 1}")
+        pos += 1
+        if await peek() is None:
+            raise BulkParseError("Unexpected end of JSON array")
+
+    if await peek() is not None:
+        raise BulkParseError("Unexpected data after the JSON array")
+
+
+class BulkResult:
+    """Per-item report spooled to memory, then disk, plus running totals"""
+
+    def __init__(self):
+        self.report = tempfile.SpooledTemporaryFile(max_size=REPORT_SPOOL_BYTES)
+        self.counts: Counter = Counter()
+        self.items = 0
+        self.aborted: Optional[str] = None
+
+    def add(self, index: int, status: str, **details):
+        self.counts[status] += 1
+        self.items += 1
+        entry = {"index": index, "status": status, **details}
+        self.report.write(fast_json.dumps(entry, default=json_default) + b"\n")
+
+    def summary(self) -> Dict[str, Any]:
+        summary = {
+            "items": self.items,
+            **{s: self.counts.get(s, 0) for s in (CREATED, DUPLICATE, INVALID, ERROR, UNKNOWN)},
+        }
+        if self.aborted:
+            summary["aborted"] = self.aborted
+        return summary
+
+    async def stream(self) -> AsyncIterator[bytes]:
+        """Summary line first, then the per-item lines in input order"""
+        try:
+            yield fast_json.dumps({"summary": self.summary()}) + b"\n"
+            self.report.seek(0)
+            while True:
+                chunk = self.report.read(REPORT_READ_BYTES)
+                if not chunk:
+                    break
+                yield chunk
+        finally:
+            self.report.close()
+
+
+class BulkIngestService:
+    """
+    Batch ingestion behind POST /api/ai-waitlist/bulk and /api/contact/bulk.
+    Items are validated, deduplicated (waitlist) and written batch_size at a
+    time, so memory does not grow with the number of rows.
+    """
+
+    MODELS = {
+        "waitlist": (WaitlistSubmissionCreate, WaitlistSubmission),
+        "contact": (ContactSubmissionCreate, ContactSubmission),
+    }
+
+    def __init__(self, database_service: DatabaseService, outbox_service: OutboxService,
+                 formspree_service: FormspreeService, batch_size: int = 1000,
+                 max_items: int = 200_000, max_item_bytes: int = 64 * 1024):
+        self.database_service = database_service
+        self.outbox_service = outbox_service
+        self.formspree_service = formspree_service
+        self.batch_size = batch_size
+        self.max_items = max_items
+        self.max_item_bytes = max_item_bytes
+        self._adapters = {
+            form_type: TypeAdapter(List[create_model]) for form_type, (create_model, _) in self.MODELS.items()
+        }
+
+    def parse(self, chunks: AsyncIterator[bytes], content_type: str, first_byte: bytes) -> AsyncIterator[RawItem]:
+        if "ndjson" in content_type or "jsonl" in content_type:
+            return iter_ndjson(chunks, self.max_item_bytes)
+        if "json" in content_type or first_byte == b"[":
+            return iter_json_array(chunks, self.max_item_bytes)
+        return iter_ndjson(chunks, self.max_item_bytes)
+
+    async def ingest(self, form_type: str, items: AsyncIterator[RawItem], client_ip: Optional[str],
+                     notify: bool = False) -> BulkResult:
+        result = BulkResult()
+        batch: List[RawItem] = []
+        try:
+            async for item in items:
+                if result.items + len(batch) >= self.max_items:
+                    result.aborted = f"More than {self.max_items} items; the rest were not processed"
+                    break
+                batch.append(item)
+                if len(batch) >= self.batch_size:
+                    await self._process_batch(form_type, batch, client_ip, notify, result)
+                    batch = []
+        except BulkParseError as e:
+            result.aborted = str(e)
+        if batch:
+            await self._process_batch(form_type, batch, client_ip, notify, result)
+        logger.info(f"Bulk {form_type} ingest: {result.summary()}")
+        return result
+
+    def _validate(self, form_type: str, batch: List[RawItem]) -> Tuple[Dict[int, Any], Dict[int, List[Dict[str, Any]]]]:
+        """Validate the whole batch in one call; only batches with bad rows are revalidated without them"""
+        adapter = self._adapters[form_type]
+        errors: Dict[int, List[Dict[str, Any]]] = {}
+        candidates = []
+        for index, raw, parse_error in batch:
+            if parse_error is not None:
+                errors[index] = [{"loc": [], "msg": parse_error}]
+            else:
+                candidates.append((index, raw))
+
+        while candidates:
+            try:
+                validated = adapter.validate_python([raw for _, raw in candidates])
+                return {index: model for (index, _), model in zip(candidates, validated)}, errors
+            except ValidationError as e:
+                failed = set()
+                for error in e.errors(include_url=False, include_context=False, include_input=False):
+                    position, *loc = error["loc"]
+                    index = candidates[position][0]
+                    failed.add(position)
+                    errors.setdefault(index, []).append({"loc": loc, "msg": error["msg"]})
+                candidates = [c for position, c in enumerate(candidates) if position not in failed]
+        return {}, errors
+
+    async def _process_batch(self, form_type: str, batch: List[RawItem], client_ip: Optional[str],
+                             notify: bool, result: BulkResult):
+        valid, errors = self._validate(form_type, batch)
+        _, submission_model = self.MODELS[form_type]
+        outcomes: Dict[int, Tuple[str, Dict[str, Any]]] = {
+            index: (INVALID, {"errors": item_errors}) for index, item_errors in errors.items()
+        }
+
+        # Waitlist rows are deduplicated inside the batch and against the database
+        if form_type == "waitlist":
+            first_by_email: Dict[str, int] = {}
+            for index, model in valid.items():
+                email = normalize_email(model.email)
+                if email in first_by_email:
+                    outcomes[index] = (DUPLICATE, {})
+                else:
+                    first_by_email[email] = index
+            try:
+                existing = await self.database_service.find_existing_waitlist_emails(first_by_email)
+            except Exception as e:
+                logger.error(f"Bulk waitlist dedup query failed: {str(e)}")
+                existing = None
+            for email, index in first_by_email.items():
+                if existing is None:
+                    outcomes[index] = (ERROR, {})
+                elif email in existing:
+                    outcomes[index] = (DUPLICATE, {})
+
+        to_insert: List[Tuple[int, Any, Dict[str, Any]]] = []
+        for index, model in valid.items():
+            if index in outcomes:
+                continue
+            doc = submission_model.from_create(model, ip_address=client_ip).to_document()
+            doc["_id"] = ObjectId()
+            if form_type == "waitlist":
+                doc["email_normalized"] = normalize_email(model.email)
+            to_insert.append((index, model, doc))
+
+        try:
+            failed = await self.database_service.insert_submissions_many(form_type, [doc for _, _, doc in to_insert])
+        except Exception as e:
+            # Only raised before anything was sent (circuit open); a failed or
+            # timed-out write comes back per row as ERROR or UNKNOWN instead.
+            logger.error(f"Bulk {form_type} insert failed: {str(e)}")
+            failed = {position: ERROR for position in range(len(to_insert))}
+
+        deliveries = []
+        for position, (index, model, doc) in enumerate(to_insert):
+            if position in failed:
+                # The id lets the caller look an UNKNOWN row up before resending it.
+                extra = {"submission_id": str(doc["_id"])} if failed[position] == UNKNOWN else {}
+                outcomes[index] = (failed[position], extra)
+                continue
+            submission_id = str(doc["_id"])
+            outcomes[index] = (CREATED, {"submission_id": submission_id})
+            if notify:
+                payload = (self.formspree_service.build_waitlist_payload(doc) if form_type == "waitlist"
+                           else self.formspree_service.build_contact_payload(doc))
+                deliveries.append((submission_id, payload))
+
+        if deliveries:
+            try:
+                await self.outbox_service.enqueue_many(form_type, deliveries)
+            except Exception as e:
+                # Rows stay formspree_status 'pending'; nothing is lost, only not yet notified
+                logger.error(f"Bulk outbox enqueue failed for {len(deliveries)} {form_type} rows: {str(e)}")
+
+        for index, _, _ in batch:
+            status, details = outcomes[index]
+            result.add(index, status, **details)
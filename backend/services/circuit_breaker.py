@@ -0,0 +1,238 @@
+import asyncio
+import functools
+import logging
+import time
+from collections import deque
+from typing import Any, Awaitable, Callable, Deque, Optional, Tuple, Type
+
+logger = logging.getLogger(__name__)
+
+# Breaker states
+CLOSED = "closed"
+OPEN = "open"
+HALF_OPEN = "half_open"
+
+
+class CircuitOpenError(Exception):
+    """Raised instead of calling a dependency whose circuit is open"""
+
+    def __init__(self, name: str, retry_after: float):
+        super().__init__(f"{name} circuit open, retry in {retry_after:.1f}s")
+        self.name = name
+        self.retry_after = retry_after
+
+
+class AdaptiveTimeout:
+    """
+    Timeout derived from recent successful latencies: p99 * multiplier,
+    clamped to [minimum, maximum]. Starts at maximum until enough samples are in.
+    """
+
+    def __init__(self, minimum: float, maximum: float, multiplier: float = 3.0,
+                 samples: int = 200, min_samples: int = 20, recompute_every: int = 20):
+        self.minimum = minimum
+        self.maximum = maximum
+        self.multiplier = multiplier
+        self.min_samples = min_samples
+        self.recompute_every = recompute_every
+        self._latencies: Deque[float] = deque(maxlen=samples)
+        self._since_recompute = 0
+        self.current = maximum
+
+    def observe(self, latency: float):
+        self._latencies.append(latency)
+        self._since_recompute += 1
+        if self._since_recompute >= self.recompute_every and len(self._latencies) >= self.min_samples:
+            self._since_recompute = 0
+            ordered = sorted(self._latencies)
+            p99 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+            self.current = min(self.maximum, max(self.minimum, p99 * self.multiplier))
+
+    @property
+    def p99(self) -> float:
+        if not self._latencies:
+            return 0.0
+        ordered = sorted(self._latencies)
+        return ordered[min(len(ordered) - 1, int(len(ordered) * 0.99))]
+
+
+class BatchTimeout:
+    """
+    Timeout for bulk operations: base plus per_item for each document in the
+    batch, up to maximum. Not fitted to observed latencies: how long a batch
+    takes depends on its size far more than on the server's health.
+    """
+
+    def __init__(self, base: float, per_item: float, maximum: float):
+        self.base = base
+        self.per_item = per_item
+        self.maximum = maximum
+
+    @property
+    def current(self) -> float:
+        return self.base
+
+    def for_size(self, size: int) -> float:
+        return min(self.maximum, self.base + self.per_item * size)
+
+    def observe(self, latency: float):
+        pass
+
+
+class CircuitBreaker:
+    """
+    Count-based sliding-window breaker. Opens when, over the last `window`
+    calls (and at least `min_calls`), the failure rate or the slow-call rate
+    reaches its threshold. While open, calls fail fast; after `open_seconds`
+    (doubling on every failed probe, up to `max_open_seconds`) up to
+    `half_open_calls` probes are let through, and that many successes close it.
+    """
+
+    def __init__(self, name: str, timeout: AdaptiveTimeout, failure_rate: float = 0.5,
+                 slow_rate: float = 0.5, slow_call_seconds: float = 1.0, window: int = 50,
+                 min_calls: int = 10, open_seconds: float = 10.0, max_open_seconds: float = 120.0,
+                 half_open_calls: int = 3, ignored_exceptions: Tuple[Type[BaseException], ...] = ()):
+        self.name = name
+        self.timeout = timeout
+        self.failure_rate = failure_rate
+        self.slow_rate = slow_rate
+        self.slow_call_seconds = slow_call_seconds
+        self.min_calls = min_calls
+        self.open_seconds = open_seconds
+        self.max_open_seconds = max_open_seconds
+        self.half_open_calls = half_open_calls
+        # Exceptions that are answers, not outages (e.g. DuplicateKeyError)
+        self.ignored_exceptions = ignored_exceptions
+
+        self.state = CLOSED
+        self._outcomes: Deque[Tuple[bool, bool]] = deque(maxlen=window)
+        self._failures = 0
+        self._slow = 0
+        self._opened_at = 0.0
+        self._current_open_seconds = open_seconds
+        self._probes_in_flight = 0
+        self._probe_successes = 0
+
+    # -- state -----------------------------------------------------------
+    def retry_after(self) -> float:
+        if self.state != OPEN:
+            return 0.0
+        return max(0.0, self._opened_at + self._current_open_seconds - time.monotonic())
+
+    def allow(self) -> bool:
+        """Whether a call may go ahead now. A True in half-open reserves a probe slot."""
+        if self.state == CLOSED:
+            return True
+        if self.state == OPEN:
+            if self.retry_after() > 0:
+                return False
+            self._transition(HALF_OPEN)
+        if self._probes_in_flight >= self.half_open_calls:
+            return False
+        self._probes_in_flight += 1
+        return True
+
+    def ready(self) -> bool:
+        """Like allow() but without reserving anything; for pollers deciding whether to try"""
+        return self.state != OPEN or self.retry_after() <= 0
+
+    def _transition(self, state: str):
+        if state == self.state:
+            return
+        logger.warning(f"Circuit {self.name}: {self.state} -> {state}")
+        self.state = state
+        if state == OPEN:
+            self._opened_at = time.monotonic()
+        elif state == HALF_OPEN:
+            self._probes_in_flight = 0
+            self._probe_successes = 0
+        elif state == CLOSED:
+            self._outcomes.clear()
+            self._failures = self._slow = 0
+            self._current_open_seconds = self.open_seconds
+
+    def _open(self):
+        self._transition(OPEN)
+
+    # -- outcomes --------------------------------------------------------
+    def record_success(self, latency: float):
+        self.timeout.observe(latency)
+        self._record(True, latency)
+
+    def record_failure(self, latency: float):
+        self._record(False, latency)
+
+    def _record(self, ok: bool, latency: float):
+        slow = latency >= self.slow_call_seconds
+        if self.state == HALF_OPEN:
+            self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            if ok and not slow:
+                self._probe_successes += 1
+                if self._probe_successes >= self.half_open_calls:
+                    self._transition(CLOSED)
+            else:
+                self._current_open_seconds = min(self._current_open_seconds * 2, self.max_open_seconds)
+                self._open()
+            return
+        if self.state == OPEN:
+            return
+
+        if len(self._outcomes) == self._outcomes.maxlen:
+            old_ok, old_slow = self._outcomes[0]
+            self._failures -= not old_ok
+            self._slow -= old_slow
+        self._outcomes.append((ok, slow))
+        self._failures += not ok
+        self._slow += slow
+
+        calls = len(self._outcomes)
+        if calls >= self.min_calls and (
+            self._failures / calls >= self.failure_rate or self._slow / calls >= self.slow_rate
+        ):
+            self._open()
+
+    # -- wrapping --------------------------------------------------------
+    async def call(self, func: Callable[..., Awaitable[Any]], *args, **kwargs):
+        """Run func under the breaker and the adaptive timeout"""
+        return await self.call_with_timeout(self.timeout.current, func, *args, **kwargs)
+
+    async def call_with_timeout(self, timeout: float, func: Callable[..., Awaitable[Any]], *args, **kwargs):
+        if not self.allow():
+            raise CircuitOpenError(self.name, self.retry_after())
+        started = time.perf_counter()
+        try:
+            result = await asyncio.wait_for(func(*args, **kwargs), timeout=timeout)
+        except self.ignored_exceptions:
+            self.record_success(time.perf_counter() - started)
+            raise
+        except asyncio.CancelledError:
+            # Cancelled by our caller: no verdict on the dependency, just free a probe slot
+            if self.state == HALF_OPEN:
+                self._probes_in_flight = max(0, self._probes_in_flight - 1)
+            raise
+        except BaseException:
+            self.record_failure(time.perf_counter() - started)
+            raise
+        self.record_success(time.perf_counter() - started)
+        return result
+
+
+def guarded(attribute: str = "breaker", batch_size: Optional[Callable[..., int]] = None):
+    """
+    Method decorator: route the call through `self.<attribute>` when it is a
+    CircuitBreaker, or call straight through when it is None. With
+    batch_size (called with the method's arguments), the timeout is the
+    breaker's timeout.for_size() for that many documents.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, *args, **kwargs):
+            breaker = getattr(self, attribute, None)
+            if breaker is None:
+                return await func(self, *args, **kwargs)
+            if batch_size is not None:
+                timeout = breaker.timeout.for_size(batch_size(*args, **kwargs))
+                return await breaker.call_with_timeout(timeout, func, self, *args, **kwargs)
+            return await breaker.call(func, self, *args, **kwargs)
+        return wrapper
+    return decorator
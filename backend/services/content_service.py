@@ -0,0 +1,183 @@
+import abc
+import asyncio
+import hashlib
+import logging
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional
+
+from core import fast_json
+from models import Project, Service
+
+logger = logging.getLogger(__name__)
+
+ALL_CATEGORIES = "All"
+
+
+class CachedBody:
+    """Pre-serialized JSON response body with its strong ETag"""
+
+    __slots__ = ("body", "etag")
+
+    def __init__(self, body: bytes):
+        self.body = body
+        self.etag = '"' + hashlib.sha256(body).hexdigest()[:32] + '"'
+
+
+def _encode(items: List[Dict[str, Any]]) -> CachedBody:
+    return CachedBody(fast_json.dumps(items))
+
+
+class ContentSnapshot:
+    """Immutable, fully serialized view of the active services and projects"""
+
+    def __init__(self, version: int, services: List[Service], projects: List[Project]):
+        self.version = version
+        self.services = _encode([s.model_dump(mode="json") for s in services])
+        serialized = [p.model_dump(mode="json") for p in projects]
+        by_category: Dict[str, List[Dict[str, Any]]] = {}
+        for project in serialized:
+            by_category.setdefault(project["category"], []).append(project)
+        self.projects = _encode(serialized)
+        self.projects_by_category = {c: _encode(items) for c, items in by_category.items()}
+        self.categories = sorted(by_category)
+        self.empty = _encode([])
+
+    def projects_for(self, category: Optional[str]) -> CachedBody:
+        if not category or category == ALL_CATEGORIES:
+            return self.projects
+        return self.projects_by_category.get(category, self.empty)
+
+
+class ChangeNotifier(abc.ABC):
+    """Yields the collection name each time content changes somewhere (another worker, an admin tool)"""
+
+    @abc.abstractmethod
+    def changes(self) -> AsyncIterator[str]:
+        ...
+
+    async def notify(self, collection: str):
+        """Called after a write through ContentService; change streams see writes on their own"""
+
+
+class MongoChangeStreamNotifier(ChangeNotifier):
+    """Change streams on the content collections; needs a replica set (Atlas clusters are)"""
+
+    def __init__(self, db, collections=("services", "projects")):
+        self.db = db
+        self.collections = collections
+
+    async def changes(self) -> AsyncIterator[str]:
+        pipeline = [{"$match": {"ns.coll": {"$in": list(self.collections)}}}]
+        async with self.db.watch(pipeline) as stream:
+            async for change in stream:
+                yield change["ns"]["coll"]
+
+
+class ContentService:
+    """
+    Read-through cache for the CMS content. Everything is loaded from Mongo
+    at startup into a ContentSnapshot; reads only ever touch the snapshot.
+    Writes through this service, change notifications and a periodic refresh
+    rebuild it and swap it in under a new version.
+    """
+
+    def __init__(self, db, notifier: Optional[ChangeNotifier] = None, refresh_interval: float = 300.0):
+        self.services_collection = db["services"]
+        self.projects_collection = db["projects"]
+        self.notifier = notifier
+        self.refresh_interval = refresh_interval
+        self.snapshot: Optional[ContentSnapshot] = None
+        self._version = 0
+        self._reload_lock = asyncio.Lock()
+        self._tasks: List[asyncio.Task] = []
+        # Called after every reload, e.g. to drop encoded responses built from the old snapshot
+        self.listeners: List[Callable[[], None]] = []
+
+    async def load(self):
+        async with self._reload_lock:
+            services = await self.services_collection.find({"is_active": True}, {"_id": 0}) \
+                .sort("order", 1).to_list(length=None)
+            projects = await self.projects_collection.find({"is_active": True}, {"_id": 0}) \
+                .sort("order", 1).to_list(length=None)
+            self._version += 1
+            self.snapshot = ContentSnapshot(
+                self._version,
+                [Service(**s) for s in services],
+                [Project(**p) for p in projects],
+            )
+            logger.info(
+                f"Content cache v{self._version} loaded: {len(services)} services, {len(projects)} projects"
+            )
+            for listener in self.listeners:
+                listener()
+
+    async def start(self):
+        self._tasks.append(asyncio.create_task(self._initial_load(), name="content-initial-load"))
+        if self.refresh_interval:
+            self._tasks.append(asyncio.create_task(self._refresh_periodically(), name="content-refresh"))
+        if self.notifier is not None:
+            self._tasks.append(asyncio.create_task(self._follow_changes(), name="content-notifier"))
+
+    async def stop(self):
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks.clear()
+
+    async def _initial_load(self):
+        delay = 1.0
+        while self.snapshot is None:
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Content cache load failed, retrying in {delay:.0f}s: {str(e)}")
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, 60.0)
+
+    async def _refresh_periodically(self):
+        while True:
+            await asyncio.sleep(self.refresh_interval)
+            try:
+                await self.load()
+            except Exception as e:
+                logger.error(f"Content cache refresh failed: {str(e)}")
+
+    async def _follow_changes(self):
+        while True:
+            try:
+                async for collection in self.notifier.changes():
+                    logger.info(f"Content change on {collection}, reloading cache")
+                    await self.load()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Content change notifier failed: {str(e)}")
+                await asyncio.sleep(5.0)
+
+    async def _notify(self, collection: str):
+        if self.notifier is None:
+            return
+        try:
+            await self.notifier.notify(collection)
+        except Exception as e:
+            # Other workers still converge on the next periodic refresh
+            logger.error(f"Content change notification for {collection} failed: {str(e)}")
+
+    # Hot path: never awaits, never touches Mongo
+    def get_services(self) -> Optional[CachedBody]:
+        return self.snapshot.services if self.snapshot else None
+
+    def get_projects(self, category: Optional[str] = None) -> Optional[CachedBody]:
+        return self.snapshot.projects_for(category) if self.snapshot else None
+
+    # Writes invalidate by rebuilding the snapshot
+    async def upsert_service(self, service: Service) -> Service:
+        await self.services_collection.update_one({"id": service.id}, {"$set": service.model_dump()}, upsert=True)
+        await self.load()
+        await self._notify("services")
+        return service
+
+    async def upsert_project(self, project: Project) -> Project:
+        await self.projects_collection.update_one({"id": project.id}, {"$set": project.model_dump()}, upsert=True)
+        await self.load()
+        await self._notify("projects")
+        return project
@@ -1,5 +1,33 @@
+import asyncio
+import base64
+import logging
+from datetime import datetime
 from bson import ObjectId
+from bson.errors import InvalidId
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError, ConnectionFailure, DuplicateKeyError, OperationFailure
+from typing import Any, AsyncIterator, Collection, Dict, List, Optional, Set, Tuple
 from models import ContactSubmission, WaitlistSubmission
+from core import fast_json
+from core.metrics import instrumented
+from services.circuit_breaker import CircuitBreaker, CircuitOpenError, guarded
+from services.email_membership import EmailMembership, DEFINITELY_NEW, KNOWN
+from services.spool import OP_INSERT, OP_STATUS, SubmissionSpool
+from services.stats_service import StatsService
+from services.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+# Errors meaning Mongo could not be reached (as opposed to rejecting the write)
+MONGO_UNAVAILABLE = (CircuitOpenError, ConnectionFailure, asyncio.TimeoutError)
+# What the stats rollups need to know about a submission whose status changes
+STATUS_FIELDS = {"submitted_at": 1, "formspree_status": 1}
+# Every submission is stored with this formspree_status; delivery moves it out of it once
+INITIAL_STATUS = "pending"
+
+def normalize_email(email: str) -> str:
+    """Canonical form used for waitlist dedup (case- and whitespace-insensitive)"""
+    return str(email).strip().lower()
 
 def serialize_doc(doc):
     """Convert MongoDB document to JSON-serializable dict"""
@@ -8,39 +36,485 @@ def serialize_doc(doc):
     doc["_id"] = str(doc["_id"])  # convert ObjectId to string
     return doc
 
+def json_default(value):
+    if isinstance(value, datetime):
+        return value.isoformat()
+    if isinstance(value, ObjectId):
+        return str(value)
+    raise TypeError(f"{type(value).__name__} is not JSON serializable")
+
+def to_json_line(doc) -> bytes:
+    """Encode a raw MongoDB document as one NDJSON line"""
+    return fast_json.dumps(doc, default=json_default) + b"\n"
+
+# Admin listings are ordered newest first; _id breaks ties between equal timestamps
+SUBMISSION_SORT = [("submitted_at", -1), ("_id", -1)]
+
+def encode_cursor(doc) -> str:
+    """Opaque keyset cursor pointing just past `doc` in SUBMISSION_SORT order"""
+    raw = f"{doc['submitted_at'].isoformat()}|{doc['_id']}"
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+def decode_cursor(cursor: str) -> Tuple[datetime, ObjectId]:
+    """Inverse of encode_cursor. Raises ValueError for malformed cursors."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+        submitted_at, object_id = raw.split("|", 1)
+        return datetime.fromisoformat(submitted_at), ObjectId(object_id)
+    except (ValueError, InvalidId, UnicodeDecodeError) as e:
+        raise ValueError(f"Invalid cursor: {cursor}") from e
+
 class DatabaseService:
-    def __init__(self, db):
+    def __init__(self, db, membership: Optional[EmailMembership] = None,
+                 write_behind: Optional[WriteBehindBuffer] = None, breaker: Optional[CircuitBreaker] = None,
+                 spool: Optional[SubmissionSpool] = None, stats: Optional[StatsService] = None,
+                 batch_breaker: Optional[CircuitBreaker] = None):
         self.db = db
         self.contact_collection = db["contact_submissions"]
         self.waitlist_collection = db["waitlist_submissions"]
+        # Optional in-memory front for waitlist dedup (see services/email_membership.py)
+        self.membership = membership
+        # Optional grouping of single-document writes into bulk_write calls (see services/write_behind.py)
+        self.write_behind = write_behind
+        # Optional circuit breaker around request-path reads and writes (see services/circuit_breaker.py)
+        self.breaker = breaker
+        # Separate breaker for bulk reads and writes, with a timeout that grows with the batch,
+        # so a slow 1000-document batch neither times out at point-op latency nor opens self.breaker
+        self.batch_breaker = batch_breaker
+        # Optional local file that keeps submissions while Mongo is unreachable (see services/spool.py)
+        self.spool = spool
+        # Optional rollup counters updated alongside every write (see services/stats_service.py)
+        self.stats = stats
+
+    async def warm_membership(self):
+        """Load every waitlist email into the membership filter. Lookups hit Mongo until this finishes."""
+        if self.membership is None:
+            return
+        cursor = self.waitlist_collection.find({}, {"email_normalized": 1, "_id": 0}).batch_size(10_000)
+        loaded = 0
+        async for doc in cursor:
+            if doc.get("email_normalized"):
+                self.membership.bloom.add(doc["email_normalized"])
+                loaded += 1
+        self.membership.ready = True
+        logger.info(
+            f"Waitlist membership filter warmed with {loaded} emails "
+            f"({self.membership.bloom.memory_bytes // 1024} KiB)"
+        )
+
+    async def ensure_indexes(self):
+        """Create the indexes the form and admin paths rely on. Safe to run on every startup."""
+        # Older documents predate email_normalized; backfill them before the unique index is built
+        await self.waitlist_collection.update_many(
+            {"email_normalized": {"$exists": False}},
+            [{"$set": {"email_normalized": {"$toLower": {"$trim": {"input": "$email"}}}}}],
+        )
+        try:
+            await self.waitlist_collection.create_index(
+                "email_normalized",
+                name="email_normalized_unique",
+                unique=True,
+                partialFilterExpression={"email_normalized": {"$type": "string"}},
+            )
+        except OperationFailure as e:
+            # Most likely pre-existing duplicates; dedup still works, just without the race guarantee
+            logger.error(f"Could not build unique waitlist email index: {str(e)}")
+        await self.waitlist_collection.create_index(SUBMISSION_SORT)
+        # Spool replay upserts on the submission id
+        for collection in (self.waitlist_collection, self.contact_collection):
+            try:
+                await collection.create_index(
+                    "id", name="id_unique", unique=True, partialFilterExpression={"id": {"$type": "string"}}
+                )
+            except OperationFailure as e:
+                logger.error(f"Could not build unique id index on {collection.name}: {str(e)}")
+        await self.contact_collection.create_index(SUBMISSION_SORT)
 
+    @instrumented("mongo")
     async def save_contact_submission(self, submission: ContactSubmission):
-        result = await self.contact_collection.insert_one(submission.dict())
-        return str(result.inserted_id)
+        doc = submission.to_document()
+        return await self._save_submission("contact", self.contact_collection, doc)
 
+    @instrumented("mongo")
     async def save_waitlist_submission(self, submission: WaitlistSubmission):
-        result = await self.waitlist_collection.insert_one(submission.dict())
+        doc = submission.to_document()
+        doc["email_normalized"] = normalize_email(submission.email)
+        return await self._save_submission("waitlist", self.waitlist_collection, doc)
+
+    async def _save_submission(self, form_type: str, collection, doc: Dict[str, Any]) -> str:
+        if self.write_behind or self.spool:
+            # Client-side _id, so the id handed back stays valid if the document is spooled
+            doc["_id"] = ObjectId()
+        try:
+            submission_id = await self._insert(collection, doc)
+        except MONGO_UNAVAILABLE as e:
+            # Counted when the spool is replayed
+            await self._spool_or_raise({"op": OP_INSERT, "form_type": form_type, "doc": doc}, e)
+            return str(doc["_id"])
+        if self.stats:
+            await self.stats.record_submissions(form_type, [doc])
+        return submission_id
+
+    @guarded()
+    async def _insert(self, collection, doc: Dict[str, Any]) -> str:
+        if self.write_behind:
+            return str(await self.write_behind.insert(collection, doc))
+        result = await collection.insert_one(doc)
         return str(result.inserted_id)
 
+    async def _spool_or_raise(self, record: Dict[str, Any], error: Exception):
+        """Mongo is unreachable: keep the write in the local spool, or re-raise without one"""
+        if self.spool is None:
+            raise error
+        logger.warning(f"Mongo unavailable ({type(error).__name__}), spooling {record['form_type']} {record['op']}")
+        await self.spool.append(record)
+
+    @instrumented("mongo")
+    async def save_waitlist_submission_if_new(self, submission: WaitlistSubmission) -> Tuple[Optional[str], bool]:
+        """
+        Insert the submission unless its email is already on the waitlist, in
+        one round-trip. Returns (submission_id, created); submission_id is None
+        when the email already existed.
+        """
+        doc = submission.to_document()
+        email = doc["email_normalized"] = normalize_email(submission.email)
+        verdict = self.membership.lookup(email) if self.membership else None
+        if verdict == KNOWN:
+            return None, False
+        if self.spool:
+            doc["_id"] = ObjectId()
+
+        try:
+            submission_id = await self._insert_waitlist_if_new(doc, email, verdict)
+        except DuplicateKeyError:
+            # A concurrent signup with the same email won the race
+            submission_id = None
+        except MONGO_UNAVAILABLE as e:
+            # Dedup happens at replay: the upsert on id hits the unique email index
+            await self._spool_or_raise({"op": OP_INSERT, "form_type": "waitlist", "doc": doc}, e)
+            submission_id = str(doc["_id"])
+        else:
+            if submission_id is not None and self.stats:
+                await self.stats.record_submissions("waitlist", [doc])
+
+        if self.membership:
+            self.membership.add(email)
+        return submission_id, submission_id is not None
+
+    @guarded()
+    async def _insert_waitlist_if_new(self, doc: Dict[str, Any], email: str, verdict) -> Optional[str]:
+        if self.write_behind:
+            # Always waited for, whatever the durability mode: the caller needs to know if it was new
+            if verdict == DEFINITELY_NEW:
+                doc.setdefault("_id", ObjectId())
+                return str(await self.write_behind.insert(self.waitlist_collection, doc, wait=True))
+            upserted_id = await self.write_behind.update(
+                self.waitlist_collection, {"email_normalized": email}, {"$setOnInsert": doc},
+                upsert=True, wait=True,
+            )
+            return str(upserted_id) if upserted_id is not None else None
+        if verdict == DEFINITELY_NEW:
+            # Plain insert; the unique index still catches emails added by other workers
+            result = await self.waitlist_collection.insert_one(doc)
+            return str(result.inserted_id)
+        result = await self.waitlist_collection.update_one(
+            {"email_normalized": email},
+            {"$setOnInsert": doc},
+            upsert=True,
+        )
+        return str(result.upserted_id) if result.upserted_id is not None else None
+
+    @instrumented("mongo")
+    @guarded("batch_breaker", batch_size=len)
+    async def find_existing_waitlist_emails(self, emails: Collection[str]) -> Set[str]:
+        """Which of these normalized emails are already on the waitlist, in one $in query"""
+        emails = list(emails)
+        if not emails:
+            return set()
+        cursor = self.waitlist_collection.find(
+            {"email_normalized": {"$in": emails}}, {"email_normalized": 1, "_id": 0}
+        )
+        return {doc["email_normalized"] async for doc in cursor}
+
+    @instrumented("mongo")
+    async def insert_submissions_many(self, form_type: str, docs: List[Dict[str, Any]]) -> Dict[int, str]:
+        """
+        Unordered insert_many of prepared documents, which must already carry
+        their _id. Returns {index: 'duplicate' | 'error' | 'unknown'} for the
+        rows not known to be written; every other row was. An insert that
+        fails without per-row errors (a timeout, a dropped connection) may
+        still have committed some rows, so they are looked up by _id; rows
+        that lookup cannot settle either are 'unknown'. Raises
+        CircuitOpenError when nothing was attempted.
+        """
+        if not docs:
+            return {}
+        try:
+            failed = await self._insert_many(form_type, docs)
+        except CircuitOpenError:
+            raise
+        except Exception as e:
+            logger.warning(f"insert_many of {len(docs)} {form_type} rows failed ({type(e).__name__}), "
+                           f"checking which were written")
+            failed = await self._unwritten(form_type, docs)
+        if self.stats:
+            await self.stats.record_submissions(form_type, (doc for i, doc in enumerate(docs) if i not in failed))
+        return failed
+
+    @guarded("batch_breaker", batch_size=lambda form_type, docs: len(docs))
+    async def _insert_many(self, form_type: str, docs: List[Dict[str, Any]]) -> Dict[int, str]:
+        failed: Dict[int, str] = {}
+        try:
+            await self._collection_for(form_type).insert_many(docs, ordered=False)
+        except BulkWriteError as e:
+            for error in e.details.get("writeErrors", []):
+                failed[error["index"]] = "duplicate" if error.get("code") == 11000 else "error"
+        if self.membership and form_type == "waitlist":
+            for index, doc in enumerate(docs):
+                if index not in failed:
+                    self.membership.add(doc["email_normalized"])
+        return failed
+
+    async def _unwritten(self, form_type: str, docs: List[Dict[str, Any]]) -> Dict[int, str]:
+        try:
+            stored = await self._existing_ids(form_type, [doc["_id"] for doc in docs])
+        except Exception as e:
+            logger.error(f"Could not check which {form_type} rows were written: {str(e)}")
+            return {index: "unknown" for index in range(len(docs))}
+        if self.membership and form_type == "waitlist":
+            for doc in docs:
+                if doc["_id"] in stored:
+                    self.membership.add(doc["email_normalized"])
+        return {index: "error" for index, doc in enumerate(docs) if doc["_id"] not in stored}
+
+    @guarded("batch_breaker", batch_size=lambda form_type, ids: len(ids))
+    async def _existing_ids(self, form_type: str, ids: List[ObjectId]) -> Set[ObjectId]:
+        cursor = self._collection_for(form_type).find({"_id": {"$in": ids}}, {"_id": 1})
+        return {doc["_id"] async for doc in cursor}
+
+    def _collection_for(self, form_type: str):
+        if form_type == "contact":
+            return self.contact_collection
+        if form_type == "waitlist":
+            return self.waitlist_collection
+        raise ValueError(f"Unknown form type: {form_type}")
+
+    @staticmethod
+    def _keyset_query(after: Optional[str], extra: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+        query = dict(extra or {})
+        if after:
+            submitted_at, object_id = decode_cursor(after)
+            query["$or"] = [
+                {"submitted_at": {"$lt": submitted_at}},
+                {"submitted_at": submitted_at, "_id": {"$lt": object_id}},
+            ]
+        return query
+
+    @staticmethod
+    def _projection(fields: Optional[List[str]]) -> Optional[Dict[str, int]]:
+        if not fields:
+            return None
+        # The sort keys are always returned so the next cursor can be built
+        projection = {f: 1 for f in fields}
+        projection["submitted_at"] = 1
+        return projection
+
+    @instrumented("mongo")
+    async def get_submissions_page(self, form_type: str, limit: int = 50, after: Optional[str] = None,
+                                   fields: Optional[List[str]] = None) -> Tuple[List[Dict[str, Any]], Optional[str]]:
+        """
+        One page of submissions, newest first. Returns (docs, next_cursor);
+        next_cursor is None on the last page.
+        """
+        collection = self._collection_for(form_type)
+        cursor = collection.find(self._keyset_query(after), self._projection(fields)) \
+            .sort(SUBMISSION_SORT).limit(limit + 1)
+        docs = await cursor.to_list(length=limit + 1)
+        next_cursor = encode_cursor(docs[limit - 1]) if len(docs) > limit else None
+        return [serialize_doc(d) for d in docs[:limit]], next_cursor
+
+    async def iter_submissions(self, form_type: str, after: Optional[str] = None,
+                               fields: Optional[List[str]] = None, limit: Optional[int] = None,
+                               batch_size: int = 1000, submitted_from: Optional[datetime] = None,
+                               submitted_to: Optional[datetime] = None) -> AsyncIterator[Dict[str, Any]]:
+        """
+        Stream raw submission documents from the Motor cursor, newest first, in
+        constant memory. submitted_from is inclusive, submitted_to exclusive.
+        """
+        collection = self._collection_for(form_type)
+        date_range = {}
+        if submitted_from:
+            date_range["$gte"] = submitted_from
+        if submitted_to:
+            date_range["$lt"] = submitted_to
+        extra = {"submitted_at": date_range} if date_range else None
+        cursor = collection.find(self._keyset_query(after, extra), self._projection(fields)) \
+            .sort(SUBMISSION_SORT).batch_size(batch_size)
+        if limit:
+            cursor = cursor.limit(limit)
+        async for doc in cursor:
+            yield doc
+
     async def get_contact_submissions(self, limit: int = 50):
-        cursor = self.contact_collection.find().sort("submitted_at", -1).limit(limit)
-        docs = await cursor.to_list(length=limit)
-        return [serialize_doc(d) for d in docs]   # ✅ serialize ObjectId
+        docs, _ = await self.get_submissions_page("contact", limit=limit)
+        return docs
 
     async def get_waitlist_submissions(self, limit: int = 50):
-        cursor = self.waitlist_collection.find().sort("submitted_at", -1).limit(limit)
-        docs = await cursor.to_list(length=limit)
-        return [serialize_doc(d) for d in docs]   # ✅ serialize ObjectId
+        docs, _ = await self.get_submissions_page("waitlist", limit=limit)
+        return docs
 
+    @instrumented("mongo")
+    @guarded()
     async def check_email_exists(self, email: str, collection: str):
         if collection == "waitlist":
-            return await self.waitlist_collection.find_one({"email": email}) is not None
+            email = normalize_email(email)
+            verdict = self.membership.lookup(email) if self.membership else None
+            if verdict == KNOWN:
+                return True
+            if verdict == DEFINITELY_NEW:
+                return False
+            exists = await self.waitlist_collection.find_one({"email_normalized": email}, {"_id": 1}) is not None
+            if exists and self.membership:
+                self.membership.add(email)
+            return exists
         elif collection == "contact":
             return await self.contact_collection.find_one({"email": email}) is not None
         return False
 
-    async def update_contact_formspree_status(self, submission_id: str, status: str):
-        await self.contact_collection.update_one({"_id": ObjectId(submission_id)}, {"$set": {"formspree_status": status}})
+    async def _update_formspree_status(self, form_type: str, submission_id: str, status: str,
+                                       submitted_at: Optional[datetime] = None):
+        # Knowing when the submission was made, the rollup change is pending -> status: no read-back needed
+        read_back = self.stats is not None and submitted_at is None
+        try:
+            before = await self._set_formspree_status(
+                self._collection_for(form_type), ObjectId(submission_id), status, read_back
+            )
+        except MONGO_UNAVAILABLE as e:
+            record = {"op": OP_STATUS, "form_type": form_type, "submission_id": submission_id, "status": status}
+            await self._spool_or_raise(record, e)
+            return
+        if before is not None:
+            await self._record_status_changes(form_type, [before], status)
+        elif self.stats and not read_back:
+            await self.stats.record_status_changes(form_type, [(submitted_at, INITIAL_STATUS, status)])
+
+    @guarded()
+    async def _set_formspree_status(self, collection, object_id: ObjectId, status: str,
+                                    read_back: bool = False) -> Optional[Dict[str, Any]]:
+        """With read_back, returns the submission as it was before a real change (None if unchanged)"""
+        query, update = {"_id": object_id}, {"$set": {"formspree_status": status}}
+        if read_back:
+            # The rollups need the status being replaced, so this can't be a blind (write-behind) update
+            return await collection.find_one_and_update(
+                {**query, "formspree_status": {"$ne": status}}, update, projection=STATUS_FIELDS
+            )
+        if self.write_behind:
+            await self.write_behind.update(collection, query, update)
+        else:
+            await collection.update_one(query, update)
+        return None
+
+    async def _write_status_many(self, collection, object_ids: List[ObjectId], status: str) -> List[Dict[str, Any]]:
+        """update_many of formspree_status; with stats on, returns the changed submissions as they were before"""
+        query, update = {"_id": {"$in": object_ids}}, {"$set": {"formspree_status": status}}
+        if not self.stats:
+            await collection.update_many(query, update)
+            return []
+        query["formspree_status"] = {"$ne": status}
+        before = await collection.find(query, STATUS_FIELDS).to_list(length=None)
+        if before:
+            query["_id"] = {"$in": [doc["_id"] for doc in before]}
+            await collection.update_many(query, update)
+        return before
+
+    async def _record_status_changes(self, form_type: str, before: List[Dict[str, Any]], status: str):
+        await self.stats.record_status_changes(
+            form_type, [(doc.get("submitted_at"), doc.get("formspree_status"), status) for doc in before]
+        )
+
+    @instrumented("mongo")
+    async def update_contact_formspree_status(self, submission_id: str, status: str,
+                                              submitted_at: Optional[datetime] = None):
+        """
+        Pass submitted_at for the first status change after the submission was
+        stored: with stats on, the rollups are then updated without reading
+        the submission back, and both writes can go through write-behind.
+        """
+        await self._update_formspree_status("contact", submission_id, status, submitted_at)
+
+    @instrumented("mongo")
+    async def update_waitlist_formspree_status(self, submission_id: str, status: str,
+                                               submitted_at: Optional[datetime] = None):
+        await self._update_formspree_status("waitlist", submission_id, status, submitted_at)
+
+    @instrumented("mongo")
+    async def update_formspree_status_many(self, form_type: str, submission_ids: List[str], status: str):
+        """Set formspree_status on many submissions with a single update_many"""
+        object_ids = [ObjectId(i) for i in submission_ids if i]
+        if not object_ids:
+            return
+        before = await self._set_formspree_status_many(form_type, object_ids, status)
+        if before:
+            await self._record_status_changes(form_type, before, status)
+
+    @guarded("batch_breaker", batch_size=lambda form_type, object_ids, status: len(object_ids))
+    async def _set_formspree_status_many(self, form_type: str, object_ids: List[ObjectId], status: str):
+        collection = self.contact_collection if form_type == "contact" else self.waitlist_collection
+        return await self._write_status_many(collection, object_ids, status)
+
+    @instrumented("mongo")
+    async def apply_spooled(self, records: List[Dict[str, Any]]) -> int:
+        """
+        Write records replayed from the local spool. Inserts are upserts keyed
+        on the submission id, so a record replayed twice is stored once; a
+        waitlist row whose email was added meanwhile is dropped as a duplicate.
+        Returns the number of such duplicates.
+        """
+        duplicates, inserted, changed = await self._apply_spooled(records)
+        if self.stats:
+            for form_type, docs in inserted.items():
+                await self.stats.record_submissions(form_type, docs)
+            for (form_type, status), before in changed.items():
+                await self._record_status_changes(form_type, before, status)
+        return duplicates
+
+    @guarded("batch_breaker", batch_size=len)
+    async def _apply_spooled(self, records: List[Dict[str, Any]]):
+        """(duplicates, inserted docs by form type, pre-change docs by (form type, status))"""
+        inserts: Dict[str, List[Dict[str, Any]]] = {}
+        statuses: Dict[Tuple[str, str], List[ObjectId]] = {}
+        for record in records:
+            if record["op"] == OP_INSERT:
+                inserts.setdefault(record["form_type"], []).append(record["doc"])
+            elif record["op"] == OP_STATUS:
+                statuses.setdefault((record["form_type"], record["status"]), []).append(
+                    ObjectId(record["submission_id"])
+                )
+
+        duplicates = 0
+        inserted: Dict[str, List[Dict[str, Any]]] = {}
+        for form_type, docs in inserts.items():
+            operations = [UpdateOne({"id": doc["id"]}, {"$setOnInsert": doc}, upsert=True) for doc in docs]
+            try:
+                result = await self._collection_for(form_type).bulk_write(operations, ordered=False)
+                upserted = result.upserted_ids
+            except BulkWriteError as e:
+                errors = e.details.get("writeErrors", [])
+                if any(error.get("code") != 11000 for error in errors):
+                    raise
+                duplicates += len(errors)
+                upserted = {u["index"]: u["_id"] for u in e.details.get("upserted", [])}
+            # A record replayed twice matches its earlier upsert and is not counted again
+            inserted[form_type] = [docs[index] for index in upserted]
+        # Inserts first: a status update always follows the insert it refers to
+        changed: Dict[Tuple[str, str], List[Dict[str, Any]]] = {}
+        for (form_type, status), object_ids in statuses.items():
+            changed[(form_type, status)] = await self._write_status_many(
+                self._collection_for(form_type), object_ids, status
+            )
 
-    async def update_waitlist_formspree_status(self, submission_id: str, status: str):
-        await self.waitlist_collection.update_one({"_id": ObjectId(submission_id)}, {"$set": {"formspree_status": status}})
+        if self.membership:
+            for record in records:
+                if record["op"] == OP_INSERT and record["form_type"] == "waitlist":
+                    self.membership.add(record["doc"]["email_normalized"])
+        return duplicates, inserted, changed
@@ -0,0 +1,127 @@
+import hashlib
+import logging
+import math
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+logger = logging.getLogger(__name__)
+
+# Membership verdicts
+DEFINITELY_NEW = "new"
+KNOWN = "known"
+MAYBE = "maybe"
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter over strings using double hashing on a blake2b digest"""
+
+    def __init__(self, capacity: int, fp_rate: float, max_bytes: Optional[int] = None):
+        if capacity <= 0 or not 0 < fp_rate < 1:
+            raise ValueError("capacity must be positive and fp_rate within (0, 1)")
+        bits = math.ceil(-capacity * math.log(fp_rate) / (math.log(2) ** 2))
+        if max_bytes:
+            bits = min(bits, max_bytes * 8)
+        self.size = max(bits, 8)
+        self.hash_count = max(1, round(self.size / capacity * math.log(2)))
+        self.capacity = capacity
+        self.count = 0
+        self._bits = bytearray((self.size + 7) // 8)
+
+    def _positions(self, item: str):
+        digest = hashlib.blake2b(item.encode(), digest_size=16).digest()
+        h1 = int.from_bytes(digest[:8], "little")
+        h2 = int.from_bytes(digest[8:], "little") | 1
+        for i in range(self.hash_count):
+            yield (h1 + i * h2) % self.size
+
+    def add(self, item: str):
+        for pos in self._positions(item):
+            self._bits[pos >> 3] |= 1 << (pos & 7)
+        self.count += 1
+
+    def __contains__(self, item: str) -> bool:
+        return all(self._bits[pos >> 3] & (1 << (pos & 7)) for pos in self._positions(item))
+
+    @property
+    def memory_bytes(self) -> int:
+        return len(self._bits)
+
+    @property
+    def expected_fp_rate(self) -> float:
+        """False-positive rate at the current fill level"""
+        return (1 - math.exp(-self.hash_count * self.count / self.size)) ** self.hash_count
+
+
+class RecentPositives:
+    """Bounded LRU of emails recently confirmed to exist, with a TTL per entry"""
+
+    def __init__(self, max_size: int = 10_000, ttl_seconds: float = 3600):
+        self.max_size = max_size
+        self.ttl_seconds = ttl_seconds
+        self._entries: "OrderedDict[str, float]" = OrderedDict()
+
+    def add(self, email: str):
+        self._entries[email] = time.monotonic() + self.ttl_seconds
+        self._entries.move_to_end(email)
+        while len(self._entries) > self.max_size:
+            self._entries.popitem(last=False)
+
+    def __contains__(self, email: str) -> bool:
+        expires = self._entries.get(email)
+        if expires is None:
+            return False
+        if expires < time.monotonic():
+            del self._entries[email]
+            return False
+        self._entries.move_to_end(email)
+        return True
+
+
+class EmailMembership:
+    """
+    In-process membership layer for waitlist emails.
+
+    Verdicts are advisory per worker: a negative from the Bloom filter only
+    covers emails this process has seen (warm-up plus its own writes), so
+    another worker may have inserted the email since. Writes therefore still
+    go through the unique index, which stays authoritative; the layer only
+    saves the read round-trip and short-circuits repeat signups.
+    """
+
+    def __init__(self, capacity: int = 1_000_000, fp_rate: float = 0.001,
+                 max_bytes: Optional[int] = 8 * 1024 * 1024,
+                 lru_size: int = 10_000, lru_ttl: float = 3600):
+        self.bloom = BloomFilter(capacity, fp_rate, max_bytes)
+        self.recent = RecentPositives(lru_size, lru_ttl)
+        self.fp_rate = fp_rate
+        self.ready = False
+        self._saturation_logged = False
+
+    @property
+    def saturated(self) -> bool:
+        return self.bloom.expected_fp_rate > self.fp_rate * 10
+
+    def lookup(self, email: str) -> str:
+        if email in self.recent:
+            return KNOWN
+        if not self.ready:
+            return MAYBE
+        if self.saturated:
+            if not self._saturation_logged:
+                logger.warning(
+                    f"Waitlist Bloom filter saturated ({self.bloom.count} items, capacity {self.bloom.capacity}); "
+                    "falling back to the database for every lookup"
+                )
+                self._saturation_logged = True
+            return MAYBE
+        return MAYBE if email in self.bloom else DEFINITELY_NEW
+
+    def add(self, email: str):
+        """Record an email that now exists in the database"""
+        self.bloom.add(email)
+        self.recent.add(email)
+
+    def warm(self, emails: Iterable[str]):
+        for email in emails:
+            self.bloom.add(email)
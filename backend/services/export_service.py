@@ -0,0 +1,117 @@
+import csv
+import io
+import json
+from datetime import datetime
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from services.database_service_fixed import DatabaseService, json_default
+
+EXPORT_FORMATS = ("ndjson", "csv", "columnar")
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv; charset=utf-8",
+    "columnar": "application/x-ndjson",
+}
+
+# Fields exported when the caller does not ask for specific ones (IP addresses are opt-in)
+DEFAULT_FIELDS = {
+    "contact": ["id", "name", "email", "company", "project_type", "budget", "message",
+                "submitted_at", "formspree_status"],
+    "waitlist": ["id", "name", "email", "interests", "submitted_at", "formspree_status"],
+}
+
+# Output is flushed in chunks of about this size rather than per row
+FLUSH_BYTES = 64 * 1024
+
+
+def _csv_value(value: Any) -> Any:
+    if value is None:
+        return ""
+    if isinstance(value, datetime):
+        return value.isoformat()
+    return value
+
+
+class ExportService:
+    """
+    Streams whole submission collections out of Mongo in NDJSON, CSV or a
+    compact columnar encoding. Memory is bounded by the cursor batch and
+    one output chunk (or one row group for columnar), never by collection size.
+    """
+
+    def __init__(self, database_service: DatabaseService, row_group_size: int = 5000):
+        self.database = database_service
+        self.row_group_size = row_group_size
+
+    def export(self, form_type: str, format: str, fields: Optional[List[str]] = None,
+               submitted_from: Optional[datetime] = None, submitted_to: Optional[datetime] = None,
+               batch_size: int = 2000) -> AsyncIterator[bytes]:
+        if format not in EXPORT_FORMATS:
+            raise ValueError(f"Unsupported export format: {format}")
+        fields = fields or DEFAULT_FIELDS[form_type]
+        docs = self.database.iter_submissions(
+            form_type,
+            fields=fields,
+            batch_size=batch_size,
+            submitted_from=submitted_from,
+            submitted_to=submitted_to,
+        )
+        return self.encode(docs, format, fields)
+
+    def encode(self, docs: AsyncIterator[Dict[str, Any]], format: str, fields: List[str]) -> AsyncIterator[bytes]:
+        if format == "ndjson":
+            return self._encode_ndjson(docs, fields)
+        if format == "csv":
+            return self._encode_csv(docs, fields)
+        return self._encode_columnar(docs, fields)
+
+    async def _encode_ndjson(self, docs, fields):
+        dumps = json.JSONEncoder(default=json_default, separators=(",", ":")).encode
+        buffer: List[str] = []
+        size = 0
+        async for doc in docs:
+            line = dumps({f: doc.get(f) for f in fields})
+            buffer.append(line)
+            size += len(line) + 1
+            if size >= FLUSH_BYTES:
+                yield ("\n".join(buffer) + "\n").encode()
+                buffer.clear()
+                size = 0
+        if buffer:
+            yield ("\n".join(buffer) + "\n").encode()
+
+    async def _encode_csv(self, docs, fields):
+        out = io.StringIO()
+        writer = csv.writer(out)
+        writer.writerow(fields)
+        async for doc in docs:
+            writer.writerow([_csv_value(doc.get(f)) for f in fields])
+            if out.tell() >= FLUSH_BYTES:
+                yield out.getvalue().encode()
+                out.seek(0)
+                out.truncate()
+        if out.tell():
+            yield out.getvalue().encode()
+
+    async def _encode_columnar(self, docs, fields):
+        """
+        Row groups of row_group_size rows, one JSON object per line:
+        {"row_group": n, "rows": k, "columns": {"field": [v1, ..., vk], ...}}.
+        Field names appear once per group instead of once per row.
+        """
+        dumps = json.JSONEncoder(default=json_default, separators=(",", ":")).encode
+        columns: Dict[str, List[Any]] = {f: [] for f in fields}
+        rows = 0
+        group = 0
+        async for doc in docs:
+            for f in fields:
+                columns[f].append(doc.get(f))
+            rows += 1
+            if rows == self.row_group_size:
+                yield (dumps({"row_group": group, "rows": rows, "columns": columns}) + "\n").encode()
+                columns = {f: [] for f in fields}
+                rows = 0
+                group += 1
+        if rows:
+            yield (dumps({"row_group": group, "rows": rows, "columns": columns}) + "\n").encode()
@@ -1,35 +1,99 @@
-import requests
+import httpx
 import asyncio
 import logging
-from typing import Dict, Any
+import time
+from typing import Dict, Any, List, Optional
+
+from core.metrics import instrumented
+from services.circuit_breaker import CircuitBreaker
 
 logger = logging.getLogger(__name__)
 
+try:
+    import h2  # noqa: F401  (enables HTTP/2 in httpx)
+    HTTP2_AVAILABLE = True
+except ImportError:
+    HTTP2_AVAILABLE = False
+
 class FormspreeService:
-    def __init__(self, endpoint_url: str):
+    DEFAULT_TIMEOUT = 10.0  # seconds
+
+    def __init__(self, endpoint_url: str, max_connections: int = 20, max_concurrency: int = 50,
+                 batch_size: int = 1, batch_window: float = 0.0, breaker: Optional[CircuitBreaker] = None):
         self.endpoint_url = endpoint_url
-        self.timeout = 10  # seconds
+        self.timeout = self.DEFAULT_TIMEOUT  # upper bound; the breaker's adaptive timeout is usually lower
+        # Optional circuit breaker: fails fast while Formspree is down or slow
+        self.breaker = breaker
+        self.max_connections = max_connections
+        self.max_concurrency = max_concurrency
+        # Batching mode: batch_size > 1 coalesces up to batch_size submissions
+        # collected over batch_window seconds into one digest post
+        self.batch_size = max(1, batch_size)
+        self.batch_window = batch_window
+        self._client: Optional[httpx.AsyncClient] = None
+        # Bounds in-flight requests so a burst queues here instead of piling onto the pool
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def start(self):
+        """Create the shared keep-alive client. Called once at startup."""
+        if self._client is not None:
+            return
+        self._client = httpx.AsyncClient(
+            http2=HTTP2_AVAILABLE,
+            timeout=httpx.Timeout(self.timeout, connect=5.0),
+            limits=httpx.Limits(
+                max_connections=self.max_connections,
+                max_keepalive_connections=self.max_connections,
+                keepalive_expiry=60.0,
+            ),
+            headers={
+                'Content-Type': 'application/json',
+                'Accept': 'application/json'
+            },
+        )
+        logger.info(f"Formspree HTTP client started (http2={HTTP2_AVAILABLE}, pool={self.max_connections})")
+
+    async def close(self):
+        if self._client is None:
+            return
+        await self._client.aclose()
+        self._client = None
 
+    @instrumented("formspree")
     async def submit_form(self, form_data: Dict[str, Any]) -> Dict[str, Any]:
         """
         Submit form data to Formspree endpoint
         """
+        if self._client is None:
+            await self.start()
+        breaker = self.breaker
+        if breaker is not None and not breaker.allow():
+            return {
+                "success": False,
+                "circuit_open": True,
+                "error": f"Circuit open, retry in {breaker.retry_after():.0f}s"
+            }
+        started = None
         try:
-            # Run the synchronous request in a thread pool
-            loop = asyncio.get_event_loop()
-            response = await loop.run_in_executor(
-                None, 
-                lambda: requests.post(
-                    self.endpoint_url,
-                    json=form_data,
-                    headers={
-                        'Content-Type': 'application/json',
-                        'Accept': 'application/json'
-                    },
-                    timeout=self.timeout
-                )
-            )
-            
+            async with self._semaphore:
+                started = time.perf_counter()
+                if breaker is not None:
+                    timeout = breaker.timeout.current
+                    response = await self._client.post(
+                        self.endpoint_url, json=form_data, timeout=httpx.Timeout(timeout, connect=min(5.0, timeout))
+                    )
+                else:
+                    response = await self._client.post(self.endpoint_url, json=form_data)
+
+            if breaker is not None:
+                # 429 and 5xx mean Formspree is struggling; other statuses are answers
+                latency = time.perf_counter() - started
+                if response.status_code == 429 or response.status_code >= 500:
+                    breaker.record_failure(latency)
+                else:
+                    breaker.record_success(latency)
+                started = None  # already recorded
+
             if response.status_code == 200:
                 logger.info(f"Formspree submission successful for email: {form_data.get('email', 'unknown')}")
                 return {
@@ -44,32 +108,34 @@ class FormspreeService:
                     "status_code": response.status_code,
                     "error": response.text
                 }
-                
-        except requests.exceptions.Timeout:
+
+        except httpx.TimeoutException:
+            self._record_transport_failure(started)
             logger.error("Formspree request timed out")
             return {
                 "success": False,
                 "error": "Request timed out"
             }
-        except requests.exceptions.ConnectionError:
+        except httpx.TransportError:
+            self._record_transport_failure(started)
             logger.error("Formspree connection error")
             return {
                 "success": False,
                 "error": "Connection error"
             }
         except Exception as e:
+            self._record_transport_failure(started)
             logger.error(f"Unexpected error submitting to Formspree: {str(e)}")
             return {
                 "success": False,
                 "error": f"Unexpected error: {str(e)}"
             }
 
-    async def submit_contact_form(self, contact_data: Dict[str, Any]) -> Dict[str, Any]:
+    def build_contact_payload(self, contact_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Submit contact form data to Formspree
+        Format contact form data for Formspree
         """
-        # Format data for Formspree
-        formspree_data = {
+        return {
             "name": contact_data.get("name"),
             "email": contact_data.get("email"),
             "company": contact_data.get("company", ""),
@@ -79,20 +145,61 @@ class FormspreeService:
             "form_type": "Contact Form",
             "_subject": f"New Contact Form Submission from {contact_data.get('name')}"
         }
-        
-        return await self.submit_form(formspree_data)
 
-    async def submit_waitlist_form(self, waitlist_data: Dict[str, Any]) -> Dict[str, Any]:
+    def build_waitlist_payload(self, waitlist_data: Dict[str, Any]) -> Dict[str, Any]:
         """
-        Submit waitlist form data to Formspree
+        Format waitlist form data for Formspree
         """
-        # Format data for Formspree
-        formspree_data = {
+        return {
             "name": waitlist_data.get("name"),
             "email": waitlist_data.get("email"),
             "interests": waitlist_data.get("interests", ""),
             "form_type": "AI Waitlist",
             "_subject": f"New AI Waitlist Signup from {waitlist_data.get('name')}"
         }
-        
-        return await self.submit_form(formspree_data)
\ No newline at end of file
+
+    async def submit_contact_form(self, contact_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Submit contact form data to Formspree
+        """
+        return await self.submit_form(self.build_contact_payload(contact_data))
+
+    async def submit_waitlist_form(self, waitlist_data: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Submit waitlist form data to Formspree
+        """
+        return await self.submit_form(self.build_waitlist_payload(waitlist_data))
+
+    def _record_transport_failure(self, started: Optional[float]):
+        if self.breaker is not None and started is not None:
+            self.breaker.record_failure(time.perf_counter() - started)
+
+    @property
+    def batching_enabled(self) -> bool:
+        return self.batch_size > 1
+
+    def build_digest_payload(self, form_type: str, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Combine several formatted submissions into one Formspree digest
+        """
+        label = "Contact Form" if form_type == "contact" else "AI Waitlist"
+        submissions = [{k: v for k, v in p.items() if k != "_subject"} for p in payloads]
+        lines = [
+            f"{i}. {p.get('name')} <{p.get('email')}>"
+            for i, p in enumerate(submissions, start=1)
+        ]
+        return {
+            "form_type": f"{label} Digest",
+            "_subject": f"{len(submissions)} new {label} submissions",
+            "count": len(submissions),
+            "message": "\n".join(lines),
+            "submissions": submissions,
+        }
+
+    async def submit_batch(self, form_type: str, payloads: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """
+        Submit a batch of formatted submissions as a single digest post
+        """
+        if len(payloads) == 1:
+            return await self.submit_form(payloads[0])
+        return await self.submit_form(self.build_digest_payload(form_type, payloads))
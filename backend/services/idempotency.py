@@ -0,0 +1,255 @@
+"""
+Idempotent form submissions, so a client retrying on a flaky network gets
+the original response back instead of a second submission and a second
+Formspree email.
+
+The key comes from the Idempotency-Key header. Two tiers back it:
+
+  - in process: an LRU of completed responses, plus the futures of requests
+    still running, so a replay or a concurrent duplicate that lands on the
+    same worker never leaves the process;
+  - Mongo (idempotency_keys): the key is claimed with an insert on _id
+    before any work. A duplicate on another worker sees the claim: 409
+    while the first request runs, the stored response once it is done. A
+    TTL index on expires_at removes old keys.
+
+If Mongo is unreachable only the in-process tier applies; the submission
+itself still reaches the spool.
+
+A keyed request costs two extra Mongo round trips (the claim and the stored
+response), about 2x the Mongo latency per submission. Requests without a
+key fall back to a hash of the normalized payload, but only to join an
+identical request still in flight on this worker (a double click): they add
+no Mongo round trips. Nothing is remembered for them once they finish, so a
+repeated signup gets its own answer ("already on the waitlist"), not a
+replay of the first.
+"""
+import asyncio
+import hashlib
+import logging
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Any, Awaitable, Callable, Dict, NamedTuple, Optional, Tuple
+
+from pydantic import BaseModel
+from pymongo.errors import DuplicateKeyError
+
+from core import fast_json
+from core.metrics import instrumented
+from models import TRANSIENT_FIELDS
+from services.circuit_breaker import CircuitBreaker, guarded
+from services.database_service_fixed import MONGO_UNAVAILABLE
+
+logger = logging.getLogger(__name__)
+
+IDEMPOTENCY_HEADER = "Idempotency-Key"
+MAX_KEY_LENGTH = 255
+
+
+class IdempotencyConflict(Exception):
+    def __init__(self, status_code: int, detail: str, retry_after: Optional[float] = None):
+        super().__init__(detail)
+        self.status_code = status_code
+        self.detail = detail
+        self.retry_after = retry_after
+
+
+class IdempotentRequest(NamedTuple):
+    key: str
+    fingerprint: str  # hash of the normalized payload; a reused key must come with the same one
+    ttl: float
+    remembered: bool = True  # claimed in Mongo and replayed after completion; False for payload-hash keys
+
+
+def payload_fingerprint(form_type: str, data: BaseModel) -> str:
+    """Hash of the submission with whitespace collapsed and the email lowercased"""
+    fields = []
+    for name, value in data.__dict__.items():
+        if name in TRANSIENT_FIELDS:
+            continue
+        if isinstance(value, str):
+            value = " ".join(value.split())
+            if name == "email":
+                value = value.lower()
+        fields.append((name, value))
+    fields.sort()
+    return hashlib.sha256(fast_json.dumps([form_type, fields])).hexdigest()[:32]
+
+
+class IdempotencyStore:
+    def __init__(self, db, ttl_seconds: float = 86_400, lru_size: int = 10_000, pending_timeout: float = 30.0,
+                 breaker: Optional[CircuitBreaker] = None, collection: str = "idempotency_keys"):
+        self.collection = db[collection]
+        self.ttl_seconds = ttl_seconds
+        self.lru_size = lru_size
+        # A claim older than this is taken to belong to a worker that died mid-request
+        self.pending_timeout = pending_timeout
+        self.breaker = breaker
+        # key -> (fingerprint, response, expires_at)
+        self._completed: "OrderedDict[str, Tuple[str, Dict[str, Any], datetime]]" = OrderedDict()
+        # key -> (fingerprint, future of the response)
+        self._in_flight: Dict[str, Tuple[str, asyncio.Future]] = {}
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    def request_for(self, form_type: str, header: Optional[str], data: BaseModel) -> IdempotentRequest:
+        """Raises IdempotencyConflict(400) for a malformed header"""
+        fingerprint = payload_fingerprint(form_type, data)
+        if header is None:
+            return IdempotentRequest(f"{form_type}:body:{fingerprint}", fingerprint, 0, remembered=False)
+        header = header.strip()
+        if not header or len(header) > MAX_KEY_LENGTH or not header.isprintable():
+            raise IdempotencyConflict(400, f"{IDEMPOTENCY_HEADER} must be 1-{MAX_KEY_LENGTH} printable characters")
+        digest = hashlib.sha256(header.encode()).hexdigest()[:32]
+        return IdempotentRequest(f"{form_type}:key:{digest}", fingerprint, self.ttl_seconds)
+
+    async def run(self, request: IdempotentRequest,
+                  handler: Callable[[], Awaitable[Dict[str, Any]]]) -> Tuple[Dict[str, Any], bool]:
+        """
+        The response for this request, running handler at most once per key.
+        Returns (response, replayed). Errors raised by handler are not
+        remembered: the key is released so the client can retry. Requests
+        that are not remembered only join a duplicate already in flight.
+        """
+        cached = self._cached(request)
+        if cached is not None:
+            return cached, True
+        in_flight = self._in_flight.get(request.key)
+        if in_flight is not None:
+            self._check_fingerprint(request, in_flight[0])
+            return await asyncio.shield(in_flight[1]), True
+
+        future = asyncio.get_running_loop().create_future()
+        self._in_flight[request.key] = (request.fingerprint, future)
+        owned = succeeded = False
+        try:
+            stored, owned = await self._claim(request) if request.remembered else (None, False)
+            if stored is not None:
+                response, replayed = stored, True
+            else:
+                response, replayed = await handler(), False
+                if owned:
+                    await self._complete(request, response)
+            if request.remembered:
+                self._remember(request, response)
+            future.set_result(response)
+            succeeded = True
+            return response, replayed
+        except asyncio.CancelledError:
+            future.cancel()
+            raise
+        except BaseException as e:
+            future.set_exception(e)
+            future.exception()  # retrieved here, so an unawaited future doesn't log it again
+            raise
+        finally:
+            self._in_flight.pop(request.key, None)
+            if owned and not succeeded:
+                await self._release_quietly(request)
+
+    def _check_fingerprint(self, request: IdempotentRequest, fingerprint: str):
+        if fingerprint != request.fingerprint:
+            raise IdempotencyConflict(422, f"{IDEMPOTENCY_HEADER} was already used with a different payload")
+
+    def _cached(self, request: IdempotentRequest) -> Optional[Dict[str, Any]]:
+        entry = self._completed.get(request.key)
+        if entry is None:
+            return None
+        fingerprint, response, expires_at = entry
+        if expires_at <= datetime.utcnow():
+            del self._completed[request.key]
+            return None
+        self._check_fingerprint(request, fingerprint)
+        self._completed.move_to_end(request.key)
+        return response
+
+    def _remember(self, request: IdempotentRequest, response: Dict[str, Any]):
+        expires_at = datetime.utcnow() + timedelta(seconds=request.ttl)
+        self._completed[request.key] = (request.fingerprint, response, expires_at)
+        self._completed.move_to_end(request.key)
+        if len(self._completed) > self.lru_size:
+            self._completed.popitem(last=False)
+
+    async def _claim(self, request: IdempotentRequest) -> Tuple[Optional[Dict[str, Any]], bool]:
+        """
+        (stored_response, owned). owned means this request holds the Mongo
+        claim; (None, False) means Mongo was unavailable and the request
+        runs unclaimed.
+        """
+        now = datetime.utcnow()
+        try:
+            await self._insert_claim({
+                "_id": request.key,
+                "fingerprint": request.fingerprint,
+                "state": "pending",
+                "created_at": now,
+                "expires_at": now + timedelta(seconds=request.ttl),
+            })
+            return None, True
+        except DuplicateKeyError:
+            pass
+        except MONGO_UNAVAILABLE as e:
+            logger.warning(f"Idempotency store unavailable ({type(e).__name__}), relying on this process only")
+            return None, False
+
+        try:
+            existing = await self._find_claim(request.key)
+        except MONGO_UNAVAILABLE as e:
+            logger.warning(f"Idempotency store unavailable ({type(e).__name__}), relying on this process only")
+            return None, False
+        if existing is None:
+            # Expired or released between the insert and the read
+            return None, False
+        self._check_fingerprint(request, existing["fingerprint"])
+        if existing["state"] == "completed":
+            return existing["response"], False
+        if now - existing["created_at"] > timedelta(seconds=self.pending_timeout) \
+                and await self._take_over(request.key, existing["created_at"], now):
+            logger.warning(f"Took over an abandoned idempotency claim for {request.key}")
+            return None, True
+        raise IdempotencyConflict(409, "A request with this key is already being processed", retry_after=1.0)
+
+    @instrumented("mongo")
+    @guarded()
+    async def _insert_claim(self, doc: Dict[str, Any]):
+        await self.collection.insert_one(doc)
+
+    @instrumented("mongo")
+    @guarded()
+    async def _find_claim(self, key: str) -> Optional[Dict[str, Any]]:
+        return await self.collection.find_one({"_id": key})
+
+    @guarded()
+    async def _take_over(self, key: str, created_at: datetime, now: datetime) -> bool:
+        result = await self.collection.update_one(
+            {"_id": key, "state": "pending", "created_at": created_at}, {"$set": {"created_at": now}}
+        )
+        return result.modified_count == 1
+
+    async def _complete(self, request: IdempotentRequest, response: Dict[str, Any]):
+        try:
+            await self._store_response(request, response)
+        except Exception as e:
+            # The submission went through; a later retry may run again, as without a key
+            logger.error(f"Could not store idempotent response for {request.key}: {str(e)}")
+
+    @instrumented("mongo")
+    @guarded()
+    async def _store_response(self, request: IdempotentRequest, response: Dict[str, Any]):
+        await self.collection.update_one(
+            {"_id": request.key},
+            {"$set": {
+                "state": "completed",
+                "response": response,
+                "expires_at": datetime.utcnow() + timedelta(seconds=request.ttl),
+            }},
+        )
+
+    async def _release_quietly(self, request: IdempotentRequest):
+        """Drop a claim whose request failed, so the client's retry is processed"""
+        try:
+            await self.collection.delete_one({"_id": request.key, "state": "pending"})
+        except Exception as e:
+            # The claim then blocks retries only until pending_timeout
+            logger.error(f"Could not release idempotency claim {request.key}: {str(e)}")
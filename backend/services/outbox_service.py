@@ -0,0 +1,401 @@
+import asyncio
+import logging
+import uuid
+from datetime import datetime, timedelta
+from typing import Any, Dict, List, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+from services.circuit_breaker import CircuitBreaker, guarded
+
+logger = logging.getLogger(__name__)
+
+# Outbox entry lifecycle: pending -> processing -> sent | failed
+STATUS_PENDING = "pending"
+STATUS_PROCESSING = "processing"
+STATUS_SENT = "sent"
+STATUS_FAILED = "failed"
+
+
+class OutboxService:
+    """Mongo-backed outbox of Formspree deliveries waiting to be dispatched"""
+
+    def __init__(self, db, lease_seconds: int = 60, breaker: Optional[CircuitBreaker] = None):
+        self.db = db
+        self.collection = db["formspree_outbox"]
+        self.lease_seconds = lease_seconds
+        # Shares the database service's Mongo breaker, so enqueue fails fast during an outage
+        self.breaker = breaker
+        # Set whenever a new entry is enqueued so the dispatcher wakes up early
+        self.wakeup = asyncio.Event()
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("status", 1), ("next_attempt_at", 1)])
+        await self.collection.create_index("id")
+        await self.collection.create_index("claim", sparse=True)
+
+    @guarded()
+    async def enqueue(self, form_type: str, submission_id: Optional[str], payload: Dict[str, Any],
+                      submitted_at: Optional[datetime] = None) -> str:
+        now = datetime.utcnow()
+        entry = {
+            "id": str(uuid.uuid4()),
+            "form_type": form_type,  # 'contact' or 'waitlist'
+            "submission_id": submission_id,
+            "submitted_at": submitted_at,  # lets the status update skip reading the submission back
+            "payload": payload,
+            "status": STATUS_PENDING,
+            "attempts": 0,
+            "last_error": None,
+            "created_at": now,
+            "next_attempt_at": now,
+            "locked_until": None,
+        }
+        await self.collection.insert_one(entry)
+        self.wakeup.set()
+        return entry["id"]
+
+    async def enqueue_many(self, form_type: str, items: List[Tuple[Optional[str], Dict[str, Any]]]) -> int:
+        """Queue (submission_id, payload) pairs with one insert_many; used by bulk ingestion"""
+        if not items:
+            return 0
+        now = datetime.utcnow()
+        await self.collection.insert_many([
+            {
+                "id": str(uuid.uuid4()),
+                "form_type": form_type,
+                "submission_id": submission_id,
+                "payload": payload,
+                "status": STATUS_PENDING,
+                "attempts": 0,
+                "last_error": None,
+                "created_at": now,
+                "next_attempt_at": now,
+                "locked_until": None,
+            }
+            for submission_id, payload in items
+        ], ordered=False)
+        self.wakeup.set()
+        return len(items)
+
+    @staticmethod
+    def _due_filter(now: datetime) -> Dict[str, Any]:
+        # Entries stuck in 'processing' past their lease (e.g. a crashed worker) are reclaimed
+        return {
+            "$or": [
+                {"status": STATUS_PENDING, "next_attempt_at": {"$lte": now}},
+                {"status": STATUS_PROCESSING, "locked_until": {"$lte": now}},
+            ]
+        }
+
+    def _lease_update(self, now: datetime, claim: str) -> Dict[str, Any]:
+        lease = {
+            "status": STATUS_PROCESSING,
+            "locked_until": now + timedelta(seconds=self.lease_seconds),
+            # Every lease gets a fresh token; results are only recorded while it still matches
+            "claim": claim,
+        }
+        return {"$set": lease, "$inc": {"attempts": 1}}
+
+    @staticmethod
+    def _leased(entry_ids: List[str], claim: str) -> Dict[str, Any]:
+        """Entries still held under this claim; a lease that expired and was re-taken has another token"""
+        return {"id": {"$in": entry_ids}, "claim": claim, "status": STATUS_PROCESSING}
+
+    async def _finish(self, entry_ids: List[str], claim: str, update: Dict[str, Any]) -> int:
+        """Number of entries whose result was recorded"""
+        result = await self.collection.update_many(self._leased(entry_ids, claim), update)
+        if result.matched_count < len(entry_ids):
+            # Another worker re-leased them after our lease ran out; its result wins
+            logger.warning(
+                f"Lost the lease on {len(entry_ids) - result.matched_count} outbox entries, result not recorded"
+            )
+        return result.matched_count
+
+    async def _finish_terminal(self, entry_ids: List[str], claim: str, status: str,
+                               fields: Dict[str, Any]) -> List[str]:
+        """
+        Move leased entries to a final status and return the ids this claim
+        recorded. On a short count the ids are read back: the claim token
+        stays on the entry and a final status is never re-leased, so
+        claim + status pick out exactly our writes.
+        """
+        update = {"$set": {"status": status, "locked_until": None, **fields}}
+        if await self._finish(entry_ids, claim, update) == len(entry_ids):
+            return list(entry_ids)
+        recorded = await self.collection.find(
+            {"id": {"$in": entry_ids}, "claim": claim, "status": status}, {"id": 1}
+        ).to_list(length=len(entry_ids))
+        return [entry["id"] for entry in recorded]
+
+    async def claim_next(self) -> Optional[Dict[str, Any]]:
+        """Atomically lease the oldest deliverable entry"""
+        now = datetime.utcnow()
+        return await self.collection.find_one_and_update(
+            self._due_filter(now),
+            self._lease_update(now, str(uuid.uuid4())),
+            sort=[("next_attempt_at", 1)],
+            return_document=ReturnDocument.AFTER,
+        )
+
+    async def claim_batch(self, limit: int) -> List[Dict[str, Any]]:
+        """
+        Lease up to `limit` deliverable entries. The update re-checks the due
+        filter, so entries grabbed by another worker in between are skipped.
+        """
+        now = datetime.utcnow()
+        candidates = await self.collection.find(self._due_filter(now), {"id": 1}) \
+            .sort("next_attempt_at", 1).limit(limit).to_list(length=limit)
+        if not candidates:
+            return []
+        claim = str(uuid.uuid4())
+        await self.collection.update_many(
+            {"id": {"$in": [c["id"] for c in candidates]}, **self._due_filter(now)},
+            self._lease_update(now, claim),
+        )
+        return await self.collection.find({"claim": claim}).to_list(length=limit)
+
+    async def count_due(self, limit: int) -> int:
+        return await self.collection.count_documents(self._due_filter(datetime.utcnow()), limit=limit)
+
+    async def mark_sent(self, entry_id: str, claim: str) -> bool:
+        """False if the lease was lost and the result not recorded"""
+        return bool(await self.mark_sent_many([entry_id], claim))
+
+    async def mark_failed(self, entry_id: str, claim: str, error: str) -> bool:
+        return bool(await self.mark_failed_many([entry_id], claim, error))
+
+    async def retry_later(self, entry_id: str, claim: str, error: str, delay_seconds: float):
+        await self.retry_later_many([entry_id], claim, error, delay_seconds)
+
+    async def mark_sent_many(self, entry_ids: List[str], claim: str) -> List[str]:
+        """Ids marked sent; entries whose lease was lost are left to their new holder"""
+        return await self._finish_terminal(entry_ids, claim, STATUS_SENT, {"sent_at": datetime.utcnow()})
+
+    async def mark_failed_many(self, entry_ids: List[str], claim: str, error: str) -> List[str]:
+        return await self._finish_terminal(entry_ids, claim, STATUS_FAILED, {"last_error": error})
+
+    async def retry_later_many(self, entry_ids: List[str], claim: str, error: str, delay_seconds: float):
+        await self._finish(
+            entry_ids,
+            claim,
+            {
+                "$set": {
+                    "status": STATUS_PENDING,
+                    "last_error": error,
+                    "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay_seconds),
+                    "locked_until": None,
+                }
+            },
+        )
+
+    async def defer_many(self, entry_ids: List[str], claim: str, reason: str, delay_seconds: float):
+        """Put leased entries back without spending an attempt (nothing was actually sent)"""
+        await self._finish(
+            entry_ids,
+            claim,
+            {
+                "$set": {
+                    "status": STATUS_PENDING,
+                    "last_error": reason,
+                    "next_attempt_at": datetime.utcnow() + timedelta(seconds=delay_seconds),
+                    "locked_until": None,
+                },
+                "$inc": {"attempts": -1},
+            },
+        )
+
+
+class OutboxDispatcher:
+    """
+    Background worker that drains the outbox into Formspree and records the
+    delivery result on the submission through DatabaseService.
+    """
+
+    def __init__(
+        self,
+        outbox_service: OutboxService,
+        formspree_service,
+        database_service,
+        poll_interval: float = 5.0,
+        max_attempts: int = 5,
+        base_backoff: float = 2.0,
+        max_backoff: float = 300.0,
+        concurrency: Optional[int] = None,
+    ):
+        self.outbox = outbox_service
+        self.formspree = formspree_service
+        self.database = database_service
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.base_backoff = base_backoff
+        self.max_backoff = max_backoff
+        # Entries leased and delivered together; FormspreeService's semaphore caps requests in flight
+        self.concurrency = concurrency or formspree_service.max_concurrency
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run(), name="formspree-outbox-dispatcher")
+        logger.info("Formspree outbox dispatcher started")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        self.outbox.wakeup.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=self.formspree.timeout + 5)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+        logger.info("Formspree outbox dispatcher stopped")
+
+    async def _run(self):
+        # Index creation happens here rather than in start() so startup never waits on Mongo
+        try:
+            await self.outbox.ensure_indexes()
+        except Exception as e:
+            logger.error(f"Could not create outbox indexes: {str(e)}")
+        while not self._stopping.is_set():
+            try:
+                drained = await self.drain()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                logger.error(f"Outbox dispatch loop error: {str(e)}")
+                drained = 0
+
+            if drained == 0:
+                # Nothing due: sleep until the next poll or until a new entry arrives
+                try:
+                    await asyncio.wait_for(self.outbox.wakeup.wait(), timeout=self.poll_interval)
+                except asyncio.TimeoutError:
+                    pass
+                self.outbox.wakeup.clear()
+
+    def _circuit_open(self) -> bool:
+        breaker = getattr(self.formspree, "breaker", None)
+        return breaker is not None and not breaker.ready()
+
+    async def _defer(self, entries: List[Dict[str, Any]]):
+        """Formspree's circuit is open: hand the leases back until it may be probed again"""
+        delay = max(self.formspree.breaker.retry_after(), 1.0)
+        logger.warning(f"Formspree circuit open, deferring {len(entries)} outbox entries for {delay:.0f}s")
+        await self.outbox.defer_many([e["id"] for e in entries], entries[0]["claim"], "circuit open", delay)
+
+    async def drain(self) -> int:
+        """Deliver every entry that is currently due. Returns the number processed."""
+        if self.formspree.batching_enabled:
+            return await self.drain_batches()
+        processed = 0
+        while not self._stopping.is_set() and not self._circuit_open():
+            # Delivered side by side, so one slow Formspree call doesn't hold up the rest
+            entries = await self.outbox.claim_batch(self.concurrency)
+            if not entries:
+                break
+            await asyncio.gather(*(self.deliver(entry) for entry in entries))
+            processed += len(entries)
+            if len(entries) < self.concurrency:
+                break
+        return processed
+
+    async def drain_batches(self) -> int:
+        """
+        Batching mode: once something is due, wait out the coalescing window
+        (unless a full batch is already waiting), then lease up to batch_size
+        entries and send one digest per form type.
+        """
+        batch_size = self.formspree.batch_size
+        due = await self.outbox.count_due(limit=batch_size)
+        if due == 0:
+            return 0
+        if due < batch_size and self.formspree.batch_window > 0:
+            await asyncio.sleep(self.formspree.batch_window)
+
+        processed = 0
+        while not self._stopping.is_set() and not self._circuit_open():
+            entries = await self.outbox.claim_batch(batch_size)
+            if not entries:
+                break
+            groups: Dict[str, List[Dict[str, Any]]] = {}
+            for entry in entries:
+                groups.setdefault(entry["form_type"], []).append(entry)
+            for form_type, group in groups.items():
+                await self.deliver_batch(form_type, group)
+            processed += len(entries)
+            if len(entries) < batch_size:
+                break
+        return processed
+
+    async def deliver_batch(self, form_type: str, entries: List[Dict[str, Any]]):
+        result = await self.formspree.submit_batch(form_type, [e["payload"] for e in entries])
+        if result.get("circuit_open"):
+            await self._defer(entries)
+            return
+        claim = entries[0]["claim"]  # one claim_batch lease covers the whole group
+        if result.get("success"):
+            # As in deliver(), only entries still held under our lease move their submission
+            marked = await self.outbox.mark_sent_many([e["id"] for e in entries], claim)
+            await self._update_submission_status_many(form_type, self._submission_ids(entries, marked), "sent")
+            return
+
+        error = result.get("error") or f"status {result.get('status_code')}"
+        exhausted = [e for e in entries if e["attempts"] >= self.max_attempts]
+        retrying = [e for e in entries if e["attempts"] < self.max_attempts]
+        if exhausted:
+            logger.error(f"{len(exhausted)} outbox entries failed permanently: {error}")
+            marked = await self.outbox.mark_failed_many([e["id"] for e in exhausted], claim, error)
+            await self._update_submission_status_many(form_type, self._submission_ids(exhausted, marked), "failed")
+        if retrying:
+            attempts = max(e["attempts"] for e in retrying)
+            delay = min(self.base_backoff * (2 ** (attempts - 1)), self.max_backoff)
+            logger.warning(f"Outbox batch of {len(retrying)} failed ({error}), retrying in {delay:.0f}s")
+            await self.outbox.retry_later_many([e["id"] for e in retrying], claim, error, delay)
+
+    async def deliver(self, entry: Dict[str, Any]):
+        result = await self.formspree.submit_form(entry["payload"])
+        if result.get("circuit_open"):
+            await self._defer([entry])
+            return
+        if result.get("success"):
+            # Only the holder of the lease moves the submission out of pending, so it moves once
+            if await self.outbox.mark_sent(entry["id"], entry["claim"]):
+                await self._update_submission_status(entry, "sent")
+            return
+
+        error = result.get("error") or f"status {result.get('status_code')}"
+        if entry["attempts"] >= self.max_attempts:
+            logger.error(f"Outbox entry {entry['id']} failed permanently: {error}")
+            if await self.outbox.mark_failed(entry["id"], entry["claim"], error):
+                await self._update_submission_status(entry, "failed")
+        else:
+            delay = min(self.base_backoff * (2 ** (entry["attempts"] - 1)), self.max_backoff)
+            logger.warning(f"Outbox entry {entry['id']} failed ({error}), retrying in {delay:.0f}s")
+            await self.outbox.retry_later(entry["id"], entry["claim"], error, delay)
+
+    async def _update_submission_status(self, entry: Dict[str, Any], status: str):
+        submission_id = entry.get("submission_id")
+        if not submission_id:
+            return
+        try:
+            if entry["form_type"] == "contact":
+                await self.database.update_contact_formspree_status(submission_id, status, entry.get("submitted_at"))
+            elif entry["form_type"] == "waitlist":
+                await self.database.update_waitlist_formspree_status(submission_id, status, entry.get("submitted_at"))
+        except Exception as e:
+            logger.error(f"Failed to update formspree_status for {submission_id}: {str(e)}")
+
+    @staticmethod
+    def _submission_ids(entries: List[Dict[str, Any]], entry_ids: List[str]) -> List[Optional[str]]:
+        marked = set(entry_ids)
+        return [e.get("submission_id") for e in entries if e["id"] in marked]
+
+    async def _update_submission_status_many(self, form_type: str, submission_ids: List[str], status: str):
+        try:
+            await self.database.update_formspree_status_many(form_type, submission_ids, status)
+        except Exception as e:
+            logger.error(f"Failed to update formspree_status for {len(submission_ids)} submissions: {str(e)}")
@@ -0,0 +1,154 @@
+import abc
+import time
+from collections import OrderedDict
+from datetime import datetime, timedelta
+from typing import Dict, Optional, Tuple
+
+from pymongo import ReturnDocument
+
+
+class RateLimit:
+    """Token bucket parameters: `burst` requests at once, refilled at `burst / period` per second"""
+
+    def __init__(self, burst: int, period: float):
+        if burst <= 0 or period <= 0:
+            raise ValueError("burst and period must be positive")
+        self.burst = burst
+        self.period = period
+        self.rate = burst / period
+
+    @classmethod
+    def parse(cls, spec: str) -> "RateLimit":
+        """Parse 'count/seconds', e.g. '10/60' for ten requests a minute"""
+        count, seconds = spec.split("/", 1)
+        return cls(int(count), float(seconds))
+
+    @property
+    def idle_ttl(self) -> float:
+        """Seconds after which an untouched bucket is full again and can be forgotten"""
+        return self.period
+
+
+class RateLimitBackend(abc.ABC):
+    """Storage for token buckets. take() consumes one token and reports (allowed, retry_after)."""
+
+    @abc.abstractmethod
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        ...
+
+
+class MemoryRateLimitBackend(RateLimitBackend):
+    """
+    Single-worker backend. Each limit keeps its buckets in its own
+    OrderedDict in last-touched order; every bucket of one limit lives for
+    the same idle_ttl, so that order is also expiry order and expired
+    buckets are dropped from the front in O(1) amortized. Memory never
+    exceeds max_keys entries across all limits.
+    """
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        # (burst, period) -> key -> (tokens, updated_at, expires_at)
+        self._tables: "Dict[Tuple[int, float], OrderedDict[str, Tuple[float, float, float]]]" = {}
+        self._size = 0
+
+    def take_sync(self, key: str, limit: RateLimit, now: Optional[float] = None) -> Tuple[bool, float]:
+        now = time.monotonic() if now is None else now
+        self._expire(now)
+
+        buckets = self._tables.get((limit.burst, limit.period))
+        if buckets is None:
+            buckets = self._tables[(limit.burst, limit.period)] = OrderedDict()
+        bucket = buckets.pop(key, None)
+        if bucket is None:
+            tokens = float(limit.burst)
+        else:
+            self._size -= 1
+            tokens, updated_at, _ = bucket
+            tokens = min(limit.burst, tokens + (now - updated_at) * limit.rate)
+
+        allowed = tokens >= 1
+        if allowed:
+            tokens -= 1
+        buckets[key] = (tokens, now, now + limit.idle_ttl)
+        self._size += 1
+        if self._size > self.max_keys:
+            self._evict()
+        return allowed, 0.0 if allowed else (1 - tokens) / limit.rate
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        return self.take_sync(key, limit)
+
+    def _expire(self, now: float):
+        for buckets in self._tables.values():
+            while buckets:
+                _, _, expires_at = next(iter(buckets.values()))
+                if expires_at > now:
+                    break
+                buckets.popitem(last=False)
+                self._size -= 1
+
+    def _evict(self):
+        """Over max_keys: drop the bucket closest to expiring, whichever limit it belongs to"""
+        soonest = min(
+            (buckets for buckets in self._tables.values() if buckets),
+            key=lambda buckets: next(iter(buckets.values()))[2],
+        )
+        soonest.popitem(last=False)
+        self._size -= 1
+
+    def __len__(self):
+        return self._size
+
+
+class MongoRateLimitBackend(RateLimitBackend):
+    """
+    Shared backend for several workers. Each take() is one atomic
+    find_one_and_update with an aggregation pipeline that refills and spends
+    the bucket server-side; a TTL index removes idle buckets.
+    """
+
+    def __init__(self, db, collection: str = "rate_limits"):
+        self.collection = db[collection]
+
+    async def ensure_indexes(self):
+        await self.collection.create_index("expires_at", expireAfterSeconds=0)
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        now = datetime.utcnow()
+        elapsed = {"$divide": [{"$subtract": [now, {"$ifNull": ["$updated_at", now]}]}, 1000]}
+        doc = await self.collection.find_one_and_update(
+            {"_id": key},
+            [
+                {"$set": {
+                    "tokens": {"$min": [
+                        limit.burst,
+                        {"$add": [{"$ifNull": ["$tokens", limit.burst]}, {"$multiply": [elapsed, limit.rate]}]},
+                    ]},
+                    "updated_at": now,
+                    "expires_at": now + timedelta(seconds=limit.idle_ttl),
+                }},
+                {"$set": {"allowed": {"$gte": ["$tokens", 1]}}},
+                {"$set": {"tokens": {"$cond": ["$allowed", {"$subtract": ["$tokens", 1]}, "$tokens"]}}},
+            ],
+            upsert=True,
+            return_document=ReturnDocument.AFTER,
+        )
+        if doc["allowed"]:
+            return True, 0.0
+        return False, (1 - doc["tokens"]) / limit.rate
+
+
+class RateLimiter:
+    """Form endpoint limits keyed on client IP and on normalized email"""
+
+    def __init__(self, backend: RateLimitBackend, ip_limit: RateLimit, email_limit: RateLimit):
+        self.backend = backend
+        self.ip_limit = ip_limit
+        self.email_limit = email_limit
+
+    async def check_ip(self, ip: str) -> Tuple[bool, float]:
+        return await self.backend.take(f"ip:{ip}", self.ip_limit)
+
+    async def check_email(self, email: str) -> Tuple[bool, float]:
+        return await self.backend.take(f"email:{str(email).strip().lower()}", self.email_limit)
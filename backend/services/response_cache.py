@@ -0,0 +1,122 @@
+import gzip
+import logging
+import time
+from collections import OrderedDict
+from typing import Any, Dict, List, Optional, Tuple
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+Headers = List[Tuple[bytes, bytes]]
+
+# Server preference order when the client accepts several
+ENCODINGS = ("br", "gzip") if BROTLI_AVAILABLE else ("gzip",)
+
+# Below this the compressed frame overhead outweighs the savings
+MIN_COMPRESS_BYTES = 256
+
+_DROPPED_HEADERS = frozenset((b"content-length", b"content-encoding", b"vary", b"date"))
+
+
+def _compress(body: bytes, encoding: str) -> bytes:
+    if encoding == "br":
+        return brotli.compress(body, quality=5)
+    return gzip.compress(body, compresslevel=6, mtime=0)
+
+
+class CachedResponse:
+    """
+    One response, fully encoded. Every variant carries its finished header
+    list, so a hit is two ASGI messages built from stored objects.
+    """
+
+    __slots__ = ("status", "etag", "route", "variants", "expires_at", "size")
+
+    def __init__(self, status: int, headers: Headers, body: bytes, route: Any, expires_at: float):
+        self.status = status
+        self.route = route
+        self.expires_at = expires_at
+        base = [(k, v) for k, v in headers if k.lower() not in _DROPPED_HEADERS]
+        self.etag = next((v.decode("latin-1") for k, v in base if k.lower() == b"etag"), None)
+        base.append((b"vary", b"Accept-Encoding"))
+
+        # Header lists are stored as tuples so no downstream middleware can mutate a shared entry
+        self.variants: Dict[str, Tuple[bytes, Tuple[Tuple[bytes, bytes], ...]]] = {
+            "identity": (body, tuple(base + [(b"content-length", str(len(body)).encode())])),
+        }
+        if len(body) >= MIN_COMPRESS_BYTES:
+            for encoding in ENCODINGS:
+                compressed = _compress(body, encoding)
+                if len(compressed) < len(body):
+                    self.variants[encoding] = (compressed, tuple(base + [
+                        (b"content-encoding", encoding.encode()),
+                        (b"content-length", str(len(compressed)).encode()),
+                    ]))
+        self.size = sum(len(b) for b, _ in self.variants.values())
+
+    def not_modified_headers(self) -> Headers:
+        return [(k, v) for k, v in self.variants["identity"][1] if k not in (b"content-length", b"content-type")]
+
+
+class ResponseCache:
+    """
+    TTL + byte-bounded LRU of encoded GET responses, keyed by (path, query).
+    Entries are dropped on expiry, when the byte budget is exceeded (least
+    recently used first), or explicitly via invalidate()/clear().
+    """
+
+    def __init__(self, ttl: float = 30.0, max_bytes: int = 8 * 1024 * 1024, max_entry_bytes: int = 1024 * 1024):
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.max_entry_bytes = max_entry_bytes
+        self._entries: "OrderedDict[Tuple[str, bytes], CachedResponse]" = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key: Tuple[str, bytes]) -> Optional[CachedResponse]:
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        if entry.expires_at <= time.monotonic():
+            self._drop(key)
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry
+
+    def build(self, status: int, headers: Headers, body: bytes, route: Any) -> CachedResponse:
+        return CachedResponse(status, headers, body, route, time.monotonic() + self.ttl)
+
+    def put(self, key: Tuple[str, bytes], entry: CachedResponse):
+        if entry.size > self.max_entry_bytes:
+            return
+        if key in self._entries:
+            self._drop(key)
+        self._entries[key] = entry
+        self.bytes += entry.size
+        while self.bytes > self.max_bytes and self._entries:
+            self._drop(next(iter(self._entries)))
+
+    def invalidate(self, path_prefix: str):
+        for key in [k for k in self._entries if k[0].startswith(path_prefix)]:
+            self._drop(key)
+
+    def clear(self):
+        self._entries.clear()
+        self.bytes = 0
+
+    def _drop(self, key: Tuple[str, bytes]):
+        entry = self._entries.pop(key, None)
+        if entry is not None:
+            self.bytes -= entry.size
+
+    def __len__(self) -> int:
+        return len(self._entries)
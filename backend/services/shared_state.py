@@ -0,0 +1,210 @@
+"""
+Cross-worker state for the pre-fork launcher (launcher.py).
+
+One small asyncio server, forked by the launcher before the workers, owns
+the state that has to agree across processes: rate-limit token buckets
+and content version counters. Workers talk
+to it over a unix socket with length-prefixed JSON frames; each worker
+keeps one pipelined connection, so a call is one local round trip and
+concurrent calls never wait on each other.
+
+    frame:    4-byte big-endian length + JSON
+    request:  [request_id, op, *args]
+    response: [request_id, result, error]
+"""
+import asyncio
+import itertools
+import logging
+import os
+import struct
+from typing import Any, AsyncIterator, Dict, Optional, Sequence, Tuple
+
+from core import fast_json
+from services.content_service import ChangeNotifier
+from services.rate_limiter import MemoryRateLimitBackend, RateLimit, RateLimitBackend
+
+logger = logging.getLogger(__name__)
+
+FRAME = struct.Struct(">I")
+
+
+class SharedStateError(Exception):
+    pass
+
+
+class SharedStateServer:
+    """Single-threaded, so every op is atomic with respect to all workers"""
+
+    def __init__(self, path: str, max_keys: int = 100_000):
+        self.path = path
+        self.max_keys = max_keys
+        self.buckets = MemoryRateLimitBackend(max_keys=max_keys)
+        self.limits: Dict[tuple, RateLimit] = {}
+        self.versions: Dict[str, int] = {}
+
+    async def serve(self):
+        if os.path.exists(self.path):
+            os.unlink(self.path)
+        server = await asyncio.start_unix_server(self._handle, self.path)
+        logger.info(f"Shared state server listening on {self.path}")
+        async with server:
+            await server.serve_forever()
+
+    async def _handle(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                request_id, op, *args = fast_json.loads(await reader.readexactly(length))
+                try:
+                    response = [request_id, self.dispatch(op, args), None]
+                except Exception as e:
+                    response = [request_id, None, f"{type(e).__name__}: {e}"]
+                payload = fast_json.dumps(response)
+                writer.write(FRAME.pack(len(payload)) + payload)
+                await writer.drain()
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        finally:
+            writer.close()
+
+    def dispatch(self, op: str, args: Sequence[Any]) -> Any:
+        if op == "take":
+            key, burst, period = args
+            limit = self.limits.get((burst, period))
+            if limit is None:
+                limit = self.limits[(burst, period)] = RateLimit(burst, period)
+            return list(self.buckets.take_sync(key, limit))
+        if op == "bump":
+            (name,) = args
+            self.versions[name] = self.versions.get(name, 0) + 1
+            return self.versions[name]
+        if op == "versions":
+            return [self.versions.get(name, 0) for name in args]
+        raise ValueError(f"Unknown op: {op}")
+
+
+class SharedStateClient:
+    """
+    One connection per worker, opened lazily on the first call (i.e. after
+    fork). Requests are pipelined and matched to responses by id; if the
+    server goes away every pending call fails with SharedStateError and the
+    next call reconnects.
+    """
+
+    def __init__(self, path: str, timeout: float = 1.0):
+        self.path = path
+        self.timeout = timeout
+        self._ids = itertools.count()
+        self._pending: Dict[int, asyncio.Future] = {}
+        self._writer: Optional[asyncio.StreamWriter] = None
+        self._reader_task: Optional[asyncio.Task] = None
+        self._connect_lock = asyncio.Lock()
+
+    async def call(self, op: str, *args) -> Any:
+        if self._writer is None:
+            await self._connect()
+        request_id = next(self._ids)
+        future = asyncio.get_running_loop().create_future()
+        self._pending[request_id] = future
+        payload = fast_json.dumps([request_id, op, *args])
+        try:
+            self._writer.write(FRAME.pack(len(payload)) + payload)
+            return await asyncio.wait_for(future, self.timeout)
+        except asyncio.TimeoutError:
+            raise SharedStateError(f"Shared state call {op} timed out after {self.timeout}s")
+        finally:
+            self._pending.pop(request_id, None)
+
+    async def _connect(self):
+        async with self._connect_lock:
+            if self._writer is not None:
+                return
+            try:
+                reader, writer = await asyncio.wait_for(asyncio.open_unix_connection(self.path), self.timeout)
+            except (OSError, asyncio.TimeoutError) as e:
+                raise SharedStateError(f"Shared state server unreachable at {self.path}: {str(e)}")
+            self._writer = writer
+            self._reader_task = asyncio.create_task(self._read_responses(reader), name="shared-state-reader")
+
+    async def _read_responses(self, reader: asyncio.StreamReader):
+        try:
+            while True:
+                (length,) = FRAME.unpack(await reader.readexactly(FRAME.size))
+                request_id, result, error = fast_json.loads(await reader.readexactly(length))
+                future = self._pending.get(request_id)
+                if future is None or future.done():
+                    continue
+                if error is not None:
+                    future.set_exception(SharedStateError(error))
+                else:
+                    future.set_result(result)
+        except (asyncio.IncompleteReadError, ConnectionError) as e:
+            logger.warning(f"Shared state connection lost: {str(e) or type(e).__name__}")
+        finally:
+            self._drop_connection()
+
+    def _drop_connection(self):
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        for future in self._pending.values():
+            if not future.done():
+                future.set_exception(SharedStateError("Shared state connection lost"))
+        self._pending.clear()
+
+    async def close(self):
+        if self._reader_task is not None:
+            self._reader_task.cancel()
+            await asyncio.gather(self._reader_task, return_exceptions=True)
+            self._reader_task = None
+        self._drop_connection()
+
+
+class SharedRateLimitBackend(RateLimitBackend):
+    """
+    Token buckets held by the shared state server, so N workers enforce one
+    limit rather than N. Fails open: if the server is briefly unreachable
+    (the launcher restarts it) requests are let through and logged.
+    """
+
+    def __init__(self, client: SharedStateClient):
+        self.client = client
+
+    async def take(self, key: str, limit: RateLimit) -> Tuple[bool, float]:
+        try:
+            allowed, retry_after = await self.client.call("take", key, limit.burst, limit.period)
+        except SharedStateError as e:
+            logger.warning(f"Rate limit check skipped: {str(e)}")
+            return True, 0.0
+        return allowed, retry_after
+
+
+class SharedStateChangeNotifier(ChangeNotifier):
+    """
+    Content change notifications between workers without a replica set.
+    Writers bump a per-collection version; every worker polls the versions
+    and yields the collections whose version moved. A worker's own bumps are
+    recorded as seen, since it already reloaded after its write.
+    """
+
+    def __init__(self, client: SharedStateClient, collections=("services", "projects"),
+                 poll_interval: float = 1.0):
+        self.client = client
+        self.collections = tuple(collections)
+        self.poll_interval = poll_interval
+        self._seen: Dict[str, int] = {}
+
+    async def notify(self, collection: str):
+        self._seen[collection] = await self.client.call("bump", f"content:{collection}")
+
+    async def changes(self) -> AsyncIterator[str]:
+        names = [f"content:{c}" for c in self.collections]
+        versions = await self.client.call("versions", *names)
+        self._seen.update(zip(self.collections, versions))
+        while True:
+            await asyncio.sleep(self.poll_interval)
+            versions = await self.client.call("versions", *names)
+            for collection, version in zip(self.collections, versions):
+                if version > self._seen.get(collection, 0):
+                    self._seen[collection] = version
+                    yield collection
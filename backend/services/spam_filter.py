@@ -0,0 +1,315 @@
+"""
+Spam pre-filter for the public forms. Runs before the per-email rate limit
+and any Mongo or Formspree work, entirely in memory; stages go cheapest
+first and the first hit wins:
+
+    honeypot     hidden _gotcha field filled in (Formspree's convention)
+    form_token   _form_token missing, forged, for the other form, or expired
+    too_fast     form submitted sooner than min_fill_ms after it was shown
+    disposable   email domain (or a parent domain) on the throwaway list
+    links        too many URLs, or URLs making up most of the text
+    repetition   long character runs, a phrase repeated over and over,
+                 or very few distinct words
+    duplicate    near-copy (MinHash) of a recent message from another sender
+
+The form token (FormTokens) is fetched from GET /api/form-token when the
+form is rendered and signed by the server, so the fill time is measured
+on the server's clock and a client can't skip the check by leaving a
+field out.
+
+Bot-only signals (honeypot, a missing or forged token, too_fast) are
+rejected silently: the sender gets the normal success response. An
+expired token gets a 422 asking the person to reload the page. Near-duplicates are not rejected; the
+submission is stored with spam_flag="duplicate" for review, since people
+do send templated messages. The rest are 422s a person can act on.
+"""
+import hashlib
+import hmac
+import logging
+import operator
+import re
+import time
+from collections import Counter, OrderedDict, deque
+from itertools import chain
+from pathlib import Path
+from typing import Deque, Dict, FrozenSet, List, NamedTuple, Optional, Tuple
+
+from core.metrics import REGISTRY
+
+logger = logging.getLogger(__name__)
+
+SPAM_FILTER_SECONDS = REGISTRY.histogram(
+    "spam_filter_seconds",
+    "Time spent in the spam pre-filter by form and verdict",
+    ("form", "verdict"),
+    buckets=(0.000005, 0.00001, 0.000025, 0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.005),
+)
+
+# Matched against whitespace-separated tokens that contain a dot, not the whole text
+LINK = re.compile(
+    r"(?:https?://|www\.)\S+"
+    r"|[\w-]+(?:\.[\w-]+)*\.(?:com|net|org|info|biz|ru|cn|xyz|top|site|online|shop|click|link|io|co)\b",
+    re.IGNORECASE,
+)
+CHAR_RUN = re.compile(r"(\S)\1{14,}")
+WORD = re.compile(r"\w+")
+
+
+class SpamVerdict(NamedTuple):
+    reason: str
+    silent: bool  # answer as if accepted, so a bot learns nothing
+    detail: str = ""
+    flag: bool = False  # accept and store the submission, marked with the reason
+
+
+HONEYPOT = SpamVerdict("honeypot", True)
+BAD_TOKEN = SpamVerdict("form_token", True)
+EXPIRED = SpamVerdict("expired", False, "This form has expired, please reload the page and try again.")
+TOO_FAST = SpamVerdict("too_fast", True)
+DUPLICATE = SpamVerdict("duplicate", False, flag=True)
+DISPOSABLE = SpamVerdict("disposable", False, "Please use a permanent email address.")
+LINKS = SpamVerdict("links", False, "Please remove some of the links from your message.")
+REPETITION = SpamVerdict("repetition", False, "Your message looks like spam, please rephrase it.")
+
+
+class FormTokens:
+    """
+    Stateless form tokens, "<issued unix ms>.<HMAC-SHA256 of form and
+    issued ms>". Any worker holding the same secret can check a token
+    another worker issued.
+    """
+
+    def __init__(self, secret: bytes):
+        self.secret = secret
+
+    def _sign(self, form: str, issued_ms: int) -> str:
+        return hmac.new(self.secret, f"{form}:{issued_ms}".encode(), hashlib.sha256).hexdigest()
+
+    def issue(self, form: str, issued_ms: Optional[int] = None) -> str:
+        if issued_ms is None:
+            issued_ms = time.time_ns() // 1_000_000
+        return f"{issued_ms}.{self._sign(form, issued_ms)}"
+
+    def age_ms(self, form: str, token: Optional[str]) -> Optional[int]:
+        """Milliseconds since the token was issued; None if it is missing, malformed or not ours for this form"""
+        if not token:
+            return None
+        issued, _, signature = token.partition(".")
+        if not issued.isdigit():
+            return None
+        issued_ms = int(issued)
+        if not hmac.compare_digest(signature, self._sign(form, issued_ms)):
+            return None
+        return time.time_ns() // 1_000_000 - issued_ms
+
+
+def load_disposable_domains(path: Path) -> FrozenSet[str]:
+    """One domain per line, '#' comments; missing file means an empty set"""
+    try:
+        lines = path.read_text().splitlines()
+    except FileNotFoundError:
+        logger.warning(f"Disposable domain list not found at {path}")
+        return frozenset()
+    return frozenset(
+        line.strip().lower() for line in lines if line.strip() and not line.lstrip().startswith("#")
+    )
+
+
+def domain_listed(email: str, domains: FrozenSet[str]) -> bool:
+    """mail.yopmail.com matches yopmail.com: one set lookup per label"""
+    domain = email.rpartition("@")[2].lower()
+    while "." in domain:
+        if domain in domains:
+            return True
+        domain = domain.partition(".")[2]
+    return False
+
+
+def repeats_phrase(words: List[str], times: int = 5, max_phrase: int = 4) -> bool:
+    """A phrase of up to max_phrase words said `times` times in a row ("buy now buy now ...")"""
+    for k in range(1, max_phrase + 1):
+        # words[i] == words[i + k] for (times - 1) * k consecutive i means `times` copies of a k-word phrase
+        if b"\x01" * ((times - 1) * k) in bytes(map(operator.eq, words, words[k:])):
+            return True
+    return False
+
+
+class MinHasher:
+    """
+    One-permutation MinHash over word 3-gram shingles: each shingle's 64-bit
+    hash picks a slot (low bits) and competes for that slot's minimum (high
+    bits), so a signature costs one hash per shingle, not one per slot.
+    Slots no shingle landed in borrow the nearest filled slot to their right,
+    tagged with the distance (densification), so short messages don't end
+    up sharing long runs of empty slots.
+    """
+
+    EMPTY = 1 << 64
+
+    def __init__(self, slots: int = 64, shingle: int = 3):
+        self.slots = slots
+        self.shingle = shingle
+
+    def signature(self, words: List[str]) -> Tuple[int, ...]:
+        slots = self.slots
+        empty = self.EMPTY
+        mins = [empty] * slots
+        for h in set(map(hash, zip(*(words[i:] for i in range(self.shingle))))):
+            h &= 0xFFFFFFFFFFFFFFFF
+            slot = h % slots
+            value = h // slots
+            if value < mins[slot]:
+                mins[slot] = value
+        if empty in mins:
+            filled = [i for i, v in enumerate(mins) if v != empty]
+            if not filled:
+                return tuple(mins)
+            dense = list(mins)
+            # Walk right to left twice so slots near the end wrap around to the start
+            donor = filled[0] + slots
+            for i in range(2 * slots - 1, -1, -1):
+                slot = i % slots
+                if mins[slot] != empty:
+                    donor = i
+                elif i < slots:
+                    dense[slot] = mins[donor % slots] + ((donor - i) << 64)
+            mins = dense
+        return tuple(mins)
+
+    @staticmethod
+    def similarity(a: Tuple[int, ...], b: Tuple[int, ...]) -> float:
+        """Estimated Jaccard similarity of the two shingle sets"""
+        return sum(map(operator.eq, a, b)) / len(a)
+
+
+class NearDuplicateIndex:
+    """
+    Bounded LSH index of recent signatures. Signatures are cut into bands;
+    two messages become candidates when at least min_band_hits bands match
+    exactly, and a candidate counts only if its estimated similarity
+    reaches threshold.
+    The oldest entry is evicted once capacity is reached, and each bucket
+    keeps only its newest bucket_size entries, so a phrase every message
+    shares can't turn a lookup into a scan of the whole index.
+    """
+
+    def __init__(self, hasher: MinHasher, capacity: int = 10_000, bands: int = 16, threshold: float = 0.8,
+                 bucket_size: int = 32, min_band_hits: int = 2):
+        if hasher.slots % bands:
+            raise ValueError("slots must be a multiple of bands")
+        self.hasher = hasher
+        self.capacity = capacity
+        self.rows = hasher.slots // bands
+        self.threshold = threshold
+        self.bucket_size = bucket_size
+        self.min_band_hits = min_band_hits
+        self._next_id = 0
+        # entry id -> (signature, sender, band keys)
+        self._entries: "OrderedDict[int, Tuple[Tuple[int, ...], str, List[tuple]]]" = OrderedDict()
+        self._buckets: Dict[tuple, Deque[int]] = {}
+
+    def _band_keys(self, signature: Tuple[int, ...]) -> List[tuple]:
+        rows = self.rows
+        return [(i, signature[i:i + rows]) for i in range(0, len(signature), rows)]
+
+    def find(self, signature: Tuple[int, ...], sender: str) -> Optional[float]:
+        """Similarity of the closest recent message from a different sender, if above threshold"""
+        buckets = self._buckets
+        hits = Counter(chain.from_iterable(buckets[key] for key in self._band_keys(signature) if key in buckets))
+        for entry_id, count in hits.items():
+            # At a 0.7 threshold (SpamFilter's default) a true near-duplicate shares ~4 of 16 bands;
+            # one shared band is mostly noise
+            if count < self.min_band_hits:
+                continue
+            entry = self._entries.get(entry_id)
+            if entry is None or entry[1] == sender:
+                continue
+            similarity = self.hasher.similarity(signature, entry[0])
+            if similarity >= self.threshold:
+                return similarity
+        return None
+
+    def add(self, signature: Tuple[int, ...], sender: str):
+        keys = self._band_keys(signature)
+        entry_id = self._next_id
+        self._next_id += 1
+        self._entries[entry_id] = (signature, sender, keys)
+        for key in keys:
+            bucket = self._buckets.get(key)
+            if bucket is None:
+                bucket = self._buckets[key] = deque(maxlen=self.bucket_size)
+            bucket.append(entry_id)
+        if len(self._entries) > self.capacity:
+            old_id, (_, _, old_keys) = self._entries.popitem(last=False)
+            for key in old_keys:
+                bucket = self._buckets.get(key)
+                # The id may already have been pushed out of a full bucket
+                if bucket and bucket[0] == old_id:
+                    bucket.popleft()
+                    if not bucket:
+                        del self._buckets[key]
+
+    def __len__(self):
+        return len(self._entries)
+
+
+class SpamFilter:
+    """Without form_tokens the form_token and too_fast stages are skipped"""
+
+    def __init__(self, disposable_domains: FrozenSet[str] = frozenset(), form_tokens: Optional[FormTokens] = None,
+                 min_fill_ms: int = 3000, max_form_age_ms: int = 86_400_000,
+                 max_links: int = 2, max_link_ratio: float = 0.3, min_distinct_ratio: float = 0.25,
+                 near_duplicate_threshold: float = 0.7, index_size: int = 10_000, min_shingle_words: int = 8):
+        self.disposable_domains = disposable_domains
+        self.form_tokens = form_tokens
+        self.min_fill_ms = min_fill_ms
+        self.max_form_age_ms = max_form_age_ms
+        self.max_links = max_links
+        self.max_link_ratio = max_link_ratio
+        self.min_distinct_ratio = min_distinct_ratio
+        self.min_shingle_words = min_shingle_words
+        self.index = NearDuplicateIndex(MinHasher(), capacity=index_size, threshold=near_duplicate_threshold)
+
+    def check(self, form: str, email: str, text: str, honeypot: Optional[str] = None,
+              form_token: Optional[str] = None) -> Optional[SpamVerdict]:
+        """None means clean. Messages that reach the last stage are added to the near-duplicate index."""
+        started = time.perf_counter()
+        verdict = self._check(form, email, text or "", honeypot, form_token)
+        SPAM_FILTER_SECONDS.observe((form, verdict.reason if verdict else "clean"), time.perf_counter() - started)
+        return verdict
+
+    def _check(self, form: str, email: str, text: str, honeypot: Optional[str],
+               form_token: Optional[str]) -> Optional[SpamVerdict]:
+        if honeypot:
+            return HONEYPOT
+        if self.form_tokens is not None:
+            fill_ms = self.form_tokens.age_ms(form, form_token)
+            if fill_ms is None:
+                return BAD_TOKEN
+            if fill_ms > self.max_form_age_ms:
+                return EXPIRED
+            if fill_ms < self.min_fill_ms:
+                return TOO_FAST
+        if self.disposable_domains and domain_listed(email, self.disposable_domains):
+            return DISPOSABLE
+        if not text:
+            return None
+
+        links = [token for token in text.split() if "." in token and LINK.match(token)]
+        if len(links) > self.max_links or (links and sum(map(len, links)) > self.max_link_ratio * len(text)):
+            return LINKS
+        if CHAR_RUN.search(text):
+            return REPETITION
+
+        words = WORD.findall(text.lower())
+        if repeats_phrase(words) or (len(words) >= 20 and len(set(words)) < self.min_distinct_ratio * len(words)):
+            return REPETITION
+        # Short messages ("interested!") are too alike to compare
+        if len(words) < self.min_shingle_words:
+            return None
+        signature = self.index.hasher.signature(words)
+        sender = email.strip().lower()
+        duplicate = self.index.find(signature, sender) is not None
+        # Caught copies are indexed too, so a campaign that drifts a word at a time stays caught
+        self.index.add(signature, sender)
+        return DUPLICATE if duplicate else None
@@ -0,0 +1,275 @@
+import asyncio
+import fcntl
+import logging
+import mmap
+import os
+import struct
+import time
+import zlib
+from itertools import islice
+from pathlib import Path
+from typing import Any, Awaitable, BinaryIO, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+import bson
+
+logger = logging.getLogger(__name__)
+
+# Record layout: payload length, CRC32 of the payload, BSON payload
+RECORD_HEADER = struct.Struct(">II")
+SEGMENT_GLOB = "spool-*.log"
+
+# Record kinds
+OP_INSERT = "insert"  # {"op", "form_type", "doc"}
+OP_STATUS = "status"  # {"op", "form_type", "submission_id", "status"}
+
+
+def iter_records(view) -> Iterator[Dict[str, Any]]:
+    """
+    Decode the records of one segment. Stops at the first torn or corrupt
+    record, which can only be the tail of a segment whose writer crashed
+    mid-append (that append was never acknowledged).
+    """
+    size, offset = len(view), 0
+    while offset < size:
+        start = offset + RECORD_HEADER.size
+        if start > size:
+            break
+        length, crc = RECORD_HEADER.unpack_from(view, offset)
+        payload = view[start:start + length]
+        if len(payload) < length or zlib.crc32(payload) != crc:
+            break
+        yield bson.decode(payload)
+        offset = start + length
+    if offset < size:
+        logger.warning(f"Spool segment: ignoring {size - offset} bytes of torn data at offset {offset}")
+
+
+class SubmissionSpool:
+    """
+    Append-only local file of submissions (and their Formspree status updates)
+    written while Mongo is unreachable, replayed into Mongo once it is back.
+
+    Appends are group-committed: records arriving within fsync_delay are
+    written and fsynced together, and each caller returns only once its record
+    is on disk. Records are length-prefixed and CRC-checked, in segment files
+    that hold an exclusive flock while they are being appended to. Replay
+    seals the active segment, reads sealed ones through mmap in worker threads
+    and deletes each once every record in it has been applied; several workers
+    may share one directory, since a segment is only ever replayed by whoever
+    holds its lock.
+    """
+
+    def __init__(self, directory: Path, fsync_delay: float = 0.002, max_segment_bytes: int = 64 * 1024 * 1024):
+        self.directory = Path(directory)
+        self.fsync_delay = fsync_delay
+        self.max_segment_bytes = max_segment_bytes
+        self._file = None
+        self._pending: List[Tuple[bytes, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+        self._inflight: Set[asyncio.Task] = set()
+        self._lock = asyncio.Lock()
+        self.appended = 0
+        self.replayed = 0
+
+    # -- appending -------------------------------------------------------
+    async def append(self, record: Dict[str, Any]):
+        """Write one record; returns once it has been fsynced"""
+        payload = bson.encode(record)
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._pending.append((RECORD_HEADER.pack(len(payload), zlib.crc32(payload)) + payload, future))
+        if self._timer is None:
+            self._timer = loop.call_later(self.fsync_delay, self._flush)
+        await future
+
+    def _flush(self):
+        self._timer = None
+        batch, self._pending = self._pending, []
+        if not batch:
+            return
+        task = asyncio.create_task(self._write(batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _write(self, batch: List[Tuple[bytes, asyncio.Future]]):
+        async with self._lock:
+            try:
+                await asyncio.to_thread(self._write_sync, b"".join(data for data, _ in batch))
+            except Exception as e:
+                logger.error(f"Spool write failed: {str(e)}")
+                for _, future in batch:
+                    if not future.done():
+                        future.set_exception(e)
+                return
+            self.appended += len(batch)
+            for _, future in batch:
+                if not future.done():
+                    future.set_result(None)
+
+    def _write_sync(self, data: bytes):
+        if self._file is None or self._file.tell() >= self.max_segment_bytes:
+            self._open_segment()
+        self._file.write(data)
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def _open_segment(self):
+        self._close_segment()
+        self.directory.mkdir(parents=True, exist_ok=True)
+        name = f"spool-{time.time_ns():020d}-{os.getpid()}.log"
+        # Locked before it becomes visible under its final name, so a replayer never takes a live segment
+        temporary = self.directory / f".{name}.tmp"
+        segment = open(temporary, "ab")
+        fcntl.flock(segment.fileno(), fcntl.LOCK_EX)
+        os.rename(temporary, self.directory / name)
+        directory = os.open(self.directory, os.O_RDONLY)
+        try:
+            os.fsync(directory)
+        finally:
+            os.close(directory)
+        self._file = segment
+
+    def _close_segment(self):
+        if self._file is not None:
+            self._file.close()  # releases the flock
+            self._file = None
+
+    # -- replay ----------------------------------------------------------
+    def has_records(self) -> bool:
+        try:
+            return any(path.stat().st_size for path in self.directory.glob(SEGMENT_GLOB))
+        except OSError:
+            return False
+
+    async def seal(self):
+        """Close the active segment so it can be replayed; the next append starts a new one"""
+        async with self._lock:
+            self._close_segment()
+
+    async def replay(self, apply: Callable[[List[Dict[str, Any]]], Awaitable[Any]], batch_size: int = 500) -> int:
+        """
+        Feed every sealed record to apply(records), in append order, batch_size
+        at a time. A segment is deleted only after all of its records were
+        applied, so apply must be idempotent: a crash mid-replay repeats some.
+        File access and decoding run in worker threads; only apply runs on the
+        event loop.
+        """
+        await self.seal()
+        replayed = 0
+        paths = await asyncio.to_thread(lambda: sorted(self.directory.glob(SEGMENT_GLOB)))
+        for path in paths:
+            segment = await asyncio.to_thread(self._claim_segment, path)
+            if segment is None:
+                continue
+            try:
+                replayed += await self._replay_segment(segment, apply, batch_size)
+                await asyncio.to_thread(path.unlink)
+            finally:
+                await asyncio.to_thread(segment.close)  # releases the flock
+        self.replayed += replayed
+        return replayed
+
+    @staticmethod
+    def _claim_segment(path: Path) -> Optional[BinaryIO]:
+        """The segment opened and exclusively locked, or None if another worker has it or already replayed it"""
+        try:
+            segment = open(path, "rb")
+        except FileNotFoundError:
+            return None
+        try:
+            fcntl.flock(segment.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+            if os.fstat(segment.fileno()).st_nlink > 0:
+                return segment
+        except BlockingIOError:
+            pass  # another process is appending to it or replaying it
+        except BaseException:
+            segment.close()
+            raise
+        segment.close()
+        return None
+
+    @staticmethod
+    def _map_segment(segment: BinaryIO) -> Optional[mmap.mmap]:
+        if os.fstat(segment.fileno()).st_size == 0:
+            return None
+        return mmap.mmap(segment.fileno(), 0, access=mmap.ACCESS_READ)
+
+    @classmethod
+    async def _replay_segment(cls, segment: BinaryIO, apply, batch_size: int) -> int:
+        view = await asyncio.to_thread(cls._map_segment, segment)
+        if view is None:
+            return 0
+        count = 0
+        with view:
+            records = iter_records(view)
+            while True:
+                # Decode the next batch off the loop; the generator resumes where the last one stopped
+                batch = await asyncio.to_thread(lambda: list(islice(records, batch_size)))
+                if not batch:
+                    break
+                await apply(batch)
+                count += len(batch)
+        return count
+
+    async def close(self):
+        """Write out pending appends and release the active segment"""
+        if self._timer is not None:
+            self._timer.cancel()
+            self._flush()
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
+        await self.seal()
+
+
+class SpoolReplayer:
+    """Background task that drains the spool into Mongo once it is reachable again"""
+
+    def __init__(self, spool: SubmissionSpool, database_service, interval: float = 5.0, batch_size: int = 500):
+        self.spool = spool
+        self.database = database_service
+        self.interval = interval
+        self.batch_size = batch_size
+        self._task: Optional[asyncio.Task] = None
+        self._stopping = asyncio.Event()
+
+    async def start(self):
+        if self._task is not None:
+            return
+        self._stopping.clear()
+        self._task = asyncio.create_task(self._run(), name="submission-spool-replayer")
+        logger.info(f"Submission spool replayer started ({self.spool.directory})")
+
+    async def stop(self):
+        if self._task is None:
+            return
+        self._stopping.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=10)
+        except asyncio.TimeoutError:
+            self._task.cancel()
+        self._task = None
+
+    async def replay_once(self) -> int:
+        breakers = (getattr(self.database, "breaker", None), getattr(self.database, "batch_breaker", None))
+        if any(breaker is not None and not breaker.ready() for breaker in breakers):
+            return 0
+        if not await asyncio.to_thread(self.spool.has_records):
+            return 0
+        replayed = await self.spool.replay(self.database.apply_spooled, self.batch_size)
+        if replayed:
+            logger.info(f"Replayed {replayed} spooled records into Mongo")
+        return replayed
+
+    async def _run(self):
+        while not self._stopping.is_set():
+            try:
+                await self.replay_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception as e:
+                # Segments that were not fully applied stay on disk for the next attempt
+                logger.warning(f"Spool replay interrupted, will retry: {str(e)}")
+            try:
+                await asyncio.wait_for(self._stopping.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
@@ -0,0 +1,199 @@
+"""
+Index of the built SPA in docs/ for serving it from the API.
+
+    python -m services.static_site ../docs     # build step: write .gz/.br siblings
+
+StaticSite.load() walks the build once: every file gets its stat result,
+media type, ETag and Cache-Control, plus any precompressed siblings, so a
+request is a dict lookup followed by a FileResponse. Hashed assets (those in
+asset-manifest.json, or with a content hash in their name under static/) are
+served as immutable; everything else is revalidated. Rewrites and redirects
+come from the Netlify-style `_redirects` file the build already ships.
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import logging
+import mimetypes
+import os
+import re
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    import brotli
+    BROTLI_AVAILABLE = True
+except ImportError:
+    BROTLI_AVAILABLE = False
+
+logger = logging.getLogger(__name__)
+
+IMMUTABLE = "public, max-age=31536000, immutable"
+REVALIDATE = "no-cache"
+
+COMPRESSIBLE = frozenset((".js", ".css", ".html", ".json", ".svg", ".txt", ".map", ".ico", ".xml"))
+MIN_COMPRESS_BYTES = 1024
+SIBLINGS = (("br", ".br"), ("gzip", ".gz"))
+
+_HASHED_NAME = re.compile(r"\.[0-9a-f]{8,}\.")
+
+
+class StaticFile:
+    __slots__ = ("path", "stat", "media_type", "etag", "cache_control", "variants")
+
+    def __init__(self, path: Path, immutable: bool):
+        self.path = path
+        self.stat = path.stat()
+        self.media_type = mimetypes.guess_type(path.name)[0] or "application/octet-stream"
+        self.etag = '"' + hashlib.md5(f"{self.stat.st_mtime_ns}-{self.stat.st_size}".encode()).hexdigest() + '"'
+        self.cache_control = IMMUTABLE if immutable else REVALIDATE
+        # encoding -> (sibling path, stat); only siblings at least as new as the source are used
+        self.variants: Dict[str, Tuple[Path, os.stat_result]] = {}
+        for encoding, suffix in SIBLINGS:
+            sibling = path.with_name(path.name + suffix)
+            if sibling.is_file():
+                sibling_stat = sibling.stat()
+                if sibling_stat.st_mtime_ns >= self.stat.st_mtime_ns and sibling_stat.st_size < self.stat.st_size:
+                    self.variants[encoding] = (sibling, sibling_stat)
+
+
+class RedirectRule:
+    __slots__ = ("source", "target", "status", "splat")
+
+    def __init__(self, source: str, target: str, status: int):
+        self.splat = source.endswith("*")
+        self.source = source[:-1] if self.splat else source
+        self.target = target
+        self.status = status
+
+    def match(self, path: str) -> Optional[str]:
+        if self.splat:
+            if not path.startswith(self.source):
+                return None
+            return self.target.replace(":splat", path[len(self.source):])
+        return self.target if path == self.source else None
+
+
+def parse_redirects(text: str) -> List[RedirectRule]:
+    """`from to [status]` per rule; indented lines continue the previous rule, as in docs/_redirects"""
+    entries: List[List[str]] = []
+    for line in text.splitlines():
+        parts = line.split("#", 1)[0].split()
+        if not parts:
+            continue
+        if line[:1].isspace() and entries:
+            entries[-1].extend(parts)
+        else:
+            entries.append(parts)
+    rules = []
+    for parts in entries:
+        if len(parts) < 2:
+            logger.warning(f"Ignoring incomplete _redirects rule: {' '.join(parts)}")
+            continue
+        status = int(parts[2].rstrip("!")) if len(parts) > 2 and parts[2].rstrip("!").isdigit() else 301
+        rules.append(RedirectRule(parts[0], parts[1], status))
+    return rules
+
+
+class StaticSite:
+    def __init__(self, root: Path):
+        self.root = Path(root).resolve()
+        self.files: Dict[str, StaticFile] = {}
+        self.redirects: List[RedirectRule] = []
+        self.entrypoints: List[str] = []
+        self.not_found: Optional[StaticFile] = None
+
+    def load(self):
+        manifest_path = self.root / "asset-manifest.json"
+        hashed = set()
+        if manifest_path.is_file():
+            manifest = json.loads(manifest_path.read_text())
+            hashed.update(manifest.get("files", {}).values())
+            self.entrypoints = ["/" + e.lstrip("/") for e in manifest.get("entrypoints", [])]
+        else:
+            logger.warning(f"No asset-manifest.json in {self.root}; only name-hashed files are immutable")
+
+        files = {}
+        for path in self.root.rglob("*"):
+            if not path.is_file() or path.suffix in (".gz", ".br") or path.name == "_redirects":
+                continue
+            url = "/" + path.relative_to(self.root).as_posix()
+            # The manifest also lists index.html, which must always be revalidated
+            immutable = url.startswith("/static/") and (url in hashed or bool(_HASHED_NAME.search(path.name)))
+            files[url] = StaticFile(path, immutable)
+        self.files = files
+
+        redirects_path = self.root / "_redirects"
+        self.redirects = parse_redirects(redirects_path.read_text()) if redirects_path.is_file() else []
+        self.not_found = files.get("/404.html")
+
+        precompressed = sum(1 for f in files.values() if f.variants)
+        logger.info(
+            f"Static site loaded from {self.root}: {len(files)} files, "
+            f"{sum(1 for f in files.values() if f.cache_control == IMMUTABLE)} immutable, "
+            f"{precompressed} precompressed, {len(self.redirects)} redirect rules"
+        )
+
+    def lookup(self, path: str) -> Optional[StaticFile]:
+        if path.endswith("/"):
+            path += "index.html"
+        return self.files.get(path)
+
+    def resolve(self, path: str) -> Tuple[Optional[StaticFile], int, Optional[str]]:
+        """
+        Returns (file, status, redirect_location). Exact files win; then the
+        first matching _redirects rule (200 = rewrite, 3xx = redirect); then
+        404.html.
+        """
+        found = self.lookup(path)
+        if found is not None:
+            return found, 200, None
+        for rule in self.redirects:
+            target = rule.match(path)
+            if target is None:
+                continue
+            if 300 <= rule.status < 400:
+                return None, rule.status, target
+            rewritten = self.lookup(target)
+            if rewritten is not None:
+                return rewritten, rule.status, None
+        return self.not_found, 404, None
+
+
+def precompress(root: Path, force: bool = False) -> int:
+    """Write .gz (and .br when brotli is installed) next to every compressible file; returns files written"""
+    written = 0
+    for path in Path(root).rglob("*"):
+        if not path.is_file() or path.suffix not in COMPRESSIBLE:
+            continue
+        source_stat = path.stat()
+        if source_stat.st_size < MIN_COMPRESS_BYTES:
+            continue
+        data = None
+        for encoding, suffix in SIBLINGS:
+            if encoding == "br" and not BROTLI_AVAILABLE:
+                continue
+            sibling = path.with_name(path.name + suffix)
+            if not force and sibling.is_file() and sibling.stat().st_mtime_ns >= source_stat.st_mtime_ns:
+                continue
+            data = data if data is not None else path.read_bytes()
+            if encoding == "br":
+                compressed = brotli.compress(data, quality=11)
+            else:
+                compressed = gzip.compress(data, compresslevel=9, mtime=0)
+            if len(compressed) >= len(data):
+                continue
+            sibling.write_bytes(compressed)
+            written += 1
+    return written
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Precompress a built SPA for StaticSite")
+    parser.add_argument("root", nargs="?", default=str(Path(__file__).resolve().parent.parent.parent / "docs"))
+    parser.add_argument("--force", action="store_true", help="rewrite siblings even if up to date")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO)
+    count = precompress(Path(args.root), force=args.force)
+    logger.info(f"Wrote {count} precompressed files under {args.root} (brotli={BROTLI_AVAILABLE})")
@@ -0,0 +1,236 @@
+"""
+Pre-aggregated submission counts behind GET /api/admin/stats.
+
+Each saved submission increments two rollup documents in submission_stats:
+one for its hour and one for its day.
+
+    {_id: "contact:hour:2026-10-18T13:00:00", form_type: "contact",
+     granularity: "hour", bucket: 2026-10-18T13:00, total: 12,
+     project_type: {"website": 7, "unspecified": 5},
+     budget: {"5k-10k": 4, ...}, formspree_status: {"pending": 2, "sent": 10}}
+
+Dimensions are counted independently (marginals, not a cross product), so
+the documents stay small. A stats query reads one document per bucket,
+however many submissions the bucket covers. When a formspree_status
+changes, one count moves from the old status to the new one in the
+submission's buckets.
+
+Counting is best effort. A failed $inc is logged and not retried;
+backfill() rebuilds the rollups from the raw collections.
+"""
+import asyncio
+import logging
+from collections import Counter, defaultdict
+from datetime import datetime, timedelta
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+
+from pymongo import UpdateOne
+
+from core.metrics import instrumented
+from services.circuit_breaker import CircuitBreaker, guarded
+from services.write_behind import WriteBehindBuffer
+
+logger = logging.getLogger(__name__)
+
+GRANULARITIES = {"hour": timedelta(hours=1), "day": timedelta(days=1)}
+DIMENSIONS = {
+    "contact": ("project_type", "budget", "formspree_status"),
+    "waitlist": ("formspree_status",),
+}
+UNSPECIFIED = "unspecified"
+BUCKET_FORMAT = "%Y-%m-%dT%H:%M:%S"
+
+# (submitted_at, old formspree_status, new formspree_status)
+StatusChange = Tuple[Optional[datetime], Optional[str], str]
+
+
+def dimension_key(value: Any) -> str:
+    """Counter key for a dimension value: trimmed, lowercased, no '.' or '$' (they are Mongo path syntax)"""
+    key = str(value).strip().lower().replace(".", "_").replace("$", "_") if value is not None else ""
+    return key or UNSPECIFIED
+
+
+def bucket_start(at: datetime, granularity: str) -> datetime:
+    at = at.replace(minute=0, second=0, microsecond=0)
+    return at.replace(hour=0) if granularity == "day" else at
+
+
+def rollup_id(form_type: str, granularity: str, bucket: datetime) -> str:
+    return f"{form_type}:{granularity}:{bucket.strftime(BUCKET_FORMAT)}"
+
+
+def _key_expression(field: str) -> Dict[str, Any]:
+    """dimension_key() as an aggregation expression, so backfilled counts land under the same keys"""
+    text: Any = {"$toLower": {"$trim": {"input": {"$toString": {"$ifNull": [f"${field}", ""]}}}}}
+    for char in (".", "$"):
+        text = {"$replaceAll": {"input": text, "find": {"$literal": char}, "replacement": "_"}}
+    return {"$let": {"vars": {"key": text}, "in": {"$cond": [{"$eq": ["$$key", ""]}, UNSPECIFIED, "$$key"]}}}
+
+
+def _add_counts(into: Dict[str, Any], doc: Dict[str, Any], dimensions: Iterable[str]):
+    into["total"] = into.get("total", 0) + doc.get("total", 0)
+    for dimension in dimensions:
+        counts = into.setdefault(dimension, {})
+        for key, count in (doc.get(dimension) or {}).items():
+            counts[key] = counts.get(key, 0) + count
+
+
+def _drop_zeros(counts: Dict[str, Any]) -> Dict[str, Any]:
+    """Keys whose count went back to zero (every pending submission sent, say) are left out"""
+    return {k: ({key: n for key, n in v.items() if n} if isinstance(v, dict) else v) for k, v in counts.items()}
+
+
+class StatsService:
+    def __init__(self, db, write_behind: Optional[WriteBehindBuffer] = None,
+                 breaker: Optional[CircuitBreaker] = None, collection: str = "submission_stats"):
+        self.db = db
+        self.collection = db[collection]
+        # Counter updates ride in the same bulk_write batches as the inserts they count
+        self.write_behind = write_behind
+        self.breaker = breaker
+
+    async def ensure_indexes(self):
+        await self.collection.create_index([("granularity", 1), ("bucket", 1), ("form_type", 1)])
+
+    # -- counting --------------------------------------------------------
+    async def record_submissions(self, form_type: str, docs: Iterable[Dict[str, Any]]):
+        """Count newly stored submission documents"""
+        increments: Dict[Tuple[str, datetime], Counter] = defaultdict(Counter)
+        for doc in docs:
+            at = doc.get("submitted_at") or datetime.utcnow()
+            for granularity in GRANULARITIES:
+                counter = increments[(granularity, bucket_start(at, granularity))]
+                counter["total"] += 1
+                for dimension in DIMENSIONS[form_type]:
+                    counter[f"{dimension}.{dimension_key(doc.get(dimension))}"] += 1
+        await self._apply(form_type, increments)
+
+    async def record_status_changes(self, form_type: str, changes: Iterable[StatusChange]):
+        """Move counts between formspree_status keys for submissions whose status changed"""
+        increments: Dict[Tuple[str, datetime], Counter] = defaultdict(Counter)
+        for submitted_at, old, new in changes:
+            old_key, new_key = dimension_key(old), dimension_key(new)
+            if old_key == new_key:
+                continue
+            for granularity in GRANULARITIES:
+                counter = increments[(granularity, bucket_start(submitted_at or datetime.utcnow(), granularity))]
+                counter[f"formspree_status.{old_key}"] -= 1
+                counter[f"formspree_status.{new_key}"] += 1
+        await self._apply(form_type, increments)
+
+    async def _apply(self, form_type: str, increments: Dict[Tuple[str, datetime], Counter]):
+        operations = []
+        for (granularity, bucket), counter in increments.items():
+            inc = {path: n for path, n in counter.items() if n}
+            if not inc:
+                continue
+            operations.append((
+                {"_id": rollup_id(form_type, granularity, bucket)},
+                {
+                    "$inc": inc,
+                    "$setOnInsert": {"form_type": form_type, "granularity": granularity, "bucket": bucket},
+                },
+            ))
+        if not operations:
+            return
+        try:
+            await self._write(operations)
+        except Exception as e:
+            # The submission is stored either way; backfill() brings the counters back in line
+            logger.error(f"Could not update {form_type} stats rollups: {str(e)}")
+
+    @instrumented("mongo")
+    @guarded()
+    async def _write(self, operations: List[Tuple[Dict[str, Any], Dict[str, Any]]]):
+        """(query, update) upserts"""
+        if self.write_behind:
+            await asyncio.gather(*(
+                self.write_behind.update(self.collection, query, update, upsert=True) for query, update in operations
+            ))
+        else:
+            await self.collection.bulk_write(
+                [UpdateOne(query, update, upsert=True) for query, update in operations], ordered=False
+            )
+
+    # -- reading ---------------------------------------------------------
+    @instrumented("mongo")
+    @guarded()
+    async def query(self, granularity: str, start: datetime, end: datetime,
+                    form_type: Optional[str] = None) -> Dict[str, Any]:
+        """
+        Rollup buckets with start <= bucket < end, oldest first, and their sum
+        per form type. Reads one document per bucket and form type.
+        """
+        query: Dict[str, Any] = {"granularity": granularity, "bucket": {"$gte": start, "$lt": end}}
+        if form_type:
+            query["form_type"] = form_type
+        cursor = self.collection.find(query, {"_id": 0}).sort([("bucket", 1), ("form_type", 1)])
+        buckets = []
+        totals: Dict[str, Dict[str, Any]] = {}
+        async for doc in cursor:
+            dimensions = DIMENSIONS.get(doc["form_type"], ())
+            _add_counts(totals.setdefault(doc["form_type"], {}), doc, dimensions)
+            row = {"bucket": doc["bucket"], "form_type": doc["form_type"]}
+            _add_counts(row, doc, dimensions)
+            buckets.append(_drop_zeros(row))
+        return {
+            "granularity": granularity,
+            "start": start,
+            "end": end,
+            "totals": {name: _drop_zeros(counts) for name, counts in totals.items()},
+            "buckets": buckets,
+        }
+
+    # -- backfill --------------------------------------------------------
+    def _backfill_pipeline(self, form_type: str, granularity: str, dimension: str) -> List[Dict[str, Any]]:
+        """
+        Count one dimension per bucket and $merge it into the rollups. Every
+        submission has exactly one key per dimension (UNSPECIFIED included),
+        so each pipeline also writes the bucket total.
+        """
+        return [
+            {"$match": {"submitted_at": {"$type": "date"}}},
+            {"$group": {
+                "_id": {
+                    "bucket": {"$dateTrunc": {"date": "$submitted_at", "unit": granularity}},
+                    "key": _key_expression(dimension),
+                },
+                "count": {"$sum": 1},
+            }},
+            {"$group": {
+                "_id": "$_id.bucket",
+                "total": {"$sum": "$count"},
+                "counts": {"$push": {"k": "$_id.key", "v": "$count"}},
+            }},
+            {"$project": {
+                "_id": {"$concat": [
+                    f"{form_type}:{granularity}:",
+                    {"$dateToString": {"date": "$_id", "format": BUCKET_FORMAT}},
+                ]},
+                "form_type": {"$literal": form_type},
+                "granularity": {"$literal": granularity},
+                "bucket": "$_id",
+                "total": 1,
+                dimension: {"$arrayToObject": "$counts"},
+            }},
+            {"$merge": {"into": self.collection.name, "on": "_id", "whenMatched": "merge", "whenNotMatched": "insert"}},
+        ]
+
+    async def backfill(self, form_types: Iterable[str] = tuple(DIMENSIONS)) -> Dict[str, int]:
+        """
+        Rebuild the rollups of these form types from the raw collections,
+        server side. Returns the number of rollup documents per form type.
+        Submissions stored while it runs can be counted twice or missed in
+        their bucket, so run it while the forms are quiet.
+        """
+        rebuilt = {}
+        for form_type in form_types:
+            raw = self.db[f"{form_type}_submissions"]
+            await self.collection.delete_many({"form_type": form_type})
+            for granularity in GRANULARITIES:
+                for dimension in DIMENSIONS[form_type]:
+                    # $merge writes from the server; the cursor comes back empty
+                    await raw.aggregate(self._backfill_pipeline(form_type, granularity, dimension)).to_list(None)
+            rebuilt[form_type] = await self.collection.count_documents({"form_type": form_type})
+            logger.info(f"Rebuilt {rebuilt[form_type]} {form_type} stats rollups")
+        return rebuilt
@@ -0,0 +1,141 @@
+import asyncio
+import logging
+from typing import Any, Dict, List, Optional, Set, Tuple
+
+from pymongo import InsertOne, UpdateOne
+from pymongo.errors import BulkWriteError, DuplicateKeyError, WriteError
+
+from core.metrics import span
+
+logger = logging.getLogger(__name__)
+
+# Durability modes
+ACK = "ack"            # callers wait until their write is in an acknowledged bulk_write
+BUFFERED = "buffered"  # callers return once the write is queued; failures are logged
+DURABILITY_MODES = (ACK, BUFFERED)
+
+
+class WriteBehindBuffer:
+    """
+    Groups concurrent single-document writes into unordered bulk_write calls,
+    one per collection, flushed when max_batch operations are waiting or
+    max_delay seconds after the first one arrived. Each caller gets its own
+    future, resolved from that operation's slot in the bulk result.
+
+    Flushes of one collection run one at a time and in submission order, so a
+    buffered update never overtakes the insert it refers to; writes queued
+    while a flush is in flight form the next batch.
+    """
+
+    def __init__(self, max_batch: int = 500, max_delay: float = 0.002, durability: str = ACK):
+        if durability not in DURABILITY_MODES:
+            raise ValueError(f"Unknown durability mode: {durability}")
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self.durability = durability
+        self._pending: Dict[str, Tuple[Any, List[Tuple[Any, asyncio.Future]]]] = {}
+        self._timers: Dict[str, asyncio.TimerHandle] = {}
+        self._inflight: Set[asyncio.Task] = set()
+        self._locks: Dict[str, asyncio.Lock] = {}
+        self.flushes = 0
+        self.operations = 0
+        self.failed = 0
+
+    async def insert(self, collection, doc: Dict[str, Any], wait: Optional[bool] = None):
+        """Queue an insert. doc must carry its _id, which is returned."""
+        await self._submit(collection, InsertOne(doc), wait)
+        return doc["_id"]
+
+    async def update(self, collection, query: Dict[str, Any], update: Dict[str, Any],
+                     upsert: bool = False, wait: Optional[bool] = None):
+        """Queue an update_one. Returns the upserted _id (None if nothing was inserted, or not waited for)."""
+        return await self._submit(collection, UpdateOne(query, update, upsert=upsert), wait)
+
+    async def _submit(self, collection, operation, wait: Optional[bool]):
+        future = asyncio.get_running_loop().create_future()
+        name = collection.name
+        _, batch = self._pending.setdefault(name, (collection, []))
+        batch.append((operation, future))
+        if len(batch) >= self.max_batch:
+            self._flush(name)
+        elif name not in self._timers:
+            self._timers[name] = asyncio.get_running_loop().call_later(self.max_delay, self._flush, name)
+
+        if wait is None:
+            wait = self.durability == ACK
+        if wait:
+            return await future
+        future.add_done_callback(self._log_failure)
+        return None
+
+    def _flush(self, name: str):
+        timer = self._timers.pop(name, None)
+        if timer is not None:
+            timer.cancel()
+        collection, batch = self._pending.pop(name, (None, []))
+        if not batch:
+            return
+        task = asyncio.create_task(self._write(collection, batch))
+        self._inflight.add(task)
+        task.add_done_callback(self._inflight.discard)
+
+    async def _write(self, collection, batch: List[Tuple[Any, asyncio.Future]]):
+        # asyncio.Lock wakes waiters first-come first-served, which keeps flushes in order
+        async with self._locks.setdefault(collection.name, asyncio.Lock()):
+            self.flushes += 1
+            self.operations += len(batch)
+            # Unordered bulk writes may run in any order, so inserts go first and the updates
+            # (which usually target documents inserted earlier, possibly in this same batch) after
+            inserts = [entry for entry in batch if isinstance(entry[0], InsertOne)]
+            updates = [entry for entry in batch if not isinstance(entry[0], InsertOne)]
+            for segment in (inserts, updates):
+                if segment:
+                    await self._write_segment(collection, segment)
+
+    async def _write_segment(self, collection, segment: List[Tuple[Any, asyncio.Future]]):
+        operations = [op for op, _ in segment]
+        # Two updates to one document must keep their order
+        targets = [repr(op._filter) for op in operations if isinstance(op, UpdateOne)]
+        ordered = len(targets) != len(set(targets))
+        errors: Dict[int, Dict[str, Any]] = {}
+        try:
+            async with span("mongo", "bulk_write"):
+                result = await collection.bulk_write(operations, ordered=ordered)
+            upserted = result.upserted_ids or {}
+        except BulkWriteError as e:
+            errors = {error["index"]: error for error in e.details.get("writeErrors", [])}
+            upserted = {u["index"]: u["_id"] for u in e.details.get("upserted", [])}
+            if ordered and errors:
+                # An ordered bulk write stops at the first error
+                first = min(errors)
+                for index in range(first + 1, len(segment)):
+                    errors[index] = {"code": None, "errmsg": "not executed after an earlier write error"}
+        except Exception as e:
+            for _, future in segment:
+                if not future.done():
+                    future.set_exception(e)
+            return
+
+        for index, (_, future) in enumerate(segment):
+            if future.done():
+                continue
+            error = errors.get(index)
+            if error is None:
+                future.set_result(upserted.get(index))
+            elif error.get("code") == 11000:
+                future.set_exception(DuplicateKeyError(error.get("errmsg", "duplicate key"), 11000, error))
+            else:
+                future.set_exception(WriteError(error.get("errmsg", "write failed"), error.get("code"), error))
+
+    def _log_failure(self, future: asyncio.Future):
+        if future.cancelled() or future.exception() is None:
+            return
+        self.failed += 1
+        logger.error(f"Buffered write failed: {str(future.exception())}")
+
+    async def close(self):
+        """Flush everything still queued and wait for in-flight writes"""
+        for name in list(self._pending):
+            self._flush(name)
+        if self._inflight:
+            await asyncio.gather(*self._inflight, return_exceptions=True)
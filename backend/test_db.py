@@ -1,7 +1,11 @@
 import asyncio
-from core.db import client, db
+from core.db import create_mongo_client
+from core.settings import Settings
 
 async def test_db():
+    settings = Settings.from_env()
+    client = create_mongo_client(settings)
+    db = client[settings.db_name]
     try:
         # Test connection
         await client.server_info()
@@ -24,6 +28,8 @@ async def test_db():
         print(f"Database test failed: {e}")
         import traceback
         traceback.print_exc()
+    finally:
+        client.close()
 
 if __name__ == "__main__":
     asyncio.run(test_db())
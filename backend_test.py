@@ -4,6 +4,7 @@ CashCue Backend API Testing Suite
 Tests all backend functionality including form submissions, database integration, and error handling.
 """
 
+import os
 import requests
 import json
 import time
@@ -13,6 +14,10 @@ from typing import Dict, Any, List
 
 # Backend URL from frontend environment
 BACKEND_URL = "https://cashcue-future.preview.emergentagent.com"
+# The admin listings require the backend's ADMIN_TOKEN
+ADMIN_TOKEN = os.environ.get("ADMIN_TOKEN", "")
+# Submissions sooner than this after the form token was issued are dropped as bot traffic
+FORM_FILL_SECONDS = 3.5
 
 class CashCueBackendTester:
     def __init__(self):
@@ -22,7 +27,20 @@ class CashCueBackendTester:
             'Content-Type': 'application/json',
             'Accept': 'application/json'
         })
+        if ADMIN_TOKEN:
+            self.session.headers['X-Admin-Token'] = ADMIN_TOKEN
         self.test_results = []
+        self.form_tokens = {}
+
+    def form_token(self, form: str):
+        """Token from /api/form-token, fetched once per form and aged past the minimum fill time"""
+        if form not in self.form_tokens:
+            response = self.session.get(f"{self.base_url}/api/form-token", params={"form": form}, timeout=10)
+            token = response.json().get("token") if response.status_code == 200 else None
+            if token:
+                time.sleep(FORM_FILL_SECONDS)
+            self.form_tokens[form] = token
+        return self.form_tokens[form]
         
     def log_test(self, test_name: str, success: bool, details: str = "", response_data: Any = None):
         """Log test results"""
@@ -87,7 +105,8 @@ class CashCueBackendTester:
             "company": "TechStartup Inc",
             "projectType": "website",
             "budget": "10k-25k",
-            "message": "I need a futuristic website for my tech startup. We're looking for something that showcases our AI products with modern animations and interactive elements."
+            "message": "I need a futuristic website for my tech startup. We're looking for something that showcases our AI products with modern animations and interactive elements.",
+            "_form_token": self.form_token("contact")
         }
         
         try:
@@ -165,7 +184,8 @@ class CashCueBackendTester:
         test_data = {
             "name": "Michael Chen",
             "email": "michael.chen@entrepreneur.com",
-            "interests": "I'm interested in using AI to create passive income streams through digital products and automated business processes."
+            "interests": "I'm interested in using AI to create passive income streams through digital products and automated business processes.",
+            "_form_token": self.form_token("waitlist")
         }
         
         try:
@@ -193,7 +213,8 @@ class CashCueBackendTester:
         test_data = {
             "name": "Michael Chen Again",
             "email": email,  # Same email as previous test
-            "interests": "Trying to sign up again with same email"
+            "interests": "Trying to sign up again with same email",
+            "_form_token": self.form_token("waitlist")
         }
         
         try:
@@ -5,6 +5,12 @@ const API = axios.create({
   baseURL: process.env.REACT_APP_BACKEND_URL || "http://127.0.0.1:8000/api",
 });
 
+// --- Form token (spam filter; fetched when a form is rendered, sent back as _form_token) ---
+export const getFormToken = async (form) => {
+  const res = await API.get("/form-token", { params: { form } });
+  return res.data.token;
+};
+
 // --- Contact Form ---
 export const submitContactForm = async (data) => {
   const res = await API.post("/contact", data);
@@ -17,13 +23,15 @@ export const submitWaitlistForm = async (data) => {
   return res.data;
 };
 
-// --- Admin Routes (optional) ---
-export const getContactSubmissions = async () => {
-  const res = await API.get("/admin/contact-submissions");
+// --- Admin Routes (optional; require the backend's ADMIN_TOKEN) ---
+const adminHeaders = (token) => ({ headers: { Authorization: `Bearer ${token}` } });
+
+export const getContactSubmissions = async (token) => {
+  const res = await API.get("/admin/contact-submissions", adminHeaders(token));
   return res.data;
 };
 
-export const getWaitlistSubmissions = async () => {
-  const res = await API.get("/admin/waitlist-submissions");
+export const getWaitlistSubmissions = async (token) => {
+  const res = await API.get("/admin/waitlist-submissions", adminHeaders(token));
   return res.data;
 };
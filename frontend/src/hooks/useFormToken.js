@@ -0,0 +1,27 @@
+import { useState, useEffect, useCallback } from 'react';
+import { getFormToken } from '../Api';
+
+/**
+ * Custom hook that fetches a signed form token when the form is rendered.
+ * The backend's spam filter uses it to tell how long the form was open.
+ * @param {string} form - 'contact' or 'waitlist'
+ * @returns {Object} The current token (null until fetched) and refresh() to get a new one after a submission
+ */
+export const useFormToken = (form) => {
+  const [token, setToken] = useState(null);
+
+  const refresh = useCallback(() => {
+    getFormToken(form)
+      .then(setToken)
+      .catch((error) => {
+        console.error('Form token error:', error);
+        setToken(null);
+      });
+  }, [form]);
+
+  useEffect(() => {
+    refresh();
+  }, [refresh]);
+
+  return { token, refresh };
+};
@@ -3,6 +3,7 @@ import ResponsiveSpline from '../components/ResponsiveSpline';
 import { Brain, Zap, TrendingUp, CheckCircle, ArrowRight } from 'lucide-react';
 import { mockCompanyInfo } from '../mock';
 import { submitWaitlistForm } from '../Api';
+import { useFormToken } from '../hooks/useFormToken';
 
 export const AIWaitlist = () => {
   const [formData, setFormData] = useState({
@@ -12,6 +13,7 @@ export const AIWaitlist = () => {
   });
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [showSuccessPopup, setShowSuccessPopup] = useState(false);
+  const formToken = useFormToken('waitlist');
 
   const handleInputChange = (e) => {
     const { name, value } = e.target;
@@ -26,7 +28,11 @@ export const AIWaitlist = () => {
     setIsSubmitting(true);
 
     try {
-      const result = await submitWaitlistForm(formData);
+      const result = await submitWaitlistForm({
+        ...formData,
+        _gotcha: e.target.elements._gotcha.value,
+        _form_token: formToken.token
+      });
 
       if (result.success) {
         setShowSuccessPopup(true);
@@ -56,6 +62,7 @@ export const AIWaitlist = () => {
       });
     } finally {
       setIsSubmitting(false);
+      formToken.refresh();
     }
   };
 
@@ -105,6 +112,15 @@ export const AIWaitlist = () => {
               <div className="bg-gray-900/50 backdrop-blur-sm border border-white/10 p-4 sm:p-6 md:p-8 mb-6 sm:mb-8">
                 <h3 className="heading-2 mb-4 sm:mb-6">Join the Waitlist</h3>
                 <form onSubmit={handleSubmit} className="space-y-3 sm:space-y-4">
+                  {/* Honeypot for bots: off screen and skipped by keyboard and screen readers */}
+                  <input
+                    type="text"
+                    name="_gotcha"
+                    tabIndex={-1}
+                    autoComplete="off"
+                    aria-hidden="true"
+                    style={{ position: 'absolute', left: '-10000px' }}
+                  />
                   <div>
                     <input
                       type="text"
@@ -2,6 +2,7 @@ import React, { useState } from 'react';
 import { Mail, MessageCircle, MapPin, Phone, Send, CheckCircle } from 'lucide-react';
 import { mockCompanyInfo } from '../mock';
 import { submitContactForm } from '../Api';
+import { useFormToken } from '../hooks/useFormToken';
 
 export const Contact = () => {
   const [formData, setFormData] = useState({
@@ -14,6 +15,7 @@ export const Contact = () => {
   });
   const [isSubmitting, setIsSubmitting] = useState(false);
   const [showSuccessPopup, setShowSuccessPopup] = useState(false);
+  const formToken = useFormToken('contact');
 
   const handleInputChange = (e) => {
     const { name, value } = e.target;
@@ -28,7 +30,11 @@ export const Contact = () => {
     setIsSubmitting(true);
 
     try {
-      const result = await submitContactForm(formData);
+      const result = await submitContactForm({
+        ...formData,
+        _gotcha: e.target.elements._gotcha.value,
+        _form_token: formToken.token
+      });
 
       if (result.success) {
         setShowSuccessPopup(true);
@@ -67,6 +73,7 @@ export const Contact = () => {
       });
     } finally {
       setIsSubmitting(false);
+      formToken.refresh();
     }
   };
 
@@ -92,6 +99,15 @@ export const Contact = () => {
               <div className="bg-gray-900/30 backdrop-blur-sm border border-white/10 p-8">
                 <h2 className="heading-2 mb-6">Send Us a Message</h2>
                 <form id="contact-form" onSubmit={handleSubmit} className="space-y-6">
+                  {/* Honeypot for bots: off screen and skipped by keyboard and screen readers */}
+                  <input
+                    type="text"
+                    name="_gotcha"
+                    tabIndex={-1}
+                    autoComplete="off"
+                    aria-hidden="true"
+                    style={{ position: 'absolute', left: '-10000px' }}
+                  />
                   <div className="grid grid-cols-1 md:grid-cols-2 gap-6">
                     <div>
                       <label htmlFor="name" className="block body-medium text-gray-300 mb-2">
@@ -0,0 +1,39 @@
+"""
+Tests run against the in-memory fakes in backend/fakes, so no Mongo or
+Formspree is needed:
+
+    python -m pytest -q
+
+Async tests use anyio's pytest plugin (installed with httpx and FastAPI).
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+BACKEND_DIR = Path(__file__).resolve().parent.parent / "backend"
+sys.path.insert(0, str(BACKEND_DIR))
+
+from fakes.formspree_server import FakeFormspreeServer  # noqa: E402
+from fakes.mongo import FakeMotorClient  # noqa: E402
+
+
+@pytest.fixture
+def anyio_backend():
+    return "asyncio"
+
+
+@pytest.fixture
+def mongo():
+    return FakeMotorClient()
+
+
+@pytest.fixture
+def db(mongo):
+    return mongo["test"]
+
+
+@pytest.fixture
+def formspree():
+    with FakeFormspreeServer() as fake:
+        yield fake
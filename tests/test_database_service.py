@@ -0,0 +1,70 @@
+import asyncio
+
+import pytest
+from bson import ObjectId
+from pymongo.errors import DuplicateKeyError
+
+from services.circuit_breaker import BatchTimeout, CircuitBreaker, CircuitOpenError
+from services.database_service_fixed import DatabaseService
+
+pytestmark = pytest.mark.anyio
+
+
+async def test_ensure_indexes_backfills_normalized_emails(db):
+    waitlist = db["waitlist_submissions"]
+    await waitlist.insert_one({"name": "Old", "email": "  Sam@Example.COM "})
+    await waitlist.insert_one({"name": "New", "email": "kim@example.com", "email_normalized": "kim@example.com"})
+
+    await DatabaseService(db).ensure_indexes()
+
+    old = await waitlist.find_one({"name": "Old"})
+    assert old["email_normalized"] == "sam@example.com"
+    with pytest.raises(DuplicateKeyError):
+        await waitlist.insert_one({"name": "Again", "email": "sam@example.com", "email_normalized": "sam@example.com"})
+
+
+def contacts(count: int):
+    return [{"_id": ObjectId(), "name": f"Person {n}", "email": f"p{n}@example.com"} for n in range(count)]
+
+
+@pytest.fixture
+def service(db):
+    return DatabaseService(db, batch_breaker=CircuitBreaker("mongo-batch", BatchTimeout(5.0, 0.0, 5.0)))
+
+
+async def test_bulk_insert_reports_duplicates_by_index(service):
+    docs = contacts(3)
+    await service.contact_collection.insert_one(dict(docs[1]))
+    assert await service.insert_submissions_many("contact", docs) == {1: "duplicate"}
+
+
+async def test_timed_out_bulk_insert_reports_what_landed(service, monkeypatch):
+    docs = contacts(4)
+
+    async def times_out_half_way(form_type, batch):
+        await service.contact_collection.insert_many(batch[:2])
+        raise asyncio.TimeoutError()
+
+    monkeypatch.setattr(service, "_insert_many", times_out_half_way)
+    assert await service.insert_submissions_many("contact", docs) == {2: "error", 3: "error"}
+
+
+async def test_unverifiable_bulk_insert_is_unknown(service, monkeypatch):
+    async def times_out(form_type, batch):
+        raise asyncio.TimeoutError()
+
+    async def unreachable(form_type, ids):
+        raise ConnectionError("mongo down")
+
+    monkeypatch.setattr(service, "_insert_many", times_out)
+    monkeypatch.setattr(service, "_existing_ids", unreachable)
+    assert await service.insert_submissions_many("contact", contacts(2)) == {0: "unknown", 1: "unknown"}
+
+
+async def test_open_circuit_is_raised_since_nothing_was_sent(service, monkeypatch):
+    async def circuit_open(form_type, batch):
+        raise CircuitOpenError("mongo-batch", 5.0)
+
+    monkeypatch.setattr(service, "_insert_many", circuit_open)
+    with pytest.raises(CircuitOpenError):
+        await service.insert_submissions_many("contact", contacts(2))
@@ -0,0 +1,105 @@
+import asyncio
+from datetime import datetime
+
+import httpx
+import pytest
+
+from app_factory import create_app
+from core.settings import Settings
+from models import ContactSubmissionCreate
+from services.idempotency import IDEMPOTENCY_HEADER, IdempotencyConflict, IdempotencyStore
+
+pytestmark = pytest.mark.anyio
+
+
+def contact(message: str = "We need a booking system for our clinic.", **extra):
+    return {"name": "Priya Patel", "email": "priya@example.com", "message": message, **extra}
+
+
+@pytest.fixture
+async def client(mongo, formspree):
+    settings = Settings(formspree_endpoint=formspree.url, outbox_poll_interval=60, spool_enabled=False,
+                        rate_limit_enabled=False, spam_filter_enabled=False)
+    app = create_app(settings, mongo_client_factory=lambda _: mongo)
+    async with app.router.lifespan_context(app):
+        transport = httpx.ASGITransport(app=app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://test") as client:
+            yield client
+
+
+async def count_contacts(mongo):
+    return await mongo[Settings().db_name]["contact_submissions"].count_documents({})
+
+
+async def test_retry_with_the_same_key_replays_the_first_response(client, mongo):
+    headers = {IDEMPOTENCY_HEADER: "retry-1"}
+    first = await client.post("/api/contact", json=contact(), headers=headers)
+    # Same submission, differently spaced and cased: still the same payload
+    retry = await client.post("/api/contact", json=contact(email="Priya@Example.com ", message=" We need a booking "
+                                                           "system  for our clinic."), headers=headers)
+    assert first.status_code == retry.status_code == 200
+    assert retry.json() == first.json()
+    assert retry.headers["Idempotent-Replayed"] == "true"
+    assert "Idempotent-Replayed" not in first.headers
+    assert await count_contacts(mongo) == 1
+
+
+async def test_key_reused_with_another_payload_is_422(client, mongo):
+    headers = {IDEMPOTENCY_HEADER: "retry-2"}
+    assert (await client.post("/api/contact", json=contact(), headers=headers)).status_code == 200
+    reused = await client.post("/api/contact", json=contact("Something else entirely."), headers=headers)
+    assert reused.status_code == 422
+    assert await count_contacts(mongo) == 1
+
+
+async def test_malformed_key_is_400(client):
+    response = await client.post("/api/contact", json=contact(), headers={IDEMPOTENCY_HEADER: "x" * 300})
+    assert response.status_code == 400
+
+
+async def test_key_in_flight_on_another_worker_is_409(client, mongo):
+    store = IdempotencyStore(mongo[Settings().db_name])
+    request = store.request_for("contact", "retry-3", ContactSubmissionCreate(**contact()))
+    # Another worker claimed the key a moment ago and has not finished
+    now = datetime.utcnow()
+    await store.collection.insert_one({"_id": request.key, "fingerprint": request.fingerprint,
+                                       "state": "pending", "created_at": now, "expires_at": now})
+    response = await client.post("/api/contact", json=contact(), headers={IDEMPOTENCY_HEADER: "retry-3"})
+    assert response.status_code == 409
+    assert response.headers["Retry-After"] == "1"
+    assert await count_contacts(mongo) == 0
+
+
+async def test_concurrent_duplicates_run_the_handler_once(db):
+    store = IdempotencyStore(db)
+    request = store.request_for("contact", "retry-4", ContactSubmissionCreate(**contact()))
+    calls = 0
+
+    async def handler():
+        nonlocal calls
+        calls += 1
+        await asyncio.sleep(0.01)
+        return {"success": True, "submission_id": "abc"}
+
+    results = await asyncio.gather(*(store.run(request, handler) for _ in range(5)))
+    assert calls == 1
+    assert [replayed for _, replayed in results].count(False) == 1
+    assert all(response["submission_id"] == "abc" for response, _ in results)
+
+
+async def test_failed_request_releases_its_key(db):
+    store = IdempotencyStore(db)
+    request = store.request_for("contact", "retry-5", ContactSubmissionCreate(**contact()))
+
+    async def broken():
+        raise RuntimeError("formspree and mongo both down")
+
+    async def working():
+        return {"success": True}
+
+    with pytest.raises(RuntimeError):
+        await store.run(request, broken)
+    assert await store.run(request, working) == ({"success": True}, False)
+    with pytest.raises(IdempotencyConflict) as conflict:
+        await store.run(request._replace(fingerprint="other"), working)
+    assert conflict.value.status_code == 422
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+import pytest
+from bson import ObjectId
+
+from services.database_service_fixed import DatabaseService
+from services.formspree_service import FormspreeService
+from services.outbox_service import STATUS_FAILED, STATUS_PROCESSING, STATUS_SENT, OutboxDispatcher, OutboxService
+
+pytestmark = pytest.mark.anyio
+
+
+async def store_submissions(db, count: int):
+    ids = []
+    for n in range(count):
+        result = await db["contact_submissions"].insert_one({
+            "name": f"Person {n}", "email": f"p{n}@example.com", "message": "Hello",
+            "submitted_at": datetime.utcnow(), "formspree_status": "pending",
+        })
+        ids.append(str(result.inserted_id))
+    return ids
+
+
+async def formspree_status(db, submission_id: str):
+    doc = await db["contact_submissions"].find_one({"_id": ObjectId(submission_id)})
+    return doc["formspree_status"]
+
+
+@pytest.fixture
+async def formspree_service(formspree):
+    service = FormspreeService(formspree.url, batch_size=10)
+    await service.start()
+    yield service
+    await service.close()
+
+
+def dispatcher(outbox, formspree_service, db, **kwargs):
+    return OutboxDispatcher(outbox, formspree_service, DatabaseService(db), concurrency=1, **kwargs)
+
+
+async def test_delivery_marks_the_entry_and_the_submission_sent(db, formspree, formspree_service):
+    outbox = OutboxService(db)
+    (submission_id,) = await store_submissions(db, 1)
+    await outbox.enqueue("contact", submission_id, {"email": "p0@example.com"})
+
+    assert await dispatcher(outbox, formspree_service, db).drain() == 1
+    assert formspree.requests == 1
+    entry = await outbox.collection.find_one({})
+    assert entry["status"] == STATUS_SENT
+    assert await formspree_status(db, submission_id) == "sent"
+
+
+async def test_lost_lease_result_is_left_to_the_new_holder(db, formspree, formspree_service):
+    # Zero-length leases: the first holder's lease has run out before it reports back
+    outbox = OutboxService(db, lease_seconds=0)
+    (submission_id,) = await store_submissions(db, 1)
+    await outbox.enqueue("contact", submission_id, {"email": "p0@example.com"})
+    slow = await outbox.claim_next()
+    fast = await outbox.claim_next()
+    assert fast["id"] == slow["id"] and fast["claim"] != slow["claim"]
+
+    worker = dispatcher(outbox, formspree_service, db, max_attempts=1)
+    formspree.error_rate = 1.0
+    await worker.deliver(fast)  # the new holder's attempt fails permanently
+    formspree.error_rate = 0.0
+    await worker.deliver(slow)  # the old holder succeeds, but too late to count
+
+    entry = await outbox.collection.find_one({})
+    assert entry["status"] == STATUS_FAILED
+    assert entry["claim"] == fast["claim"]
+    assert await formspree_status(db, submission_id) == "failed"
+    assert not await outbox.mark_sent(slow["id"], slow["claim"])
+
+
+async def test_batch_updates_only_the_entries_it_still_holds(db, formspree, formspree_service):
+    outbox = OutboxService(db, lease_seconds=0)
+    submission_ids = await store_submissions(db, 3)
+    for n, submission_id in enumerate(submission_ids):
+        await outbox.enqueue("contact", submission_id, {"email": f"p{n}@example.com"})
+    entries = await outbox.claim_batch(10)
+    assert len(entries) == 3
+    # Another worker re-leases one entry whose lease ran out and is still delivering it
+    taken = await outbox.claim_next()
+
+    await dispatcher(outbox, formspree_service, db).deliver_batch("contact", entries)
+
+    assert formspree.requests == 1  # one digest for the batch
+    by_id = {e["id"]: e for e in await outbox.collection.find({}).to_list(None)}
+    assert by_id[taken["id"]]["status"] == STATUS_PROCESSING
+    assert by_id[taken["id"]]["claim"] == taken["claim"]
+    for entry in entries:
+        expected = "pending" if entry["id"] == taken["id"] else "sent"
+        assert await formspree_status(db, entry["submission_id"]) == expected
+        if entry["id"] != taken["id"]:
+            assert by_id[entry["id"]]["status"] == STATUS_SENT
@@ -0,0 +1,63 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from fakes.rate_limit_backend import FakeSharedRateLimitBackend
+from services.rate_limiter import MemoryRateLimitBackend, MongoRateLimitBackend, RateLimit, RateLimiter
+
+pytestmark = pytest.mark.anyio
+
+# Two requests at once, one more every five seconds
+LIMIT = RateLimit(2, 10)
+
+
+def test_bucket_refills_at_burst_over_period():
+    backend = MemoryRateLimitBackend()
+    assert backend.take_sync("k", LIMIT, now=100.0) == (True, 0.0)
+    assert backend.take_sync("k", LIMIT, now=100.0) == (True, 0.0)
+    allowed, retry_after = backend.take_sync("k", LIMIT, now=100.0)
+    assert not allowed
+    assert retry_after == pytest.approx(5.0)
+
+    assert backend.take_sync("k", LIMIT, now=102.5)[0] is False
+    assert backend.take_sync("k", LIMIT, now=105.0) == (True, 0.0)
+    assert backend.take_sync("k", LIMIT, now=105.0)[0] is False
+
+
+def test_refill_is_capped_at_burst():
+    backend = MemoryRateLimitBackend()
+    backend.take_sync("k", LIMIT, now=0.0)
+    # Far longer than needed to refill: still only `burst` requests at once
+    results = [backend.take_sync("k", LIMIT, now=1_000.0)[0] for _ in range(3)]
+    assert results == [True, True, False]
+
+
+def test_buckets_are_per_key_and_bounded():
+    backend = MemoryRateLimitBackend(max_keys=2)
+    for key in ("a", "b", "c"):
+        backend.take_sync(key, LIMIT, now=0.0)
+    assert len(backend) == 2
+
+
+async def test_workers_sharing_a_store_share_one_limit():
+    store = FakeSharedRateLimitBackend.new_store()
+    limit = RateLimit(3, 60)
+    workers = [RateLimiter(FakeSharedRateLimitBackend(store), limit, limit) for _ in range(3)]
+    results = [(await worker.check_ip("203.0.113.9"))[0] for worker in workers + workers]
+    assert results.count(True) == 3
+
+
+async def test_mongo_backend_spends_and_refills(db):
+    backend = MongoRateLimitBackend(db)
+    assert (await backend.take("k", LIMIT))[0]
+    assert (await backend.take("k", LIMIT))[0]
+    allowed, retry_after = await backend.take("k", LIMIT)
+    assert not allowed
+    assert retry_after == pytest.approx(5.0, abs=0.1)
+
+    # Five seconds later one token has come back
+    await backend.collection.update_one(
+        {"_id": "k"}, {"$set": {"updated_at": datetime.utcnow() - timedelta(seconds=5)}}
+    )
+    assert (await backend.take("k", LIMIT))[0]
+    assert not (await backend.take("k", LIMIT))[0]
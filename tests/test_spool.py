@@ -0,0 +1,82 @@
+import logging
+
+import bson
+import pytest
+
+from services.spool import OP_INSERT, SEGMENT_GLOB, SubmissionSpool
+
+pytestmark = pytest.mark.anyio
+
+
+def record(n: int):
+    return {"op": OP_INSERT, "form_type": "contact", "doc": {"name": f"Person {n}", "email": f"p{n}@example.com"}}
+
+
+async def replay_all(spool: SubmissionSpool):
+    applied = []
+
+    async def apply(records):
+        applied.extend(records)
+
+    count = await spool.replay(apply, batch_size=2)
+    return count, applied
+
+
+async def write_segment(directory, records):
+    spool = SubmissionSpool(directory, fsync_delay=0)
+    for r in records:
+        await spool.append(r)
+    await spool.close()
+    (segment,) = directory.glob(SEGMENT_GLOB)
+    return segment
+
+
+async def test_replay_applies_records_in_order_and_removes_the_segment(tmp_path):
+    await write_segment(tmp_path, [record(n) for n in range(5)])
+    spool = SubmissionSpool(tmp_path)
+    count, applied = await replay_all(spool)
+    assert count == 5
+    assert [r["doc"]["name"] for r in applied] == [f"Person {n}" for n in range(5)]
+    assert not list(tmp_path.glob(SEGMENT_GLOB))
+    assert not spool.has_records()
+
+
+@pytest.mark.parametrize("tail", [
+    b"\x00\x00",  # crashed inside the record header
+    b"\x00\x00\x01\x00\xde\xad\xbe\xef" + b"x" * 10,  # header written, payload cut short
+])
+async def test_torn_tail_is_dropped_and_earlier_records_replayed(tmp_path, caplog, tail):
+    segment = await write_segment(tmp_path, [record(n) for n in range(3)])
+    with open(segment, "ab") as f:
+        f.write(tail)
+    with caplog.at_level(logging.WARNING, logger="services.spool"):
+        count, applied = await replay_all(SubmissionSpool(tmp_path))
+    assert count == 3
+    assert [r["doc"]["name"] for r in applied] == ["Person 0", "Person 1", "Person 2"]
+    assert "torn data" in caplog.text
+    assert not list(tmp_path.glob(SEGMENT_GLOB))
+
+
+async def test_corrupt_record_stops_replay_at_that_record(tmp_path):
+    segment = await write_segment(tmp_path, [record(n) for n in range(3)])
+    data = bytearray(segment.read_bytes())
+    # Flip a byte inside the last record's payload: its CRC no longer matches
+    data[-len(bson.encode(record(2))) // 2] ^= 0xFF
+    segment.write_bytes(bytes(data))
+    count, applied = await replay_all(SubmissionSpool(tmp_path))
+    assert count == 2
+    assert [r["doc"]["name"] for r in applied] == ["Person 0", "Person 1"]
+
+
+async def test_failed_apply_keeps_the_segment_for_the_next_replay(tmp_path):
+    await write_segment(tmp_path, [record(n) for n in range(3)])
+    spool = SubmissionSpool(tmp_path)
+
+    async def unavailable(records):
+        raise ConnectionError("mongo down")
+
+    with pytest.raises(ConnectionError):
+        await spool.replay(unavailable)
+    assert spool.has_records()
+    count, _ = await replay_all(spool)
+    assert count == 3